@@ -266,16 +266,71 @@ AI_FEATURES = {
     'ai_smart_attributes': True,        # 智能属性提取 ✅ 已启用
 }
 
+# AI功能开关进程内缓存时间(秒)，enable/disable在该时间内同步到所有进程
+AI_FEATURE_FLAGS_LOCAL_TTL = 1.0
+
 # DeepSeek API配置
 DEEPSEEK_CONFIG = {
     'api_key': os.getenv('DEEPSEEK_API_KEY', 'sk-0b887a439c0346e4a23d0af456df2506'),
-    'base_url': 'https://api.deepseek.com/v1',
+    'base_url': os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com/v1'),  # 可指向本地桩服务
+    'transport_mode': os.getenv('DEEPSEEK_TRANSPORT_MODE', 'live'),  # live / record / replay
+    'fixtures_dir': os.getenv('DEEPSEEK_FIXTURES_DIR', str(BASE_DIR / 'fixtures' / 'llm')),  # 录制/回放目录
     'model': 'deepseek-chat',
     'max_tokens': 1000,
     'temperature': 0.1,  # 低温度确保一致性
     'timeout': 30,       # 30秒超时
     'max_retries': 3,    # 最大重试次数
     'retry_delay': 1,    # 重试延迟(秒)
+    'rate_limit_per_second': 5,       # 跨进程共享令牌桶速率(次/秒)
+    'rate_limit_burst': 10,           # 令牌桶容量
+    'rate_limit_max_wait': 2,         # 等待令牌的最长时间(秒)，超时降级
+    'circuit_failure_threshold': 5,   # 连续失败多少次后熔断
+    'circuit_recovery_timeout': 30,   # 熔断后多久进入半开探测(秒)
+}
+
+# AI用量预算（token数为0表示不限），达到预算后降级为规则处理
+AI_USAGE_BUDGET = {
+    'daily_token_budget': int(os.getenv('AI_DAILY_TOKEN_BUDGET', 0)),    # 每日token上限
+    'import_token_budget': int(os.getenv('AI_IMPORT_TOKEN_BUDGET', 0)),  # 单次导入token上限
+    'price_per_1k_prompt_tokens': 0.002,      # 输入单价(元/千token)
+    'price_per_1k_completion_tokens': 0.008,  # 输出单价(元/千token)
+    'currency': 'CNY',
+}
+
+# 动态定价配置
+PRICING_CONFIG = {
+    'rule_table_cache_timeout': 3600,   # 定价表Redis缓存时间（秒），变更由版本号即时失效
+    'local_table_cache_size': 4096,     # 进程内定价表缓存容量
+    'batch_max_items': 200,             # 批量报价单次最多项数
+    'matrix_max_cells': 500000,         # 价格矩阵API的SKU数×尺寸组合数上限
+    'fixed_point_arithmetic': True,     # 报价使用定点整数运算（结果与Decimal运算一致）
+    'quote_cache_timeout': 30,          # 报价结果进程内缓存时间（秒），0为关闭
+    'quote_cache_size': 10000,          # 报价结果缓存容量
+}
+
+# 商品全文检索配置
+SEARCH_CONFIG = {
+    'enable_full_text': True,           # PostgreSQL上启用检索文档（tsvector + GIN），其他数据库退回icontains
+    'tokenizer': 'bigram',              # bigram：内置中文一元/二元组分词；database：交给数据库分词配置（如zhparser）
+    'text_search_config': 'simple',     # tokenizer为database时使用的文本搜索配置，如 'chinese'
+    'autocomplete_limit': 10,           # 自动补全返回条数
+    'autocomplete_min_length': 2,       # 自动补全最短查询长度
+    'autocomplete_candidate_limit': 200,  # 每个前缀缓存的候选上限，未超出时更长的查询直接在缓存中过滤
+    'autocomplete_cache_timeout': 300,  # 候选集Redis缓存时间（秒），变更由版本号即时失效
+    'autocomplete_cache_size': 5000,    # 候选集进程内缓存容量
+}
+
+# 产品读模型配置
+READ_MODEL_CONFIG = {
+    'serve_product_list': False,        # 产品列表改由读模型提供；首次开启前先执行 rebuild_read_model
+    'refresh_chunk_size': 500,          # 增量刷新每批SKU数
+}
+
+# 筛选器元数据配置
+FILTER_METADATA_CONFIG = {
+    'price_histogram_buckets': 10,      # 各分类价格直方图的等宽分桶数
+    'cache_timeout': None,              # 缓存时间（秒），None为不过期，变更由信号记录后增量更新
+    'refresh_interval': 5,              # 两次增量重算的最小间隔（秒），间隔内的变更合并为一次重算
 }
 
 # 智能属性提取配置
@@ -285,4 +340,6 @@ SMART_ATTRIBUTES_CONFIG = {
     'confidence_threshold': 0.8,    # 置信度阈值
     'max_attributes_per_product': 20,  # 每个产品最大属性数
     'attribute_similarity_threshold': 0.85,  # 属性相似度阈值
+    'mapper_attribute_cache_size': 2048,     # 映射器属性主键缓存容量
+    'mapper_value_cache_size': 20000,        # 映射器属性值主键缓存容量
 }
@@ -1,7 +1,6 @@
 from django.shortcuts import render
 from django.http import JsonResponse
-from products.models import SKU
-from django.db import models
+from products.services.pricing.sku_picker import priced_sku_queryset, search_priced_skus
 
 def home(request):
     """首页视图"""
@@ -17,49 +16,27 @@ def health_check(request):
 
 def dynamic_pricing_calculator(request):
     """动态价格计算器页面"""
-    # 获取有加价规则的SKU - 只显示有SPU且SPU有加价规则的产品
-    skus = SKU.objects.filter(
-        status='active',
-        spu__isnull=False  # 必须有SPU
-    ).select_related('spu', 'brand').distinct().order_by('name')
-    
-    # 进一步过滤有加价规则的SKU
-    filtered_skus = []
-    for sku in skus:
-        if sku.spu and sku.spu.pricing_rules.filter(is_active=True).exists():
-            filtered_skus.append(sku)
-    
-    # 如果是AJAX搜索请求
+    # AJAX搜索：只显示有SPU且SPU有加价规则的启用产品，在数据库端过滤并限制数量
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        search_term = request.GET.get('q', '').strip()
-        if search_term:
-            # 根据搜索关键词过滤SKU
-            filtered_skus = [
-                sku for sku in filtered_skus
-                if (search_term.lower() in sku.name.lower() or
-                    search_term.lower() in (sku.code or '').lower() or
-                    search_term.lower() in (sku.brand.name if sku.brand else '').lower() or
-                    search_term.lower() in (sku.spu.name if sku.spu else '').lower())
-            ]
-        
-        # 返回JSON数据
         sku_data = []
-        for sku in filtered_skus[:20]:  # 限制返回数量
+        for sku in search_priced_skus(request.GET.get('q', ''), limit=20):
+            brand_name = sku['brand__name'] or ''
             sku_data.append({
-                'id': sku.id,
-                'name': sku.name,
-                'sku_code': sku.code,  # 使用code字段
-                'price': float(sku.price) if sku.price else 0,
-                'brand': sku.brand.name if sku.brand else '',
-                'spu': sku.spu.name if sku.spu else '',
-                'display_text': f"{sku.name} - {sku.brand.name if sku.brand else '未知品牌'} - ¥{sku.price}"
+                'id': sku['id'],
+                'name': sku['name'],
+                'sku_code': sku['code'],  # 使用code字段
+                'price': float(sku['price']) if sku['price'] else 0,
+                'brand': brand_name,
+                'spu': sku['spu__name'] or '',
+                'display_text': f"{sku['name']} - {brand_name or '未知品牌'} - ¥{sku['price']}"
             })
-        
+
         return JsonResponse({'skus': sku_data})
-    
+
     context = {
-        'skus': filtered_skus,
+        # 惰性查询集，页面通过AJAX搜索加载SKU
+        'skus': priced_sku_queryset().select_related('spu', 'brand'),
         'title': '动态价格计算器',
     }
-    
+
     return render(request, 'admin/dynamic_pricing.html', context) 
\ No newline at end of file
@@ -111,7 +111,7 @@ class AttributeAdmin(BaseModelAdmin, BulkActionMixin, DisplayMixin, ValidationMi
     
     def activate_attributes(self, request, queryset):
         """批量激活属性"""
-        updated = queryset.update(is_active=True)
+        updated = self.bulk_update(queryset, is_active=True)
         self.message_user(request, f'成功激活 {updated} 个属性。', messages.SUCCESS)
     activate_attributes.short_description = "激活选中的属性"
     
@@ -130,7 +130,7 @@ class AttributeAdmin(BaseModelAdmin, BulkActionMixin, DisplayMixin, ValidationMi
             )
             return
         
-        updated = queryset.update(is_active=False)
+        updated = self.bulk_update(queryset, is_active=False)
         self.message_user(request, f'成功停用 {updated} 个属性。', messages.SUCCESS)
     deactivate_attributes.short_description = "停用选中的属性"
     
@@ -283,13 +283,13 @@ class AttributeValueAdmin(BaseModelAdmin, BulkActionMixin, DisplayMixin):
     
     def activate_values(self, request, queryset):
         """批量激活属性值"""
-        updated = queryset.update(is_active=True)
+        updated = self.bulk_update(queryset, is_active=True)
         self.message_user(request, f'成功激活 {updated} 个属性值。', messages.SUCCESS)
     activate_values.short_description = "激活选中的属性值"
     
     def deactivate_values(self, request, queryset):
         """批量停用属性值"""
-        updated = queryset.update(is_active=False)
+        updated = self.bulk_update(queryset, is_active=False)
         self.message_user(request, f'成功停用 {updated} 个属性值。', messages.SUCCESS)
     deactivate_values.short_description = "停用选中的属性值"
     
@@ -203,7 +203,7 @@ class BrandAdmin(BaseModelAdmin, BulkActionMixin, DisplayMixin, AjaxMixin):
     
     def activate_brands(self, request, queryset):
         """批量激活品牌"""
-        updated = queryset.update(is_active=True)
+        updated = self.bulk_update(queryset, is_active=True)
         self.message_user(request, f'成功激活 {updated} 个品牌。', messages.SUCCESS)
     activate_brands.short_description = "激活选中的品牌"
     
@@ -222,7 +222,7 @@ class BrandAdmin(BaseModelAdmin, BulkActionMixin, DisplayMixin, AjaxMixin):
             )
             return
         
-        updated = queryset.update(is_active=False)
+        updated = self.bulk_update(queryset, is_active=False)
         self.message_user(request, f'成功停用 {updated} 个品牌。', messages.SUCCESS)
     deactivate_brands.short_description = "停用选中的品牌"
     
@@ -85,13 +85,23 @@ class ImportTaskAdmin(admin.ModelAdmin):
     
     def result_summary_display(self, obj):
         """结果摘要显示"""
+        summary = obj.result_summary or {}
+        quality = summary.get('quality', {})
+        extra_text = f" | 质量均分: {quality['average_score']}" if 'average_score' in quality else ''
+        ai_usage = summary.get('ai_usage', {})
+        if ai_usage.get('calls'):
+            extra_text += (
+                f" | AI: {ai_usage['total_tokens']} tokens, "
+                f"{ai_usage['cost_per_1k_rows']} {ai_usage.get('currency', 'CNY')}/千行"
+            )
+
         if obj.error_rows > 0:
             return format_html(
-                '成功: {} | 错误: {} | <a href="{}">查看错误</a>',
-                obj.success_rows, obj.error_rows,
+                '成功: {} | 错误: {}{} | <a href="{}">查看错误</a>',
+                obj.success_rows, obj.error_rows, extra_text,
                 reverse('admin:products_importerror_changelist') + f'?task__id__exact={obj.id}'
             )
-        return f'成功: {obj.success_rows}'
+        return f'成功: {obj.success_rows}{extra_text}'
     result_summary_display.short_description = '结果摘要'
     
     def duration_display(self, obj):
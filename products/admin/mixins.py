@@ -13,16 +13,30 @@ from django.views.decorators.csrf import csrf_exempt
 
 class BulkActionMixin:
     """批量操作混入类"""
+
+    def bulk_update(self, queryset, **values):
+        """
+        批量更新字段并返回更新行数
+
+        queryset.update() 不发送 post_save，更新后由 handle_bulk_update 补做接口版本号、
+        读模型等的失效和刷新；主键在更新前取得，避免按被更新字段筛选的查询集结果变化
+        """
+        from ..signals import handle_bulk_update
+
+        pks = list(queryset.values_list('pk', flat=True))
+        updated = queryset.model._default_manager.filter(pk__in=pks).update(**values)
+        handle_bulk_update(queryset.model, pks)
+        return updated
     
     def bulk_activate(self, request, queryset):
         """批量激活"""
-        updated = queryset.update(is_active=True)
+        updated = self.bulk_update(queryset, is_active=True)
         self.message_user(request, f'成功激活 {updated} 个项目。', messages.SUCCESS)
     bulk_activate.short_description = "激活选中的项目"
     
     def bulk_deactivate(self, request, queryset):
         """批量停用"""
-        updated = queryset.update(is_active=False)
+        updated = self.bulk_update(queryset, is_active=False)
         self.message_user(request, f'成功停用 {updated} 个项目。', messages.SUCCESS)
     bulk_deactivate.short_description = "停用选中的项目"
 
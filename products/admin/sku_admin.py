@@ -621,19 +621,19 @@ class SKUAdmin(BaseModelAdmin, BulkActionMixin, DisplayMixin):
 
     def bulk_set_active_action(self, request, queryset):
         """批量设置为在售"""
-        updated = queryset.update(status='active')
+        updated = self.bulk_update(queryset, status='active')
         self.message_user(request, f'成功将 {updated} 个SKU设置为在售状态')
     bulk_set_active_action.short_description = "✅ 批量设置为在售"
 
     def bulk_set_inactive_action(self, request, queryset):
         """批量设置为停售"""
-        updated = queryset.update(status='inactive')
+        updated = self.bulk_update(queryset, status='inactive')
         self.message_user(request, f'成功将 {updated} 个SKU设置为停售状态')
     bulk_set_inactive_action.short_description = "⏸️ 批量设置为停售"
 
     def bulk_set_out_of_stock_action(self, request, queryset):
         """批量设置为缺货"""
-        updated = queryset.update(status='out_of_stock', stock_quantity=0)
+        updated = self.bulk_update(queryset, status='out_of_stock', stock_quantity=0)
         self.message_user(request, f'成功将 {updated} 个SKU设置为缺货状态，库存已清零')
     bulk_set_out_of_stock_action.short_description = "📦 批量设置为缺货"
 
@@ -345,7 +345,7 @@ class SPUAdmin(BaseModelAdmin, BulkActionMixin, DisplayMixin):
     
     def activate_spu(self, request, queryset):
         """激活SPU"""
-        updated = queryset.update(is_active=True)
+        updated = self.bulk_update(queryset, is_active=True)
         self.message_user(request, f'成功激活了 {updated} 个SPU')
     
     activate_spu.short_description = '激活选中的SPU'
@@ -366,7 +366,7 @@ class SPUAdmin(BaseModelAdmin, BulkActionMixin, DisplayMixin):
             )
             return
         
-        updated = queryset.update(is_active=False)
+        updated = self.bulk_update(queryset, is_active=False)
         self.message_user(request, f'成功停用了 {updated} 个SPU')
     
     deactivate_spu.short_description = '停用选中的SPU'
@@ -0,0 +1,122 @@
+"""
+定价运算基准测试
+比较 calculate_rule_increment 的Decimal运算与定点整数运算的速度，并校验结果逐位一致
+"""
+
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from products.models.pricing_models import calculate_rule_increment
+from products.services.pricing import get_sku_pricing_table, quote_sku
+from products.services.pricing.fixed_point import (
+    MICROS_PER_HUNDREDTH, micros_to_decimal, micros_to_float, rule_increment_micros, to_hundredths
+)
+
+METHODS = ('fixed', 'percentage', 'multiplier', 'step')
+
+
+def _random_amount(rng: random.Random, low: int, high: int) -> Decimal:
+    """随机生成两位小数"""
+    return Decimal(rng.randint(low * 100, high * 100)) / 100
+
+
+class Command(BaseCommand):
+    help = '比较定价加价计算的Decimal运算与定点整数运算（速度和结果一致性）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cases', type=int, default=100000, help='随机用例数')
+        parser.add_argument('--seed', type=int, default=42, help='随机种子')
+        parser.add_argument('--sku', type=int, help='额外对指定SKU的完整报价做对比')
+        parser.add_argument('--quotes', type=int, default=20000, help='完整报价对比的次数')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        cases = []
+        for _ in range(options['cases']):
+            max_increment = _random_amount(rng, 1, 2000) if rng.random() < 0.3 else None
+            cases.append((
+                rng.choice(METHODS),
+                _random_amount(rng, 0, 600),         # 超出值
+                _random_amount(rng, 0, 300),         # 价格增量
+                _random_amount(rng, 1, 100),         # 单位增量
+                _random_amount(rng, 0, 5),           # 倍数
+                max_increment,
+            ))
+
+        # Decimal路径：与原报价接口相同，计算后转float输出
+        start = time.perf_counter()
+        decimal_results = []
+        for method, excess, price, unit, multiplier, max_increment in cases:
+            increment = calculate_rule_increment(method, excess, price, unit, multiplier, max_increment)
+            decimal_results.append((increment, float(increment)))
+        decimal_elapsed = time.perf_counter() - start
+
+        # 预先换算规则参数（对应定价表编译阶段），计时只包含报价时的运算
+        compiled = [
+            (method, to_hundredths(excess), to_hundredths(price), to_hundredths(unit), to_hundredths(multiplier),
+             to_hundredths(max_increment) * MICROS_PER_HUNDREDTH if max_increment else None)
+            for method, excess, price, unit, multiplier, max_increment in cases
+        ]
+        start = time.perf_counter()
+        fixed_results = []
+        for method, excess_h, price_h, unit_h, multiplier_h, max_micros in compiled:
+            increment = rule_increment_micros(method, excess_h, price_h, unit_h, multiplier_h, max_micros)
+            fixed_results.append((increment, micros_to_float(increment)))
+        fixed_elapsed = time.perf_counter() - start
+
+        mismatches = [
+            (case, decimal_result[0], micros_to_decimal(fixed_result[0]))
+            for case, decimal_result, fixed_result in zip(cases, decimal_results, fixed_results)
+            if decimal_result[0] != micros_to_decimal(fixed_result[0]) or decimal_result[1] != fixed_result[1]
+        ]
+
+        self.stdout.write(f'用例数: {len(cases)}')
+        self.stdout.write(f'Decimal运算: {decimal_elapsed * 1000:.1f}ms')
+        self.stdout.write(f'定点整数运算: {fixed_elapsed * 1000:.1f}ms（{decimal_elapsed / fixed_elapsed:.1f}倍）')
+        if mismatches:
+            for case, expected, actual in mismatches[:10]:
+                self.stdout.write(self.style.ERROR(f'不一致: {case} Decimal={expected} 定点={actual}'))
+            raise CommandError(f'{len(mismatches)} 个用例结果不一致')
+        self.stdout.write(self.style.SUCCESS('✅ 所有用例结果逐位一致'))
+
+        if options['sku']:
+            self._benchmark_quotes(options['sku'], options['quotes'], rng)
+
+    def _benchmark_quotes(self, sku_id: int, count: int, rng: random.Random):
+        """对真实SKU的完整报价比较两种运算"""
+        table = get_sku_pricing_table(sku_id)
+        if table is None:
+            raise CommandError(f'SKU不存在: {sku_id}')
+
+        requests = []
+        for _ in range(count):
+            requests.append({
+                dimension: float(standard + _random_amount(rng, -100, 400))
+                for dimension, (standard, unit) in table.dimensions.items()
+            })
+
+        results = {}
+        for fixed_point in (False, True):
+            with override_settings(PRICING_CONFIG={'fixed_point_arithmetic': fixed_point}):
+                start = time.perf_counter()
+                quotes = [quote_sku(table, dimensions) for dimensions in requests]
+                elapsed = time.perf_counter() - start
+            results[fixed_point] = (elapsed, quotes)
+
+        def comparable(quote):
+            return quote['total_price'], quote['pricing_details']
+
+        mismatches = sum(
+            1 for left, right in zip(results[False][1], results[True][1]) if comparable(left) != comparable(right)
+        )
+        decimal_elapsed, fixed_elapsed = results[False][0], results[True][0]
+        self.stdout.write(f'SKU {sku_id} 完整报价 {count} 次:')
+        self.stdout.write(f'  Decimal运算: {decimal_elapsed * 1000:.1f}ms')
+        self.stdout.write(f'  定点整数运算: {fixed_elapsed * 1000:.1f}ms（{decimal_elapsed / fixed_elapsed:.1f}倍）')
+        if mismatches:
+            raise CommandError(f'{mismatches} 次报价结果不一致')
+        self.stdout.write(self.style.SUCCESS('  ✅ 报价结果一致'))
@@ -0,0 +1,71 @@
+"""
+导出SPU价格矩阵
+在高度×宽度×深度网格上计算SPU下所有SKU的价格，用于目录印刷和报价缓存预热
+"""
+
+import sys
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.models import SPU
+from products.services.pricing.price_matrix import (
+    build_price_matrix, write_matrix_csv, write_matrix_parquet
+)
+
+
+class Command(BaseCommand):
+    help = '导出SPU在尺寸网格上的价格矩阵（CSV或Parquet）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spu', type=int, action='append', required=True, help='SPU ID，可重复指定')
+        parser.add_argument('--height', help="高度轴，如 2200:2800:50 或 2335,2400")
+        parser.add_argument('--width', help='宽度轴')
+        parser.add_argument('--depth', help='深度轴')
+        parser.add_argument('--date', help='按该日期判断规则有效期（YYYY-MM-DD），默认今天')
+        parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='输出格式')
+        parser.add_argument('--output', help='输出文件；CSV未指定时输出到标准输出，多个SPU时作为文件名前缀')
+
+    def handle(self, *args, **options):
+        axes = {name: options[name] for name in ('height', 'width', 'depth')}
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError:
+            raise CommandError(f"日期格式应为YYYY-MM-DD: {options['date']}")
+        output_format = options['format']
+
+        if output_format == 'parquet' and not options['output']:
+            raise CommandError('Parquet格式必须指定 --output')
+
+        for spu_id in options['spu']:
+            if not SPU.objects.filter(id=spu_id).exists():
+                raise CommandError(f'SPU不存在: {spu_id}')
+
+            start_time = time.perf_counter()
+            try:
+                matrix = build_price_matrix(spu_id, axes, day=day)
+            except (ValueError, ArithmeticError) as e:
+                raise CommandError(str(e))
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+            target = options['output']
+            if target and len(options['spu']) > 1:
+                target = f'{target}_{spu_id}.{output_format}'
+
+            if output_format == 'parquet':
+                try:
+                    write_matrix_parquet(matrix, target)
+                except ImportError:
+                    raise CommandError('未安装pyarrow，无法导出Parquet')
+            elif target:
+                with open(target, 'w', newline='', encoding='utf-8-sig') as f:
+                    write_matrix_csv(matrix, f)
+            else:
+                write_matrix_csv(matrix, sys.stdout)
+
+            sku_count = len(set(matrix['sku_id'].tolist()))
+            self.stderr.write(self.style.SUCCESS(
+                f'✅ SPU {spu_id}: {sku_count}个SKU，{len(matrix["sku_id"])}行，计算耗时 {elapsed_ms:.1f}ms'
+                + (f' → {target}' if target else '')
+            ))
@@ -0,0 +1,23 @@
+"""
+重建筛选器元数据缓存
+日常由信号记录变更、读取时增量更新，批量导入或直接执行SQL绕过信号后执行
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.services.filter_metadata import rebuild_filter_metadata
+
+
+class Command(BaseCommand):
+    help = '全量重建筛选器元数据缓存（价格区间、分类价格直方图、属性值计数）'
+
+    def handle(self, *args, **options):
+        start_time = time.perf_counter()
+        payload = rebuild_filter_metadata()
+        elapsed = time.perf_counter() - start_time
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ 已重建筛选器元数据：{len(payload['attributes'])} 个属性，"
+            f"{len(payload['price_histograms'])} 个分类直方图，耗时 {elapsed:.2f}s"
+        ))
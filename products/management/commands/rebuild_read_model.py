@@ -0,0 +1,23 @@
+"""
+重建产品读模型
+首次部署读模型、或批量导入绕过信号后执行，日常由信号增量维护
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.services.read_model import rebuild_read_models
+
+
+class Command(BaseCommand):
+    help = '全量重建产品列表读模型（products_read_model）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='每批刷新的SKU数')
+
+    def handle(self, *args, **options):
+        start_time = time.perf_counter()
+        written = rebuild_read_models(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - start_time
+        self.stdout.write(self.style.SUCCESS(f'✅ 已重建 {written} 个SKU的读模型，耗时 {elapsed:.2f}s'))
@@ -0,0 +1,64 @@
+"""
+刷新定价规则适用索引
+编译并预热SKU定价表（含按生效/失效日期切分的规则窗口），建议每晚定时执行；
+规则、尺寸或SKU变更时信号会使对应定价表失效，下次报价时按需重建
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.models import SKU, ProductsPricingRule
+from products.services.pricing import (
+    get_sku_pricing_tables, invalidate_spu_pricing, warm_pricing_tables
+)
+
+
+class Command(BaseCommand):
+    help = '编译并预热SKU定价表及规则有效期窗口（适用规则索引）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spu', type=int, action='append', help='只刷新指定SPU，可重复指定')
+        parser.add_argument('--all', action='store_true', help='包含没有加价规则的SPU下的SKU')
+        parser.add_argument('--force', action='store_true', help='先使已缓存的定价表失效再重建')
+        parser.add_argument('--chunk-size', type=int, default=500, help='每批编译的SKU数')
+        parser.add_argument('--days', type=int, default=7, help='报告未来多少天内的规则切换')
+
+    def handle(self, *args, **options):
+        skus = SKU.objects.all()
+        if options['spu']:
+            skus = skus.filter(spu_id__in=options['spu'])
+        if not options['all']:
+            skus = skus.filter(spu__pricing_rules__is_active=True).distinct()
+
+        if options['force']:
+            spu_ids = set(skus.values_list('spu_id', flat=True))
+            for spu_id in spu_ids:
+                invalidate_spu_pricing(spu_id)
+            self.stdout.write(f'已使 {len(spu_ids)} 个SPU的定价表失效')
+
+        sku_ids = list(skus.order_by('id').values_list('id', flat=True))
+        start_time = time.perf_counter()
+        warmed = warm_pricing_tables(sku_ids, chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - start_time
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ 已预热 {warmed} 个SKU的定价表，耗时 {elapsed:.2f}s'
+        ))
+
+        # 报告即将发生的规则切换（切换由窗口自动完成，无需额外操作）
+        today = timezone.now().date()
+        horizon = today + timedelta(days=options['days'])
+        upcoming = (
+            ProductsPricingRule.objects.filter(is_active=True, effective_date__gt=today, effective_date__lte=horizon)
+            .count()
+            + ProductsPricingRule.objects.filter(is_active=True, expiry_date__gt=today, expiry_date__lte=horizon)
+            .count()
+        )
+        tables = get_sku_pricing_tables(sku_ids[:options['chunk_size']])
+        multi_window = sum(1 for table in tables.values() if len(table.windows) > 1)
+        self.stdout.write(
+            f'未来{options["days"]}天内有 {upcoming} 次规则生效/失效；'
+            f'抽样 {len(tables)} 个SKU中 {multi_window} 个存在多个有效期窗口'
+        )
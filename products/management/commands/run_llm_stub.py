@@ -0,0 +1,59 @@
+"""
+启动本地LLM桩服务
+用于离线测试和压测AI导入流程，接口与DeepSeek chat/completions兼容
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.utils.llm_stub_server import StubBehavior, create_stub_server
+from products.utils.llm_transport import LLMFixtureStore
+
+
+class Command(BaseCommand):
+    help = '启动与DeepSeek兼容的本地LLM桩服务（可配置延迟、错误率和429限流）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+        parser.add_argument('--port', type=int, default=8765, help='监听端口')
+        parser.add_argument('--latency-ms', type=float, default=200, help='平均响应延迟(毫秒)')
+        parser.add_argument('--jitter-ms', type=float, default=50, help='延迟抖动(毫秒)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='返回500的概率(0-1)')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='随机返回429的概率(0-1)')
+        parser.add_argument('--rps-limit', type=float, default=0.0, help='每秒请求上限，超出返回429，0为不限')
+        parser.add_argument('--retry-after', type=float, default=1.0, help='429响应的Retry-After秒数')
+        parser.add_argument('--seed', type=int, default=None, help='随机种子，便于复现')
+        parser.add_argument(
+            '--fixtures', action='store_true',
+            help='优先返回 DEEPSEEK_CONFIG.fixtures_dir 中录制的真实响应'
+        )
+
+    def handle(self, *args, **options):
+        fixture_store = None
+        if options['fixtures']:
+            fixture_store = LLMFixtureStore(settings.DEEPSEEK_CONFIG['fixtures_dir'])
+
+        behavior = StubBehavior(
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            rps_limit=options['rps_limit'],
+            retry_after=options['retry_after'],
+            seed=options['seed'],
+            fixture_store=fixture_store,
+        )
+        server = create_stub_server(options['host'], options['port'], behavior)
+        host, port = server.server_address[:2]
+
+        self.stdout.write(self.style.SUCCESS(f'🤖 LLM桩服务已启动: http://{host}:{port}/v1'))
+        self.stdout.write(f'   使用方式: export DEEPSEEK_BASE_URL=http://{host}:{port}/v1')
+        self.stdout.write(f'   运行统计: http://{host}:{port}/stats')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('\n停止LLM桩服务')
+        finally:
+            server.server_close()
+            self.stdout.write(f'统计: {behavior.stats}')
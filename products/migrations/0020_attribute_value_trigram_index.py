@@ -0,0 +1,44 @@
+# Generated manually to enable pg_trgm for attribute value fuzzy matching
+# 扩展创建失败（权限不足）时跳过，匹配器会自动退回内存索引
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0019_fix_final_model_fields'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                DO $$
+                BEGIN
+                    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                EXCEPTION WHEN insufficient_privilege THEN
+                    RAISE NOTICE 'pg_trgm extension not created: insufficient privilege';
+                END
+                $$;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql="""
+                DO $$
+                BEGIN
+                    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                        CREATE INDEX IF NOT EXISTS idx_attr_value_value_trgm
+                            ON products_attributevalue USING gin (value gin_trgm_ops);
+                        CREATE INDEX IF NOT EXISTS idx_attribute_name_trgm
+                            ON products_attribute USING gin (name gin_trgm_ops);
+                    END IF;
+                END
+                $$;
+            """,
+            reverse_sql="""
+                DROP INDEX IF EXISTS idx_attr_value_value_trgm;
+                DROP INDEX IF EXISTS idx_attribute_name_trgm;
+            """,
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated manually to support the pricing calculator SKU picker
+# 有效加价规则按SPU的EXISTS子查询，以及启用SKU按名称排序的选择器查询
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0020_attribute_value_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productspricingrule',
+            index=models.Index(fields=['spu', 'is_active'], name='idx_pricing_rule_spu_active'),
+        ),
+        migrations.AddIndex(
+            model_name='sku',
+            index=models.Index(fields=['status', 'name'], name='idx_sku_status_name'),
+        ),
+    ]
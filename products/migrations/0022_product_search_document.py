@@ -0,0 +1,47 @@
+# Generated manually to add the SKU full-text search document table
+# 检索向量由 products.services.search 按中文二元组分词生成；迁移只建表，
+# 分词规则会随代码变化，不在历史迁移中引用，现有SKU执行 rebuild_search_index 生成检索文档
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0021_pricing_picker_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('sku', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    primary_key=True,
+                    related_name='search_document',
+                    serialize=False,
+                    to='products.sku',
+                    verbose_name='SKU',
+                )),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(
+                    null=True,
+                    verbose_name='检索向量',
+                    db_comment='名称、编码、描述、卖点、标签、SPU名称和品牌名称的tsvector',
+                )),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': 'SKU检索文档',
+                'verbose_name_plural': 'SKU检索文档',
+                'db_table': 'products_search_document',
+                'indexes': [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=['search_vector'], name='idx_search_document_vector'
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated manually to add pg_trgm indexes for SKU code/name autocomplete
+# Django的icontains在PostgreSQL上生成 UPPER(col::text) LIKE UPPER(%s)，索引建在同一表达式上
+# 扩展不可用（0020中创建失败）时跳过，自动补全退回普通查询
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0022_product_search_document'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                DO $$
+                BEGIN
+                    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                        CREATE INDEX IF NOT EXISTS idx_sku_code_trgm
+                            ON products_sku USING gin (UPPER(code::text) gin_trgm_ops);
+                        CREATE INDEX IF NOT EXISTS idx_sku_name_trgm
+                            ON products_sku USING gin (UPPER(name::text) gin_trgm_ops);
+                        CREATE INDEX IF NOT EXISTS idx_spu_code_trgm
+                            ON products_spu USING gin (UPPER(code::text) gin_trgm_ops);
+                    END IF;
+                END
+                $$;
+            """,
+            reverse_sql="""
+                DROP INDEX IF EXISTS idx_sku_code_trgm;
+                DROP INDEX IF EXISTS idx_sku_name_trgm;
+                DROP INDEX IF EXISTS idx_spu_code_trgm;
+            """,
+        ),
+    ]
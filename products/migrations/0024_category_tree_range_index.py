@@ -0,0 +1,18 @@
+# Generated manually to support category subtree range queries
+# 子树筛选按 tree_id 相等且 lft 在区间内连接分类表
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0023_sku_autocomplete_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['tree_id', 'lft', 'rght'], name='idx_category_tree_range'),
+        ),
+    ]
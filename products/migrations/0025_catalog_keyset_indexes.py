@@ -0,0 +1,22 @@
+# Generated manually to support keyset pagination of product and SPU listings
+# 列表按 (created_at, id) 倒序分页，索引以列表固定的状态条件开头
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0024_category_tree_range_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sku',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='idx_sku_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='spu',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='idx_spu_active_created'),
+        ),
+    ]
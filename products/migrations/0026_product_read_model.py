@@ -0,0 +1,89 @@
+# Generated manually to add the denormalised product list read model
+# 数据由 rebuild_read_model 命令首次填充，之后由信号增量维护
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0025_catalog_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductReadModel',
+            fields=[
+                ('sku', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    primary_key=True,
+                    related_name='read_model',
+                    serialize=False,
+                    to='products.sku',
+                    verbose_name='SKU',
+                )),
+                ('name', models.CharField(max_length=200, verbose_name='产品名称')),
+                ('code', models.CharField(max_length=50, verbose_name='SKU编码')),
+                ('brand_id', models.IntegerField(verbose_name='品牌ID')),
+                ('brand_name', models.CharField(max_length=100, verbose_name='品牌名称')),
+                ('spu_id', models.IntegerField(verbose_name='SPU ID')),
+                ('spu_name', models.CharField(max_length=200, verbose_name='SPU名称')),
+                ('category_id', models.IntegerField(verbose_name='分类ID')),
+                ('category_name', models.CharField(max_length=100, verbose_name='分类名称')),
+                ('category_path', models.TextField(
+                    blank=True,
+                    default='',
+                    db_comment='从根分类到所属分类的完整路径，如 柜体 > 底柜',
+                    verbose_name='分类路径',
+                )),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='价格')),
+                ('cost_price', models.DecimalField(
+                    blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='成本价'
+                )),
+                ('stock_quantity', models.IntegerField(default=0, verbose_name='库存数量')),
+                ('status', models.CharField(max_length=20, verbose_name='状态')),
+                ('is_featured', models.BooleanField(default=False, verbose_name='推荐产品')),
+                ('tags', models.CharField(blank=True, default='', max_length=500, verbose_name='标签')),
+                ('primary_image', models.CharField(
+                    blank=True,
+                    default='',
+                    db_comment='主图存储路径：SKU主图，没有时取第一张启用的产品图片',
+                    max_length=255,
+                    verbose_name='主图',
+                )),
+                ('attributes', models.JSONField(
+                    blank=True,
+                    default=dict,
+                    db_comment='属性编码到属性值列表的映射，如 {"color": ["白色"]}',
+                    verbose_name='属性',
+                )),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(
+                    null=True,
+                    db_comment='与SKU检索文档相同口径的tsvector',
+                    verbose_name='检索向量',
+                )),
+                ('created_at', models.DateTimeField(db_comment='SKU的创建时间', verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='刷新时间')),
+            ],
+            options={
+                'verbose_name': '产品读模型',
+                'verbose_name_plural': '产品读模型',
+                'db_table': 'products_read_model',
+                'indexes': [
+                    models.Index(fields=['created_at', 'sku'], name='idx_read_model_created'),
+                    models.Index(fields=['category_id', 'created_at'], name='idx_read_model_category'),
+                    models.Index(fields=['brand_id', 'created_at'], name='idx_read_model_brand'),
+                    models.Index(fields=['price'], name='idx_read_model_price'),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=['attributes'], name='idx_read_model_attributes'
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=['search_vector'], name='idx_read_model_search'
+                    ),
+                ],
+            },
+        ),
+    ]
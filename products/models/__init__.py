@@ -16,6 +16,8 @@ from .spu_models import SPU, SPUAttribute, SPUDimensionTemplate
 from .sku_models import SKU, SKUAttributeValue, ProductImage
 from .pricing_models import ProductsPricingRule, ProductsDimension
 from .import_models import ImportTask, ImportTemplate, ImportError
+from .search_models import ProductSearchDocument
+from .read_models import ProductReadModel
 
 # 确保所有模型都可以从 products.models 直接导入
 __all__ = [
@@ -47,4 +49,10 @@ __all__ = [
     'ImportTask',
     'ImportTemplate', 
     'ImportError',
+
+    # 搜索相关
+    'ProductSearchDocument',
+
+    # 读模型
+    'ProductReadModel',
 ] 
\ No newline at end of file
@@ -4,10 +4,25 @@
 """
 
 from django.db import models
+from mptt.managers import TreeManager
 from .base import *
 from .mixins import TreeMixin, ValidationMixin
 
 
+class CategoryTreeManager(TreeManager):
+    """重建树后使分类子树索引失效（rebuild不触发模型信号）"""
+
+    def rebuild(self, *args, **kwargs):
+        from products.utils.category_tree import invalidate_category_tree
+        super().rebuild(*args, **kwargs)
+        invalidate_category_tree()
+
+    def partial_rebuild(self, *args, **kwargs):
+        from products.utils.category_tree import invalidate_category_tree
+        super().partial_rebuild(*args, **kwargs)
+        invalidate_category_tree()
+
+
 class Category(MPTTModel, StandardModel, TreeMixin, ValidationMixin):
     """
     产品分类模型 - 支持无限级分类
@@ -34,6 +49,8 @@ class Category(MPTTModel, StandardModel, TreeMixin, ValidationMixin):
         help_text="选择上级分类，留空表示顶级分类"
     )
     
+    objects = CategoryTreeManager()
+
     class MPTTMeta:
         order_insertion_by = ['order', 'name']
     
@@ -47,6 +64,7 @@ class Category(MPTTModel, StandardModel, TreeMixin, ValidationMixin):
             models.Index(fields=['is_active'], name='idx_category_active'),
             models.Index(fields=['parent'], name='idx_category_parent'),
             models.Index(fields=['order'], name='idx_category_order'),
+            models.Index(fields=['tree_id', 'lft', 'rght'], name='idx_category_tree_range'),
         ]
         
     def __str__(self):
@@ -69,9 +87,9 @@ class Category(MPTTModel, StandardModel, TreeMixin, ValidationMixin):
     def get_product_count(self):
         """获取该分类下的产品数量（包括子分类）"""
         from .spu_models import SPU
-        # 获取当前分类及所有子分类
-        categories = self.get_descendants(include_self=True)
-        return SPU.objects.filter(category__in=categories, is_active=True).count()
+        from products.utils.category_tree import subtree_q
+        # 当前分类及所有子分类：tree_id + lft区间
+        return SPU.objects.filter(subtree_q(self), is_active=True).count()
     
     def get_direct_product_count(self):
         """获取该分类下的直接产品数量（不包括子分类）"""
@@ -185,6 +185,27 @@ class AttributeConfigMixin:
         return ""
 
 
+class LoadedValuesMixin:
+    """
+    加载值混入类
+    记录从数据库加载时 tracked_fields 的值，保存后的信号据此判断字段是否变更，无需在 pre_save 中再查询；
+    须放在模型基类之前，才能覆盖 Model.from_db
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 延迟加载的字段不在 __dict__ 中，记为None（视为未知）
+        instance._loaded_values = {name: instance.__dict__.get(name) for name in cls.tracked_fields}
+        return instance
+
+    def get_loaded_value(self, name):
+        """加载时的字段值；新建或未从数据库加载的实例返回None"""
+        return getattr(self, '_loaded_values', {}).get(name)
+
+
 class ValidationMixin:
     """
     验证混入类
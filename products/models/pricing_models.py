@@ -10,6 +10,43 @@ from .base import *
 from .mixins import CreatedByMixin, ValidationMixin
 
 
+def calculate_rule_increment(calculation_method, excess_value, price_increment,
+                             unit_increment, multiplier, max_increment):
+    """
+    按计算方式计算超出部分的加价（规则模型与编译后的定价引擎共用）
+    
+    Args:
+        excess_value (Decimal): 超出阈值的数值
+        
+    Returns:
+        Decimal: 计算出的加价金额
+    """
+    if excess_value <= 0:
+        return Decimal('0')
+    
+    if calculation_method == 'fixed':
+        # 固定金额
+        increment = price_increment
+    elif calculation_method == 'percentage':
+        # 百分比（基于超出值）
+        increment = excess_value * (price_increment / 100)
+    elif calculation_method == 'multiplier':
+        # 倍数
+        increment = excess_value * multiplier * price_increment
+    elif calculation_method == 'step':
+        # 阶梯式（默认）- 按unit_increment计算步数
+        steps = math.ceil(excess_value / unit_increment)
+        increment = steps * price_increment
+    else:
+        increment = Decimal('0')
+    
+    # 应用最大加价限制
+    if max_increment:
+        increment = min(increment, max_increment)
+    
+    return increment
+
+
 class ProductsPricingRule(BaseModel, CreatedByMixin):
     """产品加价规则模型 - 支持SPU级别和SKU级别的规则"""
     
@@ -134,6 +171,7 @@ class ProductsPricingRule(BaseModel, CreatedByMixin):
         ]
         indexes = [
             models.Index(fields=['spu'], name='idx_pricing_rule_spu'),
+            models.Index(fields=['spu', 'is_active'], name='idx_pricing_rule_spu_active'),
             models.Index(fields=['sku'], name='idx_pricing_rule_sku'),
             models.Index(fields=['rule_type'], name='idx_pricing_rule_type'),
             models.Index(fields=['effective_date'], name='idx_pricing_rule_effective'),
@@ -186,30 +224,10 @@ class ProductsPricingRule(BaseModel, CreatedByMixin):
         Returns:
             Decimal: 计算出的加价金额
         """
-        if excess_value <= 0:
-            return Decimal('0')
-        
-        if self.calculation_method == 'fixed':
-            # 固定金额
-            increment = self.price_increment
-        elif self.calculation_method == 'percentage':
-            # 百分比（基于超出值）
-            increment = excess_value * (self.price_increment / 100)
-        elif self.calculation_method == 'multiplier':
-            # 倍数
-            increment = excess_value * self.multiplier * self.price_increment
-        elif self.calculation_method == 'step':
-            # 阶梯式（默认）- 按unit_increment计算步数
-            steps = math.ceil(excess_value / self.unit_increment)
-            increment = steps * self.price_increment
-        else:
-            increment = Decimal('0')
-        
-        # 应用最大加价限制
-        if self.max_increment:
-            increment = min(increment, self.max_increment)
-        
-        return increment
+        return calculate_rule_increment(
+            self.calculation_method, excess_value, self.price_increment,
+            self.unit_increment, self.multiplier, self.max_increment
+        )
     
     @classmethod
     def get_applicable_rules(cls, sku, dimension_type=None):
@@ -0,0 +1,81 @@
+"""
+读模型
+ProductReadModel 为每个上架SKU维护一行反规范化的展示数据，
+产品列表直接读取该表，不再连接SPU、分类、品牌、图片和SKU属性值表
+"""
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+
+class ProductReadModel(models.Model):
+    """
+    产品列表读模型
+
+    由 products.services.read_model 在SKU及其关联数据变更提交后增量刷新，
+    SKU下架或删除时对应行随之删除。
+    """
+    sku = models.OneToOneField(
+        'SKU',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='read_model',
+        verbose_name="SKU",
+    )
+    name = models.CharField(max_length=200, verbose_name="产品名称")
+    code = models.CharField(max_length=50, verbose_name="SKU编码")
+    brand_id = models.IntegerField(verbose_name="品牌ID")
+    brand_name = models.CharField(max_length=100, verbose_name="品牌名称")
+    spu_id = models.IntegerField(verbose_name="SPU ID")
+    spu_name = models.CharField(max_length=200, verbose_name="SPU名称")
+    category_id = models.IntegerField(verbose_name="分类ID")
+    category_name = models.CharField(max_length=100, verbose_name="分类名称")
+    category_path = models.TextField(
+        blank=True,
+        default='',
+        verbose_name="分类路径",
+        db_comment="从根分类到所属分类的完整路径，如 柜体 > 底柜"
+    )
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="价格")
+    cost_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="成本价")
+    stock_quantity = models.IntegerField(default=0, verbose_name="库存数量")
+    status = models.CharField(max_length=20, verbose_name="状态")
+    is_featured = models.BooleanField(default=False, verbose_name="推荐产品")
+    tags = models.CharField(max_length=500, blank=True, default='', verbose_name="标签")
+    primary_image = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name="主图",
+        db_comment="主图存储路径：SKU主图，没有时取第一张启用的产品图片"
+    )
+    attributes = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="属性",
+        db_comment="属性编码到属性值列表的映射，如 {\"color\": [\"白色\"]}"
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        verbose_name="检索向量",
+        db_comment="与SKU检索文档相同口径的tsvector"
+    )
+    created_at = models.DateTimeField(verbose_name="创建时间", db_comment="SKU的创建时间")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="刷新时间")
+
+    class Meta:
+        db_table = 'products_read_model'
+        verbose_name = "产品读模型"
+        verbose_name_plural = "产品读模型"
+        indexes = [
+            models.Index(fields=['created_at', 'sku'], name='idx_read_model_created'),
+            models.Index(fields=['category_id', 'created_at'], name='idx_read_model_category'),
+            models.Index(fields=['brand_id', 'created_at'], name='idx_read_model_brand'),
+            models.Index(fields=['price'], name='idx_read_model_price'),
+            GinIndex(fields=['attributes'], name='idx_read_model_attributes'),
+            GinIndex(fields=['search_vector'], name='idx_read_model_search'),
+        ]
+
+    def __str__(self):
+        return f"ReadModel({self.sku_id})"
@@ -0,0 +1,44 @@
+"""
+搜索相关模型
+ProductSearchDocument 为每个SKU维护一行全文检索向量，由信号增量更新
+"""
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+
+class ProductSearchDocument(models.Model):
+    """
+    SKU全文检索文档
+
+    向量由 products.services.search 按中文一元/二元组和编码分段生成，
+    权重：A 名称/编码，B SPU名称/品牌名称/标签，C 卖点，D 描述。
+    """
+    sku = models.OneToOneField(
+        'SKU',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        verbose_name="SKU",
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        verbose_name="检索向量",
+        db_comment="名称、编码、描述、卖点、标签、SPU名称和品牌名称的tsvector"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="更新时间",
+    )
+
+    class Meta:
+        db_table = 'products_search_document'
+        verbose_name = "SKU检索文档"
+        verbose_name_plural = "SKU检索文档"
+        indexes = [
+            GinIndex(fields=['search_vector'], name='idx_search_document_vector'),
+        ]
+
+    def __str__(self):
+        return f"SearchDocument({self.sku_id})"
@@ -5,10 +5,10 @@ SKU相关模型
 
 from django.db import models
 from .base import *
-from .mixins import CreatedByMixin, PriceMixin, StockMixin, AttributeConfigMixin, ValidationMixin
+from .mixins import CreatedByMixin, LoadedValuesMixin, PriceMixin, StockMixin, AttributeConfigMixin, ValidationMixin
 
 
-class SKU(StandardModel, CreatedByMixin, PriceMixin, StockMixin, AttributeConfigMixin, ValidationMixin):
+class SKU(LoadedValuesMixin, StandardModel, CreatedByMixin, PriceMixin, StockMixin, AttributeConfigMixin, ValidationMixin):
     """
     SKU (Stock Keeping Unit) 模型
     
@@ -16,6 +16,9 @@ class SKU(StandardModel, CreatedByMixin, PriceMixin, StockMixin, AttributeConfig
     SKU是SPU的一个具体实例。
     """
     
+    # 移到其他SPU时，原SPU所属分类的筛选器价格直方图也要重算
+    tracked_fields = ('spu_id',)
+
     STATUS_CHOICES = [
         ('draft', '草稿'),
         ('active', '上架'),
@@ -167,6 +170,8 @@ class SKU(StandardModel, CreatedByMixin, PriceMixin, StockMixin, AttributeConfig
             models.Index(fields=['spu'], name='idx_sku_spu'),
             models.Index(fields=['brand'], name='idx_sku_brand'),
             models.Index(fields=['status'], name='idx_sku_status'),
+            models.Index(fields=['status', 'name'], name='idx_sku_status_name'),
+            models.Index(fields=['status', 'created_at', 'id'], name='idx_sku_status_created'),
             models.Index(fields=['is_featured'], name='idx_sku_featured'),
             models.Index(fields=['stock_quantity'], name='idx_sku_stock'),
         ]
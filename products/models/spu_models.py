@@ -5,10 +5,10 @@ SPU相关模型
 
 from django.db import models
 from .base import *
-from .mixins import CreatedByMixin, ValidationMixin
+from .mixins import CreatedByMixin, LoadedValuesMixin, ValidationMixin
 
 
-class SPU(StandardModel, CreatedByMixin, ValidationMixin):
+class SPU(LoadedValuesMixin, StandardModel, CreatedByMixin, ValidationMixin):
     """
     SPU (SPU产品单元) 模型
     
@@ -17,6 +17,9 @@ class SPU(StandardModel, CreatedByMixin, ValidationMixin):
     例如，"iPhone 15 Pro"是一个SPU，而"蓝色、256GB的iPhone 15 Pro"是一个SKU。
     """
     
+    # 改到其他分类时，原分类的筛选器价格直方图也要重算
+    tracked_fields = ('category_id',)
+
     name = models.CharField(
         max_length=200, 
         verbose_name="产品名称",
@@ -75,6 +78,7 @@ class SPU(StandardModel, CreatedByMixin, ValidationMixin):
             models.Index(fields=['category'], name='idx_spu_category'),
             models.Index(fields=['brand'], name='idx_spu_brand'),
             models.Index(fields=['is_active'], name='idx_spu_active'),
+            models.Index(fields=['is_active', 'created_at', 'id'], name='idx_spu_active_created'),
         ]
 
     def __str__(self):
@@ -0,0 +1,153 @@
+"""
+产品和SPU列表分页
+默认仍为页码分页；传入 cursor 或 pagination=cursor 时改为按 (created_at, id) 的键集分页，
+不执行COUNT(*)也没有OFFSET扫描，翻到多深都只读取一页数据
+"""
+
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_row_count(queryset: QuerySet) -> Optional[int]:
+    """
+    估算查询集行数（PostgreSQL）
+
+    无筛选条件时读取 pg_class.reltuples（与后台 LargeTablePaginator 相同），
+    有筛选条件时读取查询计划的估算行数；无法估算时返回None。
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    try:
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table]
+                )
+                result = cursor.fetchone()
+                if result and result[0] >= 0:
+                    return int(result[0])
+            sql, params = queryset.order_by().values('pk').query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        logger.warning(f"估算行数失败: {e}")
+        return None
+
+
+class CatalogPagination(PageNumberPagination):
+    """
+    目录列表分页
+
+    键集模式参数：
+        cursor: 上一页响应中的 next/previous 游标
+        pagination=cursor: 不带游标时从第一页开始键集分页
+        include_total=estimate: 附带估算总数（reltuples/查询计划，不执行COUNT）
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    total_query_param = 'include_total'
+    keyset_ordering = ('-created_at', '-pk')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        return self._paginate_keyset(queryset, request)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        response = {
+            'next': self._cursor_link(self.next_position, reverse=False),
+            'previous': self._cursor_link(self.previous_position, reverse=True),
+        }
+        if self.request.query_params.get(self.total_query_param) == 'estimate':
+            response['count'] = self.estimated_count
+            response['count_estimated'] = True
+        response['results'] = data
+        return Response(response)
+
+    # ------------------------------------------------------------------
+    # 键集分页
+    # ------------------------------------------------------------------
+
+    def _paginate_keyset(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self._decode_cursor(request.query_params.get(self.cursor_query_param))
+        reverse = bool(position and position[2])
+
+        if self.request.query_params.get(self.total_query_param) == 'estimate':
+            self.estimated_count = estimate_row_count(queryset)
+
+        if position:
+            created_at, pk = position[0], position[1]
+            if reverse:
+                # 向前翻页：取比游标更新的记录，升序读取后再反转
+                queryset = queryset.filter(Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(pk__gt=pk)))
+            else:
+                # created_at 条件单独列出，便于按 (created_at, 主键) 索引定位起点
+                queryset = queryset.filter(Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(pk__lt=pk)))
+
+        ordering = self.keyset_ordering
+        if reverse:
+            ordering = tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = None
+        self.previous_position = None
+        if rows:
+            first, last = rows[0], rows[-1]
+            if has_more or reverse:
+                self.next_position = (last.created_at, last.pk)
+            if (has_more and reverse) or (position and not reverse):
+                self.previous_position = (first.created_at, first.pk)
+        return rows
+
+    def _decode_cursor(self, cursor: Optional[str]):
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            return datetime.fromisoformat(data['c']), int(data['i']), bool(data.get('r'))
+        except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+            raise NotFound('无效的游标')
+
+    def _encode_cursor(self, created_at, pk, reverse: bool) -> str:
+        data = {'c': created_at.isoformat(), 'i': pk}
+        if reverse:
+            data['r'] = 1
+        return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+
+    def _cursor_link(self, position, reverse: bool) -> Optional[str]:
+        if position is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self._encode_cursor(*position, reverse))
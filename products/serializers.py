@@ -1,5 +1,28 @@
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Category, Brand, Attribute, AttributeValue, SPU, SKU, ProductImage, SPUAttribute
+from .models import (
+    Category, Brand, Attribute, AttributeValue, SPU, SKU, ProductImage, SPUAttribute, ProductReadModel
+)
+from .utils.category_tree import get_category_path, get_category_tree_index
+
+
+def spu_attributes_prefetch(lookup='spuattribute_set'):
+    """SPU属性预加载（附带属性），结果保存在 SPU.prefetched_attributes"""
+    return Prefetch(
+        lookup,
+        queryset=SPUAttribute.objects.select_related('attribute').order_by('order', 'id'),
+        to_attr='prefetched_attributes'
+    )
+
+
+def active_images_prefetch():
+    """启用的产品图片按顺序预加载，结果保存在 SKU.active_images"""
+    return Prefetch(
+        'images',
+        queryset=ProductImage.objects.filter(is_active=True).order_by('order', 'id'),
+        to_attr='active_images'
+    )
 
 
 class CategorySimpleSerializer(serializers.ModelSerializer):
@@ -11,7 +34,7 @@ class CategorySimpleSerializer(serializers.ModelSerializer):
 
 class CategorySerializer(serializers.ModelSerializer):
     """分类序列化器 - 支持 MPTT 树状结构"""
-    full_path = serializers.ReadOnlyField(source='get_full_path')
+    full_path = serializers.SerializerMethodField()
     
     class Meta:
         model = Category
@@ -21,6 +44,18 @@ class CategorySerializer(serializers.ModelSerializer):
             'full_path', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'level', 'lft', 'rght', 'tree_id']
+    
+    def _category_tree_index(self):
+        """分类树快照在整个序列化过程（many=True 时为整个列表）中只获取一次"""
+        root = self.root
+        index = getattr(root, '_tree_index', None)
+        if index is None:
+            index = root._tree_index = get_category_tree_index()
+        return index
+
+    def get_full_path(self, obj):
+        """完整路径由缓存的分类树在内存中拼接，不再逐级查询父分类"""
+        return get_category_path(obj, index=self._category_tree_index())
 
 
 class BrandSerializer(serializers.ModelSerializer):
@@ -74,9 +109,16 @@ class SPUSerializer(serializers.ModelSerializer):
                  'specifications', 'attributes', 'is_active', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
     
+    @staticmethod
+    def setup_eager_loading(queryset, prefix=''):
+        """预加载序列化所需的关联数据（prefix 为从其他模型到SPU的路径，如 'spu__'）"""
+        return queryset.prefetch_related(spu_attributes_prefetch(f'{prefix}spuattribute_set'))
+    
     def get_attributes(self, obj):
-        """获取SPU关联的属性 - 修复版本"""
-        spu_attrs = obj.spuattribute_set.select_related('attribute').all()
+        """获取SPU关联的属性（优先读取预加载结果）"""
+        spu_attrs = getattr(obj, 'prefetched_attributes', None)
+        if spu_attrs is None:
+            spu_attrs = obj.spuattribute_set.select_related('attribute').order_by('order', 'id')
         return [
             {
                 'attribute_name': spa.attribute.name,
@@ -121,8 +163,13 @@ class SKUListSerializer(serializers.ModelSerializer):
                  'status', 'is_featured', 'primary_image', 'created_at']
         read_only_fields = ['created_at']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """预加载序列化所需的关联数据"""
+        return queryset.select_related('brand', 'spu__category').prefetch_related(active_images_prefetch())
+    
     def get_primary_image(self, obj):
-        """获取主要图片 - 修复版本"""
+        """获取主要图片"""
         # 首先尝试获取main_image
         if obj.main_image:
             request = self.context.get('request')
@@ -130,8 +177,11 @@ class SKUListSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.main_image.url)
             return obj.main_image.url
         
-        # 备选方案：获取第一张激活的图片
-        first_img = obj.images.filter(is_active=True).order_by('order').first()
+        # 备选方案：获取第一张激活的图片（优先读取预加载结果）
+        active_images = getattr(obj, 'active_images', None)
+        if active_images is None:
+            active_images = obj.images.filter(is_active=True).order_by('order', 'id')[:1]
+        first_img = active_images[0] if active_images else None
         if first_img:
             request = self.context.get('request')
             if request:
@@ -140,6 +190,36 @@ class SKUListSerializer(serializers.ModelSerializer):
         return None
 
 
+class ProductReadModelSerializer(serializers.ModelSerializer):
+    """读模型列表序列化器 - 输出与 SKUListSerializer 相同，只读取读模型单表"""
+    id = serializers.IntegerField(source='sku_id', read_only=True)
+    brand = serializers.IntegerField(source='brand_id', read_only=True)
+    spu = serializers.IntegerField(source='spu_id', read_only=True)
+    primary_image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductReadModel
+        fields = ['id', 'name', 'code', 'brand', 'brand_name', 'spu',
+                 'category_name', 'price', 'cost_price', 'stock_quantity',
+                 'status', 'is_featured', 'primary_image', 'created_at']
+        read_only_fields = fields
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """读模型无需预加载关联数据"""
+        return queryset
+
+    def get_primary_image(self, obj):
+        """主图存储路径转为访问地址"""
+        if not obj.primary_image:
+            return None
+        url = default_storage.url(obj.primary_image)
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
+
+
 class SKUDetailSerializer(serializers.ModelSerializer):
     """SKU详情序列化器 - 用于产品详情展示"""
     brand = BrandSerializer(read_only=True)
@@ -149,18 +229,13 @@ class SKUDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = SKU
         fields = ['id', 'name', 'code', 'brand', 'spu', 'price', 'cost_price', 
-                 'stock_quantity', 'min_stock', 'max_stock', 'weight', 'dimensions', 
-                 'color', 'material', 'style', 'description', 'selling_points', 
-                 'usage_scenarios', 'maintenance_guide', 'warranty_period', 
+                 'stock_quantity', 'min_stock', 'dimensions', 'description', 'selling_points', 
                  'tags', 'status', 'is_featured', 'images', 
                  'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
-
-
-class FilterSerializer(serializers.Serializer):
-    """筛选器序列化器"""
-    categories = CategorySimpleSerializer(many=True, read_only=True)
-    brands = BrandSerializer(many=True, read_only=True)
-    attributes = AttributeSerializer(many=True, read_only=True)
-    price_range = serializers.DictField(read_only=True)
-    status_choices = serializers.ListField(read_only=True) 
\ No newline at end of file
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """预加载序列化所需的关联数据：品牌、SPU及其分类和属性、图片、尺寸"""
+        queryset = queryset.select_related('brand', 'spu__category').prefetch_related('images', 'dimensions')
+        return SPUSerializer.setup_eager_loading(queryset, prefix='spu__')
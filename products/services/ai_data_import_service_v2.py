@@ -53,6 +53,12 @@ class AIDataImportServiceV2:
             self.task.total_rows = result.total_rows
             self.task.success_rows = result.success_rows
             self.task.error_rows = result.error_rows
+            result_summary = dict(self.task.result_summary or {})
+            if result.quality_summary:
+                result_summary['quality'] = result.quality_summary
+            if result.ai_usage:
+                result_summary['ai_usage'] = result.ai_usage
+            self.task.result_summary = result_summary
             self.task.save()
             
             return {
@@ -60,7 +66,8 @@ class AIDataImportServiceV2:
                 'total_rows': result.total_rows,
                 'success_rows': result.success_rows,
                 'error_rows': result.error_rows,
-                'errors': result.errors
+                'errors': result.errors,
+                'ai_usage': result.ai_usage
             }
             
         except Exception as e:
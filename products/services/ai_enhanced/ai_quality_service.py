@@ -18,6 +18,12 @@ logger = logging.getLogger(__name__)
 class AIQualityService(BaseAIService):
     """AI数据质量检测服务"""
 
+    DIMENSION_RANGES = {
+        '宽度 (Width_cm)': (10, 300),   # 宽度范围
+        '高度 (Height_cm)': (50, 250),  # 高度范围
+        '深度 (Depth_cm)': (30, 100)   # 深度范围
+    }
+
     def _check_enabled(self) -> bool:
         """检查服务是否启用"""
         return AIFeatureFlags.is_enabled(AIFeatureFlags.QUALITY_DETECTION)
@@ -71,6 +77,39 @@ class AIQualityService(BaseAIService):
             'total_issues': len(issues)
         }
 
+    def process_batch(self, rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        批量质量检测（整批导入数据）
+
+        价格和尺寸异常以同系列/同类型的总体分布为基准，而不是单行内的五个价格；
+        编码与一致性检查沿用单行规则。批量模式不调用AI验证。
+        """
+        if not self.enabled:
+            logger.debug(f"{self.__class__.__name__} 服务未启用，跳过批量处理")
+            return None
+
+        try:
+            return self.process_batch_for_test(rows)
+        except Exception as e:
+            logger.error(f"{self.__class__.__name__} 批量处理失败: {str(e)}", exc_info=True)
+            return {
+                'success': False,
+                'error': str(e),
+                'service': self.__class__.__name__
+            }
+
+    def process_batch_for_test(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """批量质量检测，忽略启用状态"""
+        from .batch_quality import BatchQualityAnalyzer
+
+        analyzer = BatchQualityAnalyzer(
+            dimension_ranges=self.DIMENSION_RANGES,
+            min_group_size=self.config.get('quality_min_group_size', 8),
+            iqr_multiplier=self.config.get('quality_iqr_multiplier', 1.5),
+            row_checks=[self._validate_product_code, self._check_data_consistency]
+        )
+        return analyzer.analyze(rows)
+
     def _detect_price_anomalies(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """检测价格异常"""
         issues = []
@@ -134,13 +173,8 @@ class AIQualityService(BaseAIService):
     def _detect_dimension_anomalies(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """检测尺寸异常"""
         issues = []
-        dimension_fields = {
-            '宽度 (Width_cm)': (10, 300),   # 宽度范围
-            '高度 (Height_cm)': (50, 250),  # 高度范围
-            '深度 (Depth_cm)': (30, 100)   # 深度范围
-        }
 
-        for field, (min_val, max_val) in dimension_fields.items():
+        for field, (min_val, max_val) in self.DIMENSION_RANGES.items():
             value_str = str(data.get(field, '')).strip()
             if not value_str or value_str == '-':
                 continue
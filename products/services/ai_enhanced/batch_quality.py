@@ -0,0 +1,301 @@
+"""
+批量数据质量分析
+以整批导入数据为总体，按系列/类型分组计算价格与尺寸分布，
+用NumPy向量化地识别偏离同组总体的异常值
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ['等级Ⅰ', '等级Ⅱ', '等级Ⅲ', '等级Ⅳ', '等级Ⅴ']
+DIMENSION_FIELDS = ['宽度 (Width_cm)', '高度 (Height_cm)', '深度 (Depth_cm)']
+SERIES_FIELD = '系列 (Series)'
+TYPE_FIELD = '类型代码 (Type_Code)'
+
+SEVERITY_WEIGHTS = {
+    'critical': 30,
+    'high': 20,
+    'medium': 10,
+    'low': 5
+}
+
+
+def _parse_number(value: Any, dash_as_zero: bool) -> Tuple[float, bool]:
+    """解析数值，返回 (数值或NaN, 是否格式错误)，空值不算格式错误"""
+    if value is None:
+        return np.nan, False
+    text = str(value).strip().replace(',', '')
+    if not text:
+        return np.nan, False
+    if text == '-':
+        return (0.0 if dash_as_zero else np.nan), False
+    try:
+        return float(text), False
+    except ValueError:
+        return np.nan, True
+
+
+def _encode_groups(keys: List[Any]) -> Tuple[np.ndarray, List[Any]]:
+    """将分组键编码为连续整数"""
+    mapping: Dict[Any, int] = {}
+    codes = np.fromiter(
+        (mapping.setdefault(key, len(mapping)) for key in keys),
+        dtype=np.int64, count=len(keys)
+    )
+    return codes, list(mapping)
+
+
+def group_quantile_fences(group_ids: np.ndarray, values: np.ndarray, n_groups: int,
+                          iqr_multiplier: float = 1.5,
+                          min_relative_spread: float = 0.05) -> Dict[str, np.ndarray]:
+    """
+    按组计算IQR围栏
+
+    一次lexsort后利用各组在排序数组中的起止位置线性插值求分位数，
+    不需要逐组循环。返回每组的样本数、中位数及上下围栏（空组为NaN）。
+    """
+    valid = ~np.isnan(values)
+    groups = group_ids[valid]
+    data = values[valid]
+
+    counts = np.bincount(groups, minlength=n_groups)
+    result = {
+        'count': counts,
+        'median': np.full(n_groups, np.nan),
+        'lower': np.full(n_groups, np.nan),
+        'upper': np.full(n_groups, np.nan),
+    }
+    if data.size == 0:
+        return result
+
+    order = np.lexsort((data, groups))
+    sorted_data = data[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    non_empty = counts > 0
+    last = np.maximum(counts - 1, 0)
+
+    def quantile(q: float) -> np.ndarray:
+        position = starts + last * q
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        low = np.minimum(low, sorted_data.size - 1)
+        high = np.minimum(high, sorted_data.size - 1)
+        fraction = position - np.floor(position)
+        out = sorted_data[low] * (1 - fraction) + sorted_data[high] * fraction
+        return np.where(non_empty, out, np.nan)
+
+    q1 = quantile(0.25)
+    median = quantile(0.5)
+    q3 = quantile(0.75)
+    # 同组取值几乎相同时IQR为0，给围栏留出最小宽度，避免正常波动被判为异常
+    iqr = np.maximum(q3 - q1, np.abs(median) * min_relative_spread)
+
+    result['median'] = median
+    result['lower'] = q1 - iqr_multiplier * iqr
+    result['upper'] = q3 + iqr_multiplier * iqr
+    return result
+
+
+class BatchQualityAnalyzer:
+    """
+    整批数据质量分析器
+
+    分组层级：系列+类型 → 类型 → 系列 → 全体。样本数不足 min_group_size 的组
+    逐级退回更大的总体，保证统计量有意义。
+    """
+
+    def __init__(self, dimension_ranges: Dict[str, Tuple[float, float]],
+                 min_group_size: int = 8, iqr_multiplier: float = 1.5,
+                 row_checks: Optional[List[Callable[[Dict[str, Any]], List[Dict[str, Any]]]]] = None):
+        self.dimension_ranges = dimension_ranges
+        self.min_group_size = min_group_size
+        self.iqr_multiplier = iqr_multiplier
+        self.row_checks = row_checks or []
+
+    def analyze(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """分析整批数据，返回逐行评分、问题列表和分组统计"""
+        n_rows = len(rows)
+        issues: List[List[Dict[str, Any]]] = [[] for _ in range(n_rows)]
+        if n_rows == 0:
+            return self._build_result(rows, issues, {})
+
+        prices, price_errors = self._parse_matrix(rows, PRICE_FIELDS, dash_as_zero=True)
+        # 与单行检测保持一致：价格为0视为未填写
+        prices[prices == 0] = np.nan
+        dimensions, dimension_errors = self._parse_matrix(rows, DIMENSION_FIELDS, dash_as_zero=False)
+
+        self._flag_format_errors(issues, rows, price_errors, PRICE_FIELDS,
+                                 'price_format_error', '价格格式错误: {field}')
+        self._flag_format_errors(issues, rows, dimension_errors, DIMENSION_FIELDS,
+                                 'dimension_format_error', '{label}格式错误')
+        self._flag_price_order(issues, prices)
+        self._flag_dimension_ranges(issues, dimensions)
+
+        group_levels = self._build_group_levels(rows)
+        group_stats = {}
+        for column, field in enumerate(PRICE_FIELDS):
+            group_stats[field] = self._flag_group_outliers(
+                issues, prices[:, column], field, group_levels,
+                'price_outlier', '价格偏离同组分布'
+            )
+        for column, field in enumerate(DIMENSION_FIELDS):
+            group_stats[field] = self._flag_group_outliers(
+                issues, dimensions[:, column], field, group_levels,
+                'dimension_outlier', '尺寸偏离同组分布'
+            )
+
+        for index, row in enumerate(rows):
+            for check in self.row_checks:
+                issues[index].extend(check(row))
+
+        return self._build_result(rows, issues, group_stats)
+
+    # ------------------------------------------------------------------
+    # 解析
+    # ------------------------------------------------------------------
+
+    def _parse_matrix(self, rows: List[Dict[str, Any]], fields: List[str],
+                      dash_as_zero: bool) -> Tuple[np.ndarray, np.ndarray]:
+        values = np.full((len(rows), len(fields)), np.nan)
+        errors = np.zeros((len(rows), len(fields)), dtype=bool)
+        for column, field in enumerate(fields):
+            parsed = [_parse_number(row.get(field), dash_as_zero) for row in rows]
+            values[:, column] = [item[0] for item in parsed]
+            errors[:, column] = [item[1] for item in parsed]
+        return values, errors
+
+    def _build_group_levels(self, rows: List[Dict[str, Any]]) -> List[Tuple[str, np.ndarray, List[Any]]]:
+        """构造分组层级：(层级名, 每行组编号, 组键列表)"""
+        series = [str(row.get(SERIES_FIELD, '') or '').strip() for row in rows]
+        types = [str(row.get(TYPE_FIELD, '') or '').strip() for row in rows]
+
+        return [
+            ('series_type', *_encode_groups(list(zip(series, types)))),
+            ('type', *_encode_groups(types)),
+            ('series', *_encode_groups(series)),
+            ('all', np.zeros(len(rows), dtype=np.int64), ['*']),
+        ]
+
+    # ------------------------------------------------------------------
+    # 检测
+    # ------------------------------------------------------------------
+
+    def _flag_format_errors(self, issues, rows, errors: np.ndarray, fields: List[str],
+                            issue_type: str, message_template: str):
+        for index, column in zip(*np.nonzero(errors)):
+            field = fields[column]
+            issues[index].append({
+                'type': issue_type,
+                'field': field,
+                'value': rows[index].get(field, ''),
+                'severity': 'high',
+                'message': message_template.format(field=field, label=field.split('(')[0].strip())
+            })
+
+    def _flag_price_order(self, issues, prices: np.ndarray):
+        """价格等级应递增：与此前已填写的最高等级价格比较"""
+        running_max = np.fmax.accumulate(prices, axis=1)
+        descending = prices[:, 1:] < running_max[:, :-1]
+        for index in np.nonzero(descending.any(axis=1))[0]:
+            row_prices = prices[index]
+            issues[index].append({
+                'type': 'price_logic_error',
+                'field': 'price_levels',
+                'value': row_prices[~np.isnan(row_prices)].tolist(),
+                'severity': 'medium',
+                'message': '价格等级应该递增'
+            })
+
+    def _flag_dimension_ranges(self, issues, dimensions: np.ndarray):
+        for column, field in enumerate(DIMENSION_FIELDS):
+            min_val, max_val = self.dimension_ranges.get(field, (-np.inf, np.inf))
+            values = dimensions[:, column]
+            out_of_range = (values < min_val) | (values > max_val)
+            for index in np.nonzero(out_of_range)[0]:
+                issues[index].append({
+                    'type': 'dimension_out_of_range',
+                    'field': field,
+                    'value': float(values[index]),
+                    'severity': 'high',
+                    'message': f'{field.split("(")[0].strip()}超出合理范围 ({min_val}-{max_val}cm)'
+                })
+
+    def _flag_group_outliers(self, issues, values: np.ndarray, field: str,
+                             group_levels, issue_type: str, message: str) -> Dict[str, Any]:
+        """按分组层级计算围栏，样本不足的组退回上一层级，标记超出围栏的值"""
+        n_rows = values.size
+        lower = np.full(n_rows, np.nan)
+        upper = np.full(n_rows, np.nan)
+        median = np.full(n_rows, np.nan)
+        level_used = np.full(n_rows, -1, dtype=np.int64)
+        level_summary = {}
+
+        for level, (level_name, ids, keys) in enumerate(group_levels):
+            fences = group_quantile_fences(ids, values, len(keys), self.iqr_multiplier)
+            row_counts = fences['count'][ids]
+            assign = (level_used < 0) & (row_counts >= self.min_group_size)
+            lower[assign] = fences['lower'][ids[assign]]
+            upper[assign] = fences['upper'][ids[assign]]
+            median[assign] = fences['median'][ids[assign]]
+            level_used[assign] = level
+            level_summary[level_name] = int(np.count_nonzero(fences['count'] >= self.min_group_size))
+
+        present = ~np.isnan(values) & (level_used >= 0)
+        outliers = present & ((values < lower) | (values > upper))
+        level_names = [name for name, _, _ in group_levels]
+        for index in np.nonzero(outliers)[0]:
+            issues[index].append({
+                'type': issue_type,
+                'field': field,
+                'value': float(values[index]),
+                'severity': 'medium',
+                'message': (
+                    f'{message}: {values[index]:g}（同组中位数 {median[index]:g}，'
+                    f'合理区间 {lower[index]:g}~{upper[index]:g}，'
+                    f'分组: {level_names[level_used[index]]}）'
+                )
+            })
+
+        return {
+            'groups_with_enough_samples': level_summary,
+            'outliers': int(np.count_nonzero(outliers)),
+        }
+
+    # ------------------------------------------------------------------
+    # 汇总
+    # ------------------------------------------------------------------
+
+    def _build_result(self, rows, issues: List[List[Dict[str, Any]]],
+                      group_stats: Dict[str, Any]) -> Dict[str, Any]:
+        deductions = np.fromiter(
+            (sum(SEVERITY_WEIGHTS.get(issue.get('severity', 'low'), 5) for issue in row_issues)
+             for row_issues in issues),
+            dtype=np.float64, count=len(issues)
+        )
+        scores = np.maximum(0.0, 100.0 - deductions)
+
+        issue_counts: Dict[str, int] = {}
+        for row_issues in issues:
+            for issue in row_issues:
+                issue_counts[issue['type']] = issue_counts.get(issue['type'], 0) + 1
+
+        return {
+            'success': True,
+            'total_rows': len(rows),
+            'average_score': round(float(scores.mean()), 1) if scores.size else 100.0,
+            'rows_with_issues': int(np.count_nonzero(deductions)),
+            'issue_counts': issue_counts,
+            'group_stats': group_stats,
+            'rows': [
+                {
+                    'quality_score': round(float(score), 1),
+                    'issues': row_issues,
+                    'total_issues': len(row_issues)
+                }
+                for score, row_issues in zip(scores, issues)
+            ]
+        }
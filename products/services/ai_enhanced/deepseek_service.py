@@ -10,6 +10,11 @@ from typing import Dict, List, Any, Optional
 from django.conf import settings
 from .base_ai_service import BaseAIService
 from products.utils.ai_feature_flags import AIFeatureFlags
+from products.utils.ai_rate_limiter import (
+    get_deepseek_rate_limiter, get_deepseek_circuit_breaker, parse_retry_after
+)
+from products.utils.ai_usage import is_budget_exhausted, record_usage
+from products.utils.llm_transport import post_chat_completion
 import logging
 
 logger = logging.getLogger(__name__)
@@ -40,6 +45,22 @@ class DeepSeekService(BaseAIService):
                 'error': 'DeepSeek API密钥未配置'
             }
 
+        # 达到token预算后不再调用LLM，由调用方走规则引擎
+        if is_budget_exhausted():
+            return {
+                'success': False,
+                'error': 'AI调用已达到token预算，已降级为规则处理',
+                'degraded': True
+            }
+
+        # 熔断期间直接降级，由调用方走规则引擎
+        if not get_deepseek_circuit_breaker().allow_request():
+            return {
+                'success': False,
+                'error': 'DeepSeek服务熔断中，已降级为规则处理',
+                'degraded': True
+            }
+
         try:
             # 构建请求
             messages = self._build_messages(data)
@@ -187,48 +208,70 @@ class DeepSeekService(BaseAIService):
         max_retries = self.config.get('max_retries', 3)
         retry_delay = self.config.get('retry_delay', 1)
         timeout = self.config.get('timeout', 30)
+        max_wait = self.config.get('rate_limit_max_wait', 2)
+
+        rate_limiter = get_deepseek_rate_limiter()
+        circuit_breaker = get_deepseek_circuit_breaker()
 
         for attempt in range(max_retries):
+            # 第一次调用已在_process_impl中通过熔断检查，重试前需要再次检查
+            if attempt > 0 and not circuit_breaker.allow_request():
+                logger.warning("DeepSeek熔断器已打开，停止重试")
+                return None
+
+            # 共享令牌桶限流，等待超过max_wait则放弃，避免长时间占用工作线程
+            if not rate_limiter.acquire(max_wait):
+                # 记录失败以释放半开状态下占用的探测名额
+                logger.warning("DeepSeek API限流等待超时，降级处理")
+                circuit_breaker.record_failure()
+                return None
+
             try:
                 logger.debug(f"DeepSeek API调用尝试 {attempt + 1}/{max_retries}")
 
-                response = requests.post(
-                    url,
-                    headers=headers,
-                    json=payload,
-                    timeout=timeout
-                )
+                response = post_chat_completion(url, headers, payload, timeout)
 
                 if response.status_code == 200:
                     result = response.json()
+                    circuit_breaker.record_success()
+                    record_usage(result.get('usage'))
                     logger.info(f"DeepSeek API调用成功，使用tokens: {result.get('usage', {})}")
                     return result
 
                 elif response.status_code == 429:  # 速率限制
-                    logger.warning(f"DeepSeek API速率限制，等待重试...")
-                    time.sleep(retry_delay * (attempt + 1))
+                    # 所有进程共同退避，而不是每个线程各自sleep
+                    backoff = parse_retry_after(
+                        response.headers.get('Retry-After'),
+                        retry_delay * (attempt + 1)
+                    )
+                    logger.warning(f"DeepSeek API速率限制，共享退避 {backoff}s")
+                    rate_limiter.penalize(backoff)
+                    circuit_breaker.record_failure()
                     continue
 
                 else:
                     logger.error(f"DeepSeek API调用失败: {response.status_code} - {response.text}")
-                    if attempt == max_retries - 1:
-                        return None
-                    time.sleep(retry_delay)
+                    circuit_breaker.record_failure()
 
             except requests.exceptions.Timeout:
                 logger.warning(f"DeepSeek API调用超时，尝试 {attempt + 1}/{max_retries}")
-                if attempt == max_retries - 1:
-                    return None
-                time.sleep(retry_delay)
+                circuit_breaker.record_failure()
 
             except Exception as e:
                 logger.error(f"DeepSeek API调用异常: {str(e)}")
-                if attempt == max_retries - 1:
-                    return None
-                time.sleep(retry_delay)
+                circuit_breaker.record_failure()
+
+            if attempt < max_retries - 1:
+                self._backoff(retry_delay, attempt)
 
         return None
 
+    def _backoff(self, retry_delay: float, attempt: int):
+        """重试前指数退避，避免服务端故障时连续打满重试次数"""
+        wait_time = retry_delay * (2 ** attempt)
+        logger.info(f"DeepSeek API {wait_time}s 后重试")
+        time.sleep(wait_time)
+
     def extract_attributes(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
         """提取产品属性的便捷方法"""
         request_data = {
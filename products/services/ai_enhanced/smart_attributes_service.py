@@ -8,12 +8,12 @@ import json
 from typing import Dict, List, Any, Optional, Tuple
 from django.conf import settings
 from django.db.models import Q
-from difflib import SequenceMatcher
 
 from .base_ai_service import BaseAIService
 from .deepseek_service import DeepSeekService
 from products.utils.ai_feature_flags import AIFeatureFlags
-from products.models import Attribute, AttributeValue
+from products.utils.attribute_catalog import get_attribute_catalog
+from products.utils.attribute_matcher import get_attribute_matcher
 import logging
 
 logger = logging.getLogger(__name__)
@@ -288,9 +288,6 @@ class SmartAttributesService(BaseAIService):
         final_attributes = []
         processed_names = set()
 
-        # 获取数据库中现有的属性
-        existing_attributes = self._get_existing_attributes()
-
         for attr in extracted_attributes:
             attr_name = attr.get('name', '')
             attr_value = attr.get('value', '')
@@ -303,7 +300,7 @@ class SmartAttributesService(BaseAIService):
                 continue
 
             # 匹配现有属性
-            matched_attr = self._find_matching_attribute(attr_name, existing_attributes)
+            matched_attr = self._find_matching_attribute(attr_name)
             if matched_attr:
                 # 使用现有属性名
                 standardized_name = matched_attr['name']
@@ -357,73 +354,25 @@ class SmartAttributesService(BaseAIService):
         return final_attributes
 
     def _get_existing_attributes(self) -> List[Dict[str, Any]]:
-        """获取数据库中现有的属性"""
+        """获取数据库中现有的属性（来自共享的属性目录快照）"""
         try:
-            attributes = Attribute.objects.all().values('id', 'name', 'code', 'type')
-            return list(attributes)
+            return list(get_attribute_catalog().attributes)
         except Exception as e:
             logger.error(f"获取现有属性失败: {e}")
             return []
 
-    def _find_matching_attribute(self, attr_name: str,
-                                existing_attributes: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        """查找匹配的现有属性"""
+    def _find_matching_attribute(self, attr_name: str) -> Optional[Dict[str, Any]]:
+        """查找匹配的现有属性（基于常驻内存的n-gram索引）"""
         threshold = self.config.get('attribute_similarity_threshold', 0.85)
-
-        best_match = None
-        best_score = 0
-
-        for existing_attr in existing_attributes:
-            existing_name = existing_attr['name']
-
-            # 精确匹配
-            if attr_name == existing_name:
-                return existing_attr
-
-            # 相似度匹配
-            similarity = SequenceMatcher(None, attr_name, existing_name).ratio()
-            if similarity > best_score and similarity >= threshold:
-                best_score = similarity
-                best_match = existing_attr
-
-        return best_match
+        matches = get_attribute_matcher().match_attribute(attr_name, threshold)
+        return matches[0] if matches else None
 
     def _find_matching_attribute_value(self, attribute_id: int,
                                      value: str) -> Optional[Dict[str, Any]]:
-        """查找匹配的现有属性值"""
-        try:
-            # 精确匹配
-            exact_match = AttributeValue.objects.filter(
-                attribute_id=attribute_id,
-                value=value
-            ).values('id', 'value').first()
-
-            if exact_match:
-                return exact_match
-
-            # 相似度匹配
-            threshold = self.config.get('attribute_similarity_threshold', 0.85)
-            existing_values = AttributeValue.objects.filter(
-                attribute_id=attribute_id
-            ).values('id', 'value')
-
-            best_match = None
-            best_score = 0
-
-            for existing_value in existing_values:
-                similarity = SequenceMatcher(
-                    None, value, existing_value['value']
-                ).ratio()
-
-                if similarity > best_score and similarity >= threshold:
-                    best_score = similarity
-                    best_match = existing_value
-
-            return best_match
-
-        except Exception as e:
-            logger.error(f"查找匹配属性值失败: {e}")
-            return None
+        """查找匹配的现有属性值（精确匹配优先，其次相似度匹配）"""
+        threshold = self.config.get('attribute_similarity_threshold', 0.85)
+        matches = get_attribute_matcher().match_value(attribute_id, value, threshold)
+        return matches[0] if matches else None
 
     def _is_complex_product(self, data: Dict[str, Any]) -> bool:
         """判断是否为复杂产品，需要AI增强处理"""
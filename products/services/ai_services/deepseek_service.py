@@ -5,8 +5,14 @@ DeepSeek AI服务
 
 import json
 import logging
+import time
 from typing import Dict, Any, Optional
 from django.conf import settings
+from products.utils.ai_rate_limiter import (
+    get_deepseek_rate_limiter, get_deepseek_circuit_breaker, parse_retry_after
+)
+from products.utils.ai_usage import is_budget_exhausted, record_usage
+from products.utils.llm_transport import post_chat_completion
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +32,7 @@ class DeepSeekService:
         self.timeout = deepseek_config.get('timeout', 30)
         self.max_retries = deepseek_config.get('max_retries', 3)
         self.retry_delay = deepseek_config.get('retry_delay', 1)
+        self.rate_limit_max_wait = deepseek_config.get('rate_limit_max_wait', 2)
         
     def is_available(self) -> bool:
         """检查DeepSeek服务是否可用"""
@@ -70,6 +77,16 @@ class DeepSeekService:
             logger.warning("DeepSeek服务不可用，使用默认处理")
             return self._fallback_response(prompt)
 
+        # 达到token预算后不再调用LLM，使用规则模拟响应
+        if is_budget_exhausted():
+            logger.info("AI调用已达到token预算，使用规则模拟响应")
+            return self._simulate_deepseek_response(prompt)
+
+        # 熔断期间直接使用规则模拟响应，直到半开探测成功
+        if not get_deepseek_circuit_breaker().allow_request():
+            logger.info("DeepSeek服务熔断中，使用规则模拟响应")
+            return self._simulate_deepseek_response(prompt)
+
         # 使用实例配置或传入参数
         max_tokens = max_tokens or self.max_tokens
         temperature = temperature or self.temperature
@@ -88,7 +105,6 @@ class DeepSeekService:
     def _call_deepseek_api(self, prompt: str, max_tokens: int, temperature: float) -> str:
         """调用真实的DeepSeek API"""
         import requests
-        import time
 
         headers = {
             'Authorization': f'Bearer {self.api_key}',
@@ -108,16 +124,25 @@ class DeepSeekService:
             'stream': False
         }
 
-        # 重试机制
+        rate_limiter = get_deepseek_rate_limiter()
+        circuit_breaker = get_deepseek_circuit_breaker()
+
+        # 重试机制：每次未成功的调用都记录熔断失败（半开探测失败会重新打开熔断器并释放探测名额）
         for attempt in range(self.max_retries):
+            # 第一次调用已在generate_response中通过熔断检查
+            if attempt > 0 and not circuit_breaker.allow_request():
+                raise Exception("DeepSeek熔断器已打开，停止重试")
+
+            # 共享令牌桶限流，等待超时直接失败并由调用方降级
+            if not rate_limiter.acquire(self.rate_limit_max_wait):
+                circuit_breaker.record_failure()
+                raise Exception("DeepSeek API限流等待超时")
+
             try:
                 logger.info(f"🤖 调用DeepSeek API (尝试 {attempt + 1}/{self.max_retries})")
 
-                response = requests.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=data,
-                    timeout=self.timeout
+                response = post_chat_completion(
+                    f"{self.base_url}/chat/completions", headers, data, self.timeout
                 )
 
                 if response.status_code == 200:
@@ -125,16 +150,22 @@ class DeepSeekService:
 
                     if 'choices' in result and len(result['choices']) > 0:
                         content = result['choices'][0]['message']['content']
+                        circuit_breaker.record_success()
+                        record_usage(result.get('usage'))
                         logger.info(f"✅ DeepSeek API响应成功 (长度: {len(content)})")
                         return content.strip()
                     else:
                         raise ValueError("API响应格式异常：缺少choices字段")
 
                 elif response.status_code == 429:
-                    # 速率限制，等待后重试
-                    wait_time = self.retry_delay * (2 ** attempt)  # 指数退避
-                    logger.warning(f"⏳ API速率限制，等待 {wait_time}s 后重试...")
-                    time.sleep(wait_time)
+                    # 速率限制，所有进程共同指数退避
+                    wait_time = parse_retry_after(
+                        response.headers.get('Retry-After'),
+                        self.retry_delay * (2 ** attempt)
+                    )
+                    logger.warning(f"⏳ API速率限制，共享退避 {wait_time}s 后重试...")
+                    rate_limiter.penalize(wait_time)
+                    circuit_breaker.record_failure()
                     continue
 
                 else:
@@ -149,20 +180,29 @@ class DeepSeekService:
 
             except requests.Timeout:
                 logger.warning(f"⏰ API调用超时 (尝试 {attempt + 1}/{self.max_retries})")
+                circuit_breaker.record_failure()
                 if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
+                    self._backoff(attempt)
                     continue
                 raise
 
-            except requests.RequestException as e:
-                logger.warning(f"🔌 API调用网络错误: {str(e)}")
+            except (requests.RequestException, ValueError, KeyError, IndexError, TypeError) as e:
+                # 网络错误、非200响应和格式异常的200响应（含JSON解析失败）
+                logger.warning(f"🔌 API调用失败: {str(e)}")
+                circuit_breaker.record_failure()
                 if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
+                    self._backoff(attempt)
                     continue
                 raise
 
         raise Exception(f"DeepSeek API调用失败，已重试 {self.max_retries} 次")
 
+    def _backoff(self, attempt: int):
+        """重试前指数退避，避免服务端故障时连续打满重试次数"""
+        wait_time = self.retry_delay * (2 ** attempt)
+        logger.info(f"⏳ {wait_time}s 后重试...")
+        time.sleep(wait_time)
+
     def _simulate_deepseek_response(self, prompt: str) -> str:
         """模拟DeepSeek响应（用于开发和测试）"""
         # 分析提示词中的属性信息
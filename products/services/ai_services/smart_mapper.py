@@ -4,28 +4,114 @@
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
+from django.conf import settings
 from django.db import transaction
 from products.models import Attribute, AttributeValue, SKU, SPU, SKUAttributeValue, SPUAttribute
+from products.utils.attribute_catalog import get_attribute_catalog
+from products.utils.lru_cache import BoundedLRUCache
 
 logger = logging.getLogger(__name__)
 
 
+def _instance_from_values(model, data: Dict[str, Any]):
+    """用已知字段值构造模型实例（未提供的字段延迟加载）"""
+    field_names = [f.attname for f in model._meta.concrete_fields if f.attname in data]
+    return model.from_db('default', field_names, [data[name] for name in field_names])
+
+
 class SmartAttributeMapper:
     """智能属性映射器 - 将AI分析结果映射到数据库"""
     
     def __init__(self):
-        self.created_attributes = {}  # 缓存已创建的属性
-        self.created_values = {}      # 缓存已创建的属性值
+        # 映射器随处理器单例常驻worker进程，缓存只保存主键且有容量上限；
+        # 条目以属性编码/属性值为键，每次写入前由_live_ids校验，快照更新时无需清空
+        config = getattr(settings, 'SMART_ATTRIBUTES_CONFIG', {})
+        self.created_attributes = BoundedLRUCache(config.get('mapper_attribute_cache_size', 2048))
+        self.created_values = BoundedLRUCache(config.get('mapper_value_cache_size', 20000))
+        self._catalog = None
+
+    def _current_catalog(self):
+        """获取属性目录快照"""
+        self._catalog = get_attribute_catalog()
+        return self._catalog
+
+    def _attribute_instance(self, attribute_id: int, attr_code: str) -> Attribute:
+        """由主键构造属性实例，字段优先取自目录快照"""
+        data = self._catalog.by_id.get(attribute_id) if self._catalog else None
+        return _instance_from_values(Attribute, data or {'id': attribute_id, 'code': attr_code})
+
+    def _known_attribute_id(self, catalog, attr_code: str, attr_type: str, filterable: bool,
+                            peek: bool = False) -> Optional[int]:
+        """缓存或目录快照中的属性主键（未经校验）；peek为True时不计入缓存命中统计"""
+        lookup = self.created_attributes.peek if peek else self.created_attributes.get
+        attribute_id = lookup((attr_code, attr_type))
+        if attribute_id is None:
+            catalog_attr = catalog.by_code.get(attr_code)
+            # 需要把属性改为可筛选时必须走数据库
+            if catalog_attr and (catalog_attr['is_filterable'] or not filterable):
+                attribute_id = catalog_attr['id']
+        return attribute_id
+
+    def _known_value_id(self, catalog, attribute_id: int, display_value: str, peek: bool = False) -> Optional[int]:
+        """缓存或目录快照中的属性值主键（未经校验）；peek为True时不计入缓存命中统计"""
+        lookup = self.created_values.peek if peek else self.created_values.get
+        value_id = lookup((attribute_id, display_value))
+        if value_id is None:
+            value_id = catalog.get_value_id(attribute_id, display_value)
+        return value_id
+
+    def _live_ids(self, analyzed_attributes: List[Dict[str, Any]]) -> Tuple[Set[int], Set[int]]:
+        """
+        写入前整批校验缓存和快照中的主键（每个SKU两次查询）
+
+        快照可能滞后于数据库，已删除或已改名的属性、属性值不在返回的集合中，
+        查找时退回get_or_create，避免以失效的外键写入关联表。
+
+        Returns:
+            (仍有效的属性ID, 仍有效的属性值ID)
+        """
+        catalog = self._current_catalog()
+        attribute_codes: Dict[int, str] = {}
+        value_keys: Dict[int, Tuple[int, str]] = {}
+        for attr_analysis in analyzed_attributes:
+            try:
+                attr_code = self._generate_attribute_code(attr_analysis['display_name'])
+                # 预检只读取不计数，命中统计由随后的 _get_or_create_* 查找计入
+                attribute_id = self._known_attribute_id(
+                    catalog, attr_code, attr_analysis['attribute_type'], attr_analysis.get('filterable', False),
+                    peek=True
+                )
+                display_value = attr_analysis['display_value']
+            except (KeyError, TypeError):
+                continue
+            if attribute_id is None:
+                continue
+            attribute_codes[attribute_id] = attr_code
+            value_id = self._known_value_id(catalog, attribute_id, display_value, peek=True)
+            if value_id is not None:
+                value_keys[value_id] = (attribute_id, display_value)
+
+        live_attributes = set(
+            Attribute.objects.filter(id__in=attribute_codes).values_list('id', 'code')
+        ) if attribute_codes else set()
+        live_values = set(
+            AttributeValue.objects.filter(id__in=value_keys).values_list('id', 'attribute_id', 'value')
+        ) if value_keys else set()
+        return (
+            {pk for pk, code in attribute_codes.items() if (pk, code) in live_attributes},
+            {pk for pk, key in value_keys.items() if (pk,) + key in live_values},
+        )
         
     def map_attributes_to_sku(self, sku: SKU, spu: SPU, analyzed_attributes: List[Dict[str, Any]]) -> int:
         """将分析的属性映射到SKU"""
         mapped_count = 0
         
         with transaction.atomic():
+            live_ids = self._live_ids(analyzed_attributes)
             for attr_analysis in analyzed_attributes:
                 try:
-                    success = self._create_attribute_mapping(sku, spu, attr_analysis)
+                    success = self._create_attribute_mapping(sku, spu, attr_analysis, live_ids)
                     if success:
                         mapped_count += 1
                         logger.debug(f"🔗 映射属性: {attr_analysis['display_name']} = {attr_analysis['display_value']}")
@@ -35,16 +121,18 @@ class SmartAttributeMapper:
         
         return mapped_count
     
-    def _create_attribute_mapping(self, sku: SKU, spu: SPU, attr_analysis: Dict[str, Any]) -> bool:
-        """创建单个属性映射"""
+    def _create_attribute_mapping(self, sku: SKU, spu: SPU, attr_analysis: Dict[str, Any],
+                                  live_ids: Tuple[Set[int], Set[int]] = (frozenset(), frozenset())) -> bool:
+        """创建单个属性映射（live_ids为_live_ids校验过的主键，其余一律查询数据库）"""
+        live_attribute_ids, live_value_ids = live_ids
         try:
             # 1. 创建或获取属性定义
-            attribute = self._get_or_create_attribute(attr_analysis)
+            attribute = self._get_or_create_attribute(attr_analysis, live_attribute_ids)
             if not attribute:
                 return False
             
             # 2. 创建或获取属性值
-            attribute_value = self._get_or_create_attribute_value(attribute, attr_analysis)
+            attribute_value = self._get_or_create_attribute_value(attribute, attr_analysis, live_value_ids)
             if not attribute_value:
                 return False
             
@@ -77,8 +165,9 @@ class SmartAttributeMapper:
             logger.error(f"创建属性映射失败: {str(e)}")
             return False
     
-    def _get_or_create_attribute(self, attr_analysis: Dict[str, Any]) -> Optional[Attribute]:
-        """获取或创建属性定义"""
+    def _get_or_create_attribute(self, attr_analysis: Dict[str, Any],
+                                 live_ids: Set[int] = frozenset()) -> Optional[Attribute]:
+        """获取或创建属性定义，缓存或快照中的主键只在已校验（live_ids）时直接使用"""
         try:
             display_name = attr_analysis['display_name']
             attr_type = attr_analysis['attribute_type']
@@ -87,11 +176,14 @@ class SmartAttributeMapper:
             # 生成属性编码
             attr_code = self._generate_attribute_code(display_name)
             
-            # 检查缓存
-            cache_key = f"{attr_code}_{attr_type}"
-            if cache_key in self.created_attributes:
-                return self.created_attributes[cache_key]
-            
+            # 缓存或属性目录快照中已存在且无需更新时，直接构造实例，省去查询
+            catalog = self._current_catalog()
+            cache_key = (attr_code, attr_type)
+            attribute_id = self._known_attribute_id(catalog, attr_code, attr_type, filterable)
+            if attribute_id is not None and attribute_id in live_ids:
+                self.created_attributes.set(cache_key, attribute_id)
+                return self._attribute_instance(attribute_id, attr_code)
+
             # 创建或获取属性
             attribute, created = Attribute.objects.get_or_create(
                 code=attr_code,
@@ -113,24 +205,29 @@ class SmartAttributeMapper:
                 attribute.save()
                 logger.info(f"📝 更新属性可筛选性: {display_name}")
             
-            # 缓存属性
-            self.created_attributes[cache_key] = attribute
+            # 缓存属性主键
+            self.created_attributes.set(cache_key, attribute.id)
             return attribute
             
         except Exception as e:
             logger.error(f"创建属性定义失败: {str(e)}")
             return None
     
-    def _get_or_create_attribute_value(self, attribute: Attribute, attr_analysis: Dict[str, Any]) -> Optional[AttributeValue]:
-        """获取或创建属性值"""
+    def _get_or_create_attribute_value(self, attribute: Attribute, attr_analysis: Dict[str, Any],
+                                       live_ids: Set[int] = frozenset()) -> Optional[AttributeValue]:
+        """获取或创建属性值，缓存或快照中的主键只在已校验（live_ids）时直接使用"""
         try:
             display_value = attr_analysis['display_value']
             
-            # 检查缓存
-            cache_key = f"{attribute.id}_{display_value}"
-            if cache_key in self.created_values:
-                return self.created_values[cache_key]
-            
+            # 检查缓存，未命中时查属性目录快照
+            cache_key = (attribute.id, display_value)
+            value_id = self._known_value_id(self._current_catalog(), attribute.id, display_value)
+            if value_id is not None and value_id in live_ids:
+                self.created_values.set(cache_key, value_id)
+                return _instance_from_values(AttributeValue, {
+                    'id': value_id, 'attribute_id': attribute.id, 'value': display_value
+                })
+
             # 创建或获取属性值
             attribute_value, created = AttributeValue.objects.get_or_create(
                 attribute=attribute,
@@ -144,8 +241,8 @@ class SmartAttributeMapper:
             if created:
                 logger.debug(f"✨ 创建新属性值: {attribute.name} = {display_value}")
             
-            # 缓存属性值
-            self.created_values[cache_key] = attribute_value
+            # 缓存属性值主键
+            self.created_values.set(cache_key, attribute_value.id)
             return attribute_value
             
         except Exception as e:
@@ -195,20 +292,28 @@ class SmartAttributeMapper:
             'created_attributes_count': len(self.created_attributes),
             'created_values_count': len(self.created_values),
             'attribute_types': self._get_attribute_type_distribution(),
-            'filterable_attributes': self._count_filterable_attributes()
+            'filterable_attributes': self._count_filterable_attributes(),
+            'attribute_cache': self.created_attributes.get_stats(),
+            'value_cache': self.created_values.get_stats(),
         }
     
+    def _cached_attribute_rows(self) -> List[Dict[str, Any]]:
+        """缓存中属性主键对应的目录记录（快照尚未包含的新属性忽略）"""
+        catalog = self._catalog or get_attribute_catalog()
+        rows = (catalog.by_id.get(attribute_id) for attribute_id in set(self.created_attributes.values()))
+        return [row for row in rows if row]
+
     def _get_attribute_type_distribution(self) -> Dict[str, int]:
         """获取属性类型分布"""
         type_counts = {}
-        for attribute in self.created_attributes.values():
-            attr_type = attribute.type
+        for row in self._cached_attribute_rows():
+            attr_type = row['type']
             type_counts[attr_type] = type_counts.get(attr_type, 0) + 1
         return type_counts
     
     def _count_filterable_attributes(self) -> int:
         """统计可筛选属性数量"""
-        return sum(1 for attr in self.created_attributes.values() if attr.is_filterable)
+        return sum(1 for row in self._cached_attribute_rows() if row['is_filterable'])
     
     def clear_cache(self):
         """清空缓存"""
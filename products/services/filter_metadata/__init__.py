@@ -0,0 +1,27 @@
+"""
+筛选器元数据服务模块
+价格区间、各分类价格直方图、可筛选属性及属性值计数等预先计算为一个缓存条目，
+数据变更提交后只记录受影响的分类、属性，读取时合并重算，筛选器接口只读取一次缓存
+"""
+
+from .builder import (
+    build_filter_metadata,
+    get_filter_metadata,
+    get_filter_metadata_entry,
+    mark_filter_metadata_dirty,
+    rebuild_filter_metadata,
+)
+from .changes import (
+    enqueue_filter_metadata_update,
+    flush_filter_metadata_changes,
+)
+
+__all__ = [
+    'build_filter_metadata',
+    'get_filter_metadata',
+    'get_filter_metadata_entry',
+    'mark_filter_metadata_dirty',
+    'rebuild_filter_metadata',
+    'enqueue_filter_metadata_update',
+    'flush_filter_metadata_changes',
+]
@@ -0,0 +1,364 @@
+"""
+筛选器元数据构建
+把筛选器接口的全部数据（顶级分类、品牌、可筛选属性及各属性值的上架SKU数、价格区间、
+各分类价格直方图）预先计算为一个缓存条目，接口只读取一次缓存；
+数据变更提交后只追加一条变更记录，读取时合并尚未应用的记录，
+只重算受影响的分类、属性或分段后整体写回，两次重算至少间隔 refresh_interval 秒
+"""
+
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+ENTRY_KEY = 'filter_metadata:entry'
+LOCK_KEY = 'filter_metadata:lock'
+CHANGE_SEQ_KEY = 'filter_metadata:change_seq'
+CHANGE_KEY = 'filter_metadata:change:{}'
+# 变更记录的保留时间，过期未应用的记录视为缺失，下次读取全量重建
+CHANGE_TIMEOUT = 24 * 3600
+# 未应用的记录超过该数量时全量重建比逐条合并更省
+MAX_PENDING_CHANGES = 1000
+CHANGE_FIELDS = ('sections', 'category_ids', 'spu_ids', 'sku_ids', 'attribute_ids')
+ACTIVE_STATUS = 'active'
+PRICE_QUANTUM = Decimal('0.01')
+
+STATUS_CHOICES = [
+    {'value': 'active', 'label': '在售'},
+    {'value': 'inactive', 'label': '停售'},
+    {'value': 'draft', 'label': '草稿'},
+]
+
+_local_lock = threading.Lock()
+
+
+def filter_metadata_config() -> dict:
+    return getattr(settings, 'FILTER_METADATA_CONFIG', {})
+
+
+# ----------------------------------------------------------------------
+# 分段计算
+# ----------------------------------------------------------------------
+
+def build_categories() -> List[Dict]:
+    from products.models import Category
+    from products.serializers import CategorySimpleSerializer
+
+    return list(CategorySimpleSerializer(Category.objects.filter(is_active=True, level=0), many=True).data)
+
+
+def build_brands() -> List[Dict]:
+    from products.models import Brand
+    from products.serializers import BrandSerializer
+
+    return list(BrandSerializer(Brand.objects.filter(is_active=True), many=True).data)
+
+
+def build_attributes(attribute_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict]:
+    """
+    可筛选属性及其属性值，附带每个值的上架SKU数（一次分组查询）
+
+    Args:
+        attribute_ids: 只计算这些属性，None为全部；结果中缺少的属性表示已停用、不可筛选或已删除
+    """
+    from products.models import Attribute, SKUAttributeValue
+    from products.serializers import AttributeSerializer
+
+    attributes = Attribute.objects.filter(is_active=True, is_filterable=True).prefetch_related('values')
+    counts = SKUAttributeValue.objects.filter(sku__status=ACTIVE_STATUS)
+    if attribute_ids is not None:
+        attribute_ids = list(attribute_ids)
+        attributes = attributes.filter(id__in=attribute_ids)
+        counts = counts.filter(attribute_id__in=attribute_ids)
+
+    value_counts: Dict[int, int] = {}
+    custom_counts: Dict[int, Dict[str, int]] = {}
+    for row in (
+        counts.values('attribute_id', 'attribute_value_id', 'custom_value')
+        .annotate(count=Count('sku_id', distinct=True))
+        .order_by()
+    ):
+        if row['custom_value']:
+            values = custom_counts.setdefault(row['attribute_id'], {})
+            values[row['custom_value']] = values.get(row['custom_value'], 0) + row['count']
+        elif row['attribute_value_id']:
+            value_counts[row['attribute_value_id']] = row['count']
+
+    entries = {}
+    for item in AttributeSerializer(attributes, many=True).data:
+        item = dict(item)
+        item['values'] = [dict(value, count=value_counts.get(value['id'], 0)) for value in item['values']]
+        custom_values = custom_counts.get(item['id'], {})
+        item['custom_values'] = [
+            {'value': value, 'count': count}
+            for value, count in sorted(custom_values.items(), key=lambda pair: (-pair[1], pair[0]))
+        ]
+        entries[item['id']] = item
+    return entries
+
+
+def _histogram(prices: List[Decimal], buckets: int) -> Dict:
+    low, high = min(prices), max(prices)
+    width = (high - low) / buckets if high > low else Decimal(0)
+    counts = [0] * (buckets if width else 1)
+    for price in prices:
+        index = min(int((price - low) / width), buckets - 1) if width else 0
+        counts[index] += 1
+    return {
+        'min': low,
+        'max': high,
+        'count': len(prices),
+        'buckets': [
+            {
+                'min': (low + width * index).quantize(PRICE_QUANTUM),
+                'max': (low + width * (index + 1)).quantize(PRICE_QUANTUM) if width else high,
+                'count': count,
+            }
+            for index, count in enumerate(counts)
+        ],
+    }
+
+
+def build_price_histograms(category_ids: Optional[Iterable[int]] = None) -> Dict[int, Optional[Dict]]:
+    """
+    各分类（SPU直接所属分类）上架SKU的价格直方图，等宽分桶
+
+    Returns:
+        {分类ID: 直方图}；指定的分类下没有上架SKU时值为None
+    """
+    from products.models import SKU
+
+    skus = SKU.objects.filter(status=ACTIVE_STATUS)
+    if category_ids is not None:
+        category_ids = list(category_ids)
+        skus = skus.filter(spu__category_id__in=category_ids)
+
+    prices: Dict[int, List[Decimal]] = {category_id: [] for category_id in category_ids or ()}
+    for category_id, price in skus.values_list('spu__category_id', 'price').iterator(chunk_size=5000):
+        prices.setdefault(category_id, []).append(price)
+
+    buckets = filter_metadata_config().get('price_histogram_buckets', 10)
+    return {
+        category_id: _histogram(values, buckets) if values else None
+        for category_id, values in prices.items()
+    }
+
+
+# ----------------------------------------------------------------------
+# 组装与增量更新
+# ----------------------------------------------------------------------
+
+def _attribute_list(attributes: Dict[int, Dict]) -> List[Dict]:
+    return sorted(attributes.values(), key=lambda item: (item['order'], item['name']))
+
+
+def _price_range(histograms: Dict) -> Dict:
+    """全局价格区间由各分类直方图的端点合并得到"""
+    if not histograms:
+        return {'min': 0, 'max': 0}
+    return {
+        'min': min(histogram['min'] for histogram in histograms.values()),
+        'max': max(histogram['max'] for histogram in histograms.values()),
+    }
+
+
+def build_filter_metadata() -> Dict:
+    """全量计算筛选器元数据"""
+    histograms = {
+        category_id: histogram
+        for category_id, histogram in build_price_histograms().items() if histogram
+    }
+    return {
+        'categories': build_categories(),
+        'brands': build_brands(),
+        'attributes': _attribute_list(build_attributes()),
+        'price_range': _price_range(histograms),
+        'price_histograms': histograms,
+        'status_choices': STATUS_CHOICES,
+    }
+
+
+def _resolve_changes(records: Iterable[Dict]) -> Tuple[Set[str], Set[int], Set[int]]:
+    """合并变更记录，SPU、SKU解析为所属分类，SKU另解析出其属性"""
+    from products.models import SKU, SPU, SKUAttributeValue
+
+    merged = {field: set() for field in CHANGE_FIELDS}
+    for record in records:
+        for field in CHANGE_FIELDS:
+            merged[field].update(record.get(field, ()))
+
+    category_ids, attribute_ids = merged['category_ids'], merged['attribute_ids']
+    if merged['spu_ids']:
+        category_ids.update(SPU.objects.filter(id__in=merged['spu_ids']).values_list('category_id', flat=True))
+    if merged['sku_ids']:
+        sku_ids = merged['sku_ids']
+        category_ids.update(SKU.objects.filter(id__in=sku_ids).values_list('spu__category_id', flat=True))
+        attribute_ids.update(
+            SKUAttributeValue.objects.filter(sku_id__in=sku_ids).values_list('attribute_id', flat=True)
+        )
+    category_ids.discard(None)
+    return merged['sections'], category_ids, attribute_ids
+
+
+def _apply_changes(payload: Dict, sections: Set[str], category_ids: Set[int], attribute_ids: Set[int]) -> Dict:
+    """按分段、分类和属性重算，返回新的元数据（不修改传入的元数据）"""
+    payload = dict(payload)
+    if 'categories' in sections:
+        payload['categories'] = build_categories()
+    if 'brands' in sections:
+        payload['brands'] = build_brands()
+    if attribute_ids:
+        attributes = {item['id']: item for item in payload['attributes']}
+        for attribute_id in attribute_ids:
+            attributes.pop(attribute_id, None)
+        attributes.update(build_attributes(attribute_ids))
+        payload['attributes'] = _attribute_list(attributes)
+    if category_ids:
+        histograms = dict(payload['price_histograms'])
+        for category_id, histogram in build_price_histograms(category_ids).items():
+            if histogram:
+                histograms[category_id] = histogram
+            else:
+                histograms.pop(category_id, None)
+        payload['price_histograms'] = histograms
+        payload['price_range'] = _price_range(histograms)
+    return payload
+
+
+# ----------------------------------------------------------------------
+# 缓存条目与变更记录
+# ----------------------------------------------------------------------
+
+@contextmanager
+def _update_lock(blocking: bool = True):
+    """
+    重算是读-改-写，Redis上用分布式锁串行化，其他缓存后端退回进程内锁
+
+    Yields:
+        是否获得了锁；blocking=False 时锁被占用立即得到False
+    """
+    lock = cache.lock(LOCK_KEY, timeout=60, blocking_timeout=30) if hasattr(cache, 'lock') else _local_lock
+    acquired = lock.acquire(blocking=blocking)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
+
+
+def _refresh_interval() -> float:
+    return filter_metadata_config().get('refresh_interval', 5)
+
+
+def _entry(payload: Dict, seq: int) -> Dict:
+    """
+    缓存条目：元数据、已应用到的变更序号、重算时间和内容标记
+    （标记每次写入都重新生成，供接口生成ETag）
+    """
+    return {'payload': payload, 'seq': seq, 'refreshed_at': time.time(), 'token': uuid.uuid4().hex}
+
+
+def _store(payload: Dict, seq: int) -> Dict:
+    entry = _entry(payload, seq)
+    cache.set(ENTRY_KEY, entry, filter_metadata_config().get('cache_timeout'))
+    return entry
+
+
+def _read_state() -> Tuple[Optional[Dict], int]:
+    found = cache.get_many([ENTRY_KEY, CHANGE_SEQ_KEY])
+    return found.get(ENTRY_KEY), int(found.get(CHANGE_SEQ_KEY) or 0)
+
+
+def _next_change_seq() -> int:
+    try:
+        return cache.incr(CHANGE_SEQ_KEY)
+    except ValueError:
+        # 序号不存在（首次使用或被淘汰）时从0起步；序号回退后读取会全量重建
+        cache.add(CHANGE_SEQ_KEY, 0, None)
+        return cache.incr(CHANGE_SEQ_KEY)
+
+
+def mark_filter_metadata_dirty(changes: Dict[str, Iterable]) -> bool:
+    """
+    追加一条变更记录（一次自增、一次写入，不查询数据库、不加锁），由之后的读取合并重算
+
+    Args:
+        changes: 键为 CHANGE_FIELDS，值为受影响的分段或ID
+    """
+    record = {field: list(changes.get(field, ())) for field in CHANGE_FIELDS}
+    try:
+        cache.set(CHANGE_KEY.format(_next_change_seq()), record, CHANGE_TIMEOUT)
+        return True
+    except Exception as e:
+        # 记录失败时删除缓存条目，下次读取全量重建，避免留下过期数据
+        logger.error(f"记录筛选器元数据变更失败: {e}")
+        try:
+            cache.delete(ENTRY_KEY)
+        except Exception:
+            pass
+        return False
+
+
+def _refresh(entry: Optional[Dict], seq: int) -> Dict:
+    """在锁内合并条目之后的变更记录并增量重算；条目或记录缺失、记录过多、序号回退时全量重建"""
+    if entry is None or not 0 <= seq - entry['seq'] <= MAX_PENDING_CHANGES:
+        return _store(build_filter_metadata(), seq)
+    if seq == entry['seq']:
+        return entry
+    keys = [CHANGE_KEY.format(number) for number in range(entry['seq'] + 1, seq + 1)]
+    records = cache.get_many(keys)
+    if len(records) < len(keys):
+        return _store(build_filter_metadata(), seq)
+    return _store(_apply_changes(entry['payload'], *_resolve_changes(records.values())), seq)
+
+
+def get_filter_metadata_entry() -> Dict:
+    """
+    读取筛选器元数据缓存条目（一次缓存读取，同时取得变更序号）
+
+    有未应用的变更且距上次重算已超过 refresh_interval 时，由获得锁的请求合并重算；
+    锁被占用或仍在间隔内时直接返回当前条目，期间的变更合并到下一次重算
+    """
+    try:
+        entry, seq = _read_state()
+    except Exception as e:
+        logger.warning(f"读取筛选器元数据缓存失败: {e}")
+        return _entry(build_filter_metadata(), 0)
+    if entry is not None and (
+        entry['seq'] == seq or time.time() - entry['refreshed_at'] < _refresh_interval()
+    ):
+        return entry
+
+    try:
+        # 没有条目时等待锁，避免并发请求各自全量构建
+        with _update_lock(blocking=entry is None) as acquired:
+            if not acquired:
+                return entry if entry is not None else _entry(build_filter_metadata(), seq)
+            # 在锁内重新读取：等待期间其他请求可能已经完成重算
+            entry, seq = _read_state()
+            return _refresh(entry, seq)
+    except Exception as e:
+        logger.warning(f"更新筛选器元数据缓存失败: {e}")
+        return entry if entry is not None else _entry(build_filter_metadata(), seq)
+
+
+def get_filter_metadata() -> Dict:
+    """读取筛选器元数据"""
+    return get_filter_metadata_entry()['payload']
+
+
+def rebuild_filter_metadata() -> Dict:
+    """全量重建并写入缓存（批量导入绕过信号后使用）"""
+    with _update_lock():
+        # 先读序号再构建：构建期间追加的变更会在之后的读取中再次应用
+        _, seq = _read_state()
+        return _store(build_filter_metadata(), seq)['payload']
@@ -0,0 +1,49 @@
+"""
+筛选器元数据变更队列
+信号登记受影响的分段、分类、SPU、SKU和属性，事务提交后作为一条变更记录写入缓存，
+不查询数据库也不重算；读取筛选器元数据时再合并解析，两次重算之间的变更只重算一次
+"""
+
+import logging
+import threading
+
+from django.db import transaction
+
+from .builder import CHANGE_FIELDS, mark_filter_metadata_dirty
+
+logger = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+
+def _state():
+    if not hasattr(_pending, 'sections'):
+        for field in CHANGE_FIELDS:
+            setattr(_pending, field, set())
+    return _pending
+
+
+def enqueue_filter_metadata_update(**changes):
+    """
+    登记受影响的数据，在当前事务提交后写入变更记录
+
+    Args:
+        sections: 整体重算的分段（'categories'、'brands'）
+        category_ids / spu_ids / sku_ids: 价格直方图需要重算的分类（SPU、SKU重算时解析为所属分类）
+        attribute_ids: 属性值计数需要重算的属性（SKU还会解析出其属性）
+    """
+    state = _state()
+    for field in CHANGE_FIELDS:
+        getattr(state, field).update(value for value in changes.get(field, ()) if value is not None)
+    transaction.on_commit(flush_filter_metadata_changes)
+
+
+def flush_filter_metadata_changes() -> bool:
+    """写入已登记的变更（同一事务的后续回调读到空队列直接返回）"""
+    state = _state()
+    pending = {field: getattr(state, field) for field in CHANGE_FIELDS}
+    if not any(pending.values()):
+        return False
+    for field in CHANGE_FIELDS:
+        setattr(state, field, set())
+    return mark_filter_metadata_dirty(pending)
@@ -100,10 +100,16 @@ class ImportResult:
     error_rows: int
     errors: List[Dict[str, Any]]
     created_objects: Dict[str, Any] = None
+    quality_summary: Dict[str, Any] = None
+    ai_usage: Dict[str, Any] = None
 
     def __post_init__(self):
         if self.created_objects is None:
             self.created_objects = {}
+        if self.quality_summary is None:
+            self.quality_summary = {}
+        if self.ai_usage is None:
+            self.ai_usage = {}
 
 
 class Processor(Protocol):
@@ -9,10 +9,12 @@ from django.db import transaction
 
 from . import ProcessingContext, ImportResult, ProcessingStatus, ProcessingStage
 from .processors.data_preprocessor import DataPreprocessor
+from .processors.quality_checker import QualityChecker
 from .builders.product_builder import ProductBuilder
 from .builders.relation_builder import RelationBuilder
 from .utils.error_handler import ErrorHandler
 from .utils.progress_manager import ProgressManager
+from products.utils.ai_usage import track_import_usage
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,7 @@ class ImportOrchestrator:
 
         # 初始化各个模块
         self.data_preprocessor = DataPreprocessor()
+        self.quality_checker = QualityChecker()
         self.product_builder = ProductBuilder()
         self.relation_builder = RelationBuilder()
 
@@ -35,9 +38,19 @@ class ImportOrchestrator:
         self.success_rows = 0
         self.error_rows = 0
         self.all_errors = []
+        self.quality_summary = {}
 
     def process_import(self, csv_content: str) -> ImportResult:
-        """处理导入流程"""
+        """处理导入流程，并统计本次导入的AI用量"""
+        with track_import_usage() as usage:
+            result = self._run_import(csv_content)
+
+        result.ai_usage = usage.to_summary(result.total_rows)
+        logger.info(f"🤖 本次导入AI用量: {result.ai_usage}")
+        return result
+
+    def _run_import(self, csv_content: str) -> ImportResult:
+        """执行导入流程"""
         try:
             # 🚀 阶段1: 系统初始化
             self.progress_manager.start_stage(ProcessingStage.INITIALIZING)
@@ -57,12 +70,17 @@ class ImportOrchestrator:
             self.progress_manager.start_import(self.total_rows)
             logger.info(f"🚀 开始处理{self.total_rows}行数据，启动智能导入引擎...")
 
-            # 2. 逐行处理数据
+            # 2. 整批质量检测（以整批数据为总体识别异常值）
+            row_quality_issues = self._run_batch_quality_check(rows)
+
+            # 3. 逐行处理数据
             for index, row in enumerate(rows):
                 context = ProcessingContext(
                     row_number=index + 2,  # CSV第一行是标题，从第2行开始
                     original_data=row
                 )
+                if row_quality_issues:
+                    context.quality_issues = row_quality_issues[index]
 
                 # 处理单行数据
                 result_context = self._process_single_row(context)
@@ -81,7 +99,7 @@ class ImportOrchestrator:
             # 🎉 阶段9: 完成处理
             self.progress_manager.start_stage(ProcessingStage.FINALIZING)
 
-            # 3. 生成最终结果
+            # 4. 生成最终结果
             final_result = self._generate_final_result()
 
             # 完成导入
@@ -153,6 +171,20 @@ class ImportOrchestrator:
             logger.error(f"❌ 行{context.row_number}处理失败: {str(e)}")
             return context
 
+    def _run_batch_quality_check(self, rows: List[Dict[str, Any]]) -> Optional[List[List[Dict[str, Any]]]]:
+        """运行整批质量检测，返回逐行问题列表"""
+        if not self.quality_checker.is_enabled():
+            return None
+
+        self.progress_manager.start_stage(ProcessingStage.QUALITY_CHECK)
+        report = self.quality_checker.check_batch(rows)
+        if not report:
+            return None
+
+        self.quality_summary = self.quality_checker.summarize(report)
+        self.error_handler.record_quality_issues(rows, report['rows'])
+        return [row_report['issues'] for row_report in report['rows']]
+
     def _parse_csv_data(self, csv_content: str) -> Optional[List[Dict[str, Any]]]:
         """解析CSV数据"""
         try:
@@ -221,5 +253,6 @@ class ImportOrchestrator:
             total_rows=self.total_rows,
             success_rows=self.success_rows,
             error_rows=self.error_rows,
-            errors=self.all_errors
+            errors=self.all_errors,
+            quality_summary=self.quality_summary
         )
\ No newline at end of file
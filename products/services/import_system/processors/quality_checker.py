@@ -0,0 +1,50 @@
+"""
+质量检测处理器
+在逐行导入前对整批数据做一次向量化质量评估
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from products.utils.ai_feature_flags import is_quality_detection_enabled
+
+logger = logging.getLogger(__name__)
+
+
+class QualityChecker:
+    """质量检测处理器 - 单一职责：整批数据质量评估"""
+
+    def __init__(self):
+        self.quality_service = None
+
+        if is_quality_detection_enabled():
+            try:
+                from products.services.ai_enhanced.ai_quality_service import AIQualityService
+                self.quality_service = AIQualityService()
+            except Exception as e:
+                logger.warning(f"AI质量检测服务初始化失败: {e}")
+
+    def is_enabled(self) -> bool:
+        """是否启用批量质量检测"""
+        return self.quality_service is not None and self.quality_service.enabled
+
+    def check_batch(self, rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """对整批原始行做质量检测，失败时返回None，不影响导入"""
+        if not self.is_enabled():
+            return None
+
+        report = self.quality_service.process_batch(rows)
+        if not report or not report.get('success'):
+            logger.warning(f"批量质量检测失败: {(report or {}).get('error', '未知错误')}")
+            return None
+
+        logger.info(
+            f"🤖 批量质量检测完成: {report['total_rows']}行, "
+            f"平均分{report['average_score']}, 问题行{report['rows_with_issues']}"
+        )
+        return report
+
+    @staticmethod
+    def summarize(report: Dict[str, Any]) -> Dict[str, Any]:
+        """提取可写入导入结果摘要的统计信息（不含逐行明细）"""
+        return {key: value for key, value in report.items() if key != 'rows'}
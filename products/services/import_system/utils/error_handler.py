@@ -65,4 +65,26 @@ class ErrorHandler:
             )
             handled_errors.append(handled_error)
 
-        return handled_errors
\ No newline at end of file
+        return handled_errors
+
+    def record_quality_issues(self, rows: List[Dict[str, Any]], row_reports: List[Dict[str, Any]],
+                              first_row_number: int = 2, batch_size: int = 1000) -> int:
+        """批量记录质量检测问题"""
+        records = []
+        for offset, (row, report) in enumerate(zip(rows, row_reports)):
+            for issue in report.get('issues', []):
+                records.append(ImportError(
+                    task=self.task,
+                    row_number=first_row_number + offset,
+                    field_name=str(issue.get('field', ''))[:100],
+                    error_message=f"[{issue.get('severity', 'low').upper()}] {issue.get('message', '')}",
+                    raw_data=row,
+                    error_type='quality_check'
+                ))
+
+        try:
+            ImportError.objects.bulk_create(records, batch_size=batch_size)
+        except Exception as e:
+            logger.error(f"保存质量检测记录失败: {str(e)}")
+            return 0
+        return len(records)
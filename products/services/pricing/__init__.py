@@ -0,0 +1,43 @@
+"""
+动态定价服务模块
+把加价规则编译为按版本号缓存的定价表，报价计算不再逐次查询数据库
+"""
+
+from .rule_table import (
+    CompiledRule,
+    RuleWindow,
+    SkuPricingTable,
+    build_pricing_tables,
+    get_rule_applicability,
+    get_sku_pricing_entry,
+    get_sku_pricing_table,
+    get_sku_pricing_tables,
+    invalidate_sku_pricing,
+    invalidate_spu_pricing,
+    warm_pricing_tables,
+)
+from .engine import calculate_batch_quotes, calculate_sku_quote, quote_sku
+from .quote_cache import clear_quote_cache, get_quote_cache_stats
+from .sku_picker import get_priced_spu_ids, invalidate_priced_spu_ids, search_priced_skus
+
+__all__ = [
+    'CompiledRule',
+    'RuleWindow',
+    'SkuPricingTable',
+    'build_pricing_tables',
+    'get_rule_applicability',
+    'get_sku_pricing_entry',
+    'get_sku_pricing_table',
+    'get_sku_pricing_tables',
+    'invalidate_sku_pricing',
+    'invalidate_spu_pricing',
+    'warm_pricing_tables',
+    'calculate_batch_quotes',
+    'calculate_sku_quote',
+    'quote_sku',
+    'clear_quote_cache',
+    'get_quote_cache_stats',
+    'get_priced_spu_ids',
+    'invalidate_priced_spu_ids',
+    'search_priced_skus',
+]
@@ -0,0 +1,236 @@
+"""
+动态报价引擎
+在编译好的SKU定价表上计算报价，结果结构与 calculate_dynamic_price 接口一致
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from products.models.pricing_models import calculate_rule_increment
+from .fixed_point import (
+    hundredths_to_float, micros_to_decimal, micros_to_float, rule_increment_micros, to_hundredths
+)
+from .quote_cache import get_cached_quote, quote_cache_key, quote_cache_timeout, set_cached_quote
+from .rule_table import (
+    CALCULATION_METHOD_DISPLAY, RULE_TYPE_DISPLAY, SkuPricingTable,
+    get_sku_pricing_entry, get_sku_pricing_tables
+)
+
+
+def _fixed_point_enabled() -> bool:
+    return getattr(settings, 'PRICING_CONFIG', {}).get('fixed_point_arithmetic', True)
+
+
+def _evaluate(table: SkuPricingTable, custom_dimensions: Dict[str, Any], day):
+    """
+    按优先级应用规则，返回 (有效规则, 加价合计, 加价明细)
+
+    定制尺寸可精确表示为两位小数时走定点整数运算，否则退回Decimal运算，两者结果一致。
+    """
+    applicable_rules = table.active_rules(day)
+    use_fixed_point = _fixed_point_enabled()
+    total_micros = 0
+    decimal_total = Decimal('0')
+    pricing_details = []
+    used_rule_types = set()  # 跟踪已使用的规则类型，避免重复应用
+
+    for rule in applicable_rules:
+        # 如果该规则类型已经被更高优先级的规则处理过，跳过
+        if rule.rule_type in used_rule_types:
+            continue
+
+        custom_value = custom_dimensions.get(rule.rule_type)
+        standard_dimension = table.dimensions.get(rule.rule_type)
+        if custom_value is None or standard_dimension is None:
+            continue
+
+        custom_h = to_hundredths(custom_value) if use_fixed_point else None
+        if custom_h is not None:
+            excess_h = custom_h - rule.threshold_h
+            if excess_h <= 0:
+                continue
+            increment = rule_increment_micros(
+                rule.calculation_method, excess_h, rule.price_h,
+                rule.unit_h, rule.multiplier_h, rule.max_micros
+            )
+            if increment <= 0:
+                continue
+            total_micros += increment
+            custom_float = hundredths_to_float(custom_h)
+            excess_float = hundredths_to_float(excess_h)
+            increment_float = micros_to_float(increment)
+            threshold_float = hundredths_to_float(rule.threshold_h)
+            price_float = hundredths_to_float(rule.price_h)
+            unit_float = hundredths_to_float(rule.unit_h)
+        else:
+            custom_value = Decimal(str(custom_value))
+            if custom_value <= rule.threshold_value:
+                continue
+            excess_value = custom_value - rule.threshold_value
+            increment = calculate_rule_increment(
+                rule.calculation_method, excess_value, rule.price_increment,
+                rule.unit_increment, rule.multiplier, rule.max_increment
+            )
+            if increment <= 0:
+                continue
+            decimal_total += increment
+            custom_float = float(custom_value)
+            excess_float = float(excess_value)
+            increment_float = float(increment)
+            threshold_float = float(rule.threshold_value)
+            price_float = float(rule.price_increment)
+            unit_float = float(rule.unit_increment)
+
+        pricing_details.append({
+            'rule_id': rule.rule_id,
+            'rule_name': rule.name,
+            'rule_type': RULE_TYPE_DISPLAY.get(rule.rule_type, rule.rule_type),
+            'rule_scope': rule.rule_scope,
+            'priority': rule.priority,
+            'threshold_value': threshold_float,
+            'custom_value': custom_float,
+            'excess_value': excess_float,
+            'unit': standard_dimension[1],
+            'calculation_method': CALCULATION_METHOD_DISPLAY.get(
+                rule.calculation_method, rule.calculation_method),
+            'price_increment': price_float,
+            'calculated_increment': increment_float,
+            'unit_increment': unit_float
+        })
+        used_rule_types.add(rule.rule_type)
+
+    total_increment = decimal_total + micros_to_decimal(total_micros) if total_micros else decimal_total
+    return applicable_rules, total_increment, pricing_details
+
+
+def _build_quote(table: SkuPricingTable, sku_id: Any, applicable_rules, total_increment: Decimal,
+                 pricing_details) -> Dict[str, Any]:
+    """组装与 calculate_dynamic_price 一致的响应结构"""
+    if not applicable_rules:
+        return {
+            'sku_id': sku_id,
+            'sku_name': table.sku_name,
+            'base_price': float(table.base_price),
+            'total_price': float(table.base_price),
+            'pricing_details': [],
+            'calculation_summary': {
+                'total_increment': 0.0,
+                'applied_rules_count': 0,
+                'calculation_time': timezone.now().isoformat(),
+                'message': '无适用的加价规则'
+            }
+        }
+
+    sku_rule_count = sum(1 for rule in applicable_rules if rule.is_sku_rule)
+    return {
+        'sku_id': sku_id,
+        'sku_name': table.sku_name,
+        'sku_code': table.sku_code,
+        'spu_name': table.spu_name,
+        'base_price': float(table.base_price),
+        'total_price': float(table.base_price + total_increment),
+        'pricing_details': pricing_details,
+        'calculation_summary': {
+            'total_increment': float(total_increment),
+            'applied_rules_count': len(pricing_details),
+            'calculation_time': timezone.now().isoformat(),
+            'rule_priority_info': {
+                'sku_specific_rules': sku_rule_count,
+                'spu_general_rules': len(applicable_rules) - sku_rule_count,
+                'total_available_rules': len(applicable_rules)
+            }
+        }
+    }
+
+
+def quote_sku(table: SkuPricingTable, custom_dimensions: Dict[str, Any],
+              sku_id: Any = None, day=None) -> Dict[str, Any]:
+    """
+    计算单个SKU的动态价格
+
+    Args:
+        table: SKU定价表
+        custom_dimensions: 客户定制尺寸，如 {'height': 2400, 'width': 600}
+        sku_id: 原样回显到结果中的SKU标识（默认使用定价表中的ID）
+        day: 判断规则有效期的日期，默认今天
+    """
+    if sku_id is None:
+        sku_id = table.sku_id
+    applicable_rules, total_increment, pricing_details = _evaluate(
+        table, custom_dimensions, day or timezone.now().date()
+    )
+    return _build_quote(table, sku_id, applicable_rules, total_increment, pricing_details)
+
+
+def calculate_sku_quote(sku_id, custom_dimensions: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    按SKU ID报价，SKU不存在时返回None
+
+    结果按 (SKU, 定价表版本戳, 日期, 归一化尺寸) 短时缓存，
+    命中时返回的 calculation_time 为首次计算的时间。
+    """
+    entry = get_sku_pricing_entry(sku_id)
+    if entry is None:
+        return None
+    stamp, table = entry
+    day = timezone.now().date()
+
+    if quote_cache_timeout() <= 0:
+        return quote_sku(table, custom_dimensions, sku_id=sku_id, day=day)
+
+    key = quote_cache_key(table, stamp, day, custom_dimensions)
+    cached = get_cached_quote(key)
+    if cached is not None:
+        result = dict(cached)
+        result['sku_id'] = sku_id
+        return result
+
+    result = quote_sku(table, custom_dimensions, sku_id=sku_id, day=day)
+    set_cached_quote(key, result)
+    return result
+
+
+def calculate_batch_quotes(items: Iterable[Tuple[Any, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    批量报价：一次性加载所有SKU的定价表，逐项计算并汇总
+
+    Args:
+        items: (sku_id, custom_dimensions) 列表，同一SKU可出现多次
+    """
+    items = list(items)
+    tables = get_sku_pricing_tables(int(sku_id) for sku_id, _ in items)
+    day = timezone.now().date()
+
+    results = []
+    total_base = Decimal('0')
+    total_increment = Decimal('0')
+    error_count = 0
+    for index, (sku_id, custom_dimensions) in enumerate(items):
+        table = tables.get(int(sku_id))
+        if table is None:
+            error_count += 1
+            results.append({'index': index, 'sku_id': sku_id, 'error': 'SKU不存在'})
+            continue
+
+        applicable_rules, increment, pricing_details = _evaluate(table, custom_dimensions, day)
+        quote = _build_quote(table, sku_id, applicable_rules, increment, pricing_details)
+        quote['index'] = index
+        results.append(quote)
+        total_base += table.base_price
+        total_increment += increment
+
+    return {
+        'items': results,
+        'summary': {
+            'item_count': len(items),
+            'priced_count': len(items) - error_count,
+            'error_count': error_count,
+            'total_base_price': float(total_base),
+            'total_increment': float(total_increment),
+            'total_price': float(total_base + total_increment),
+            'calculation_time': timezone.now().isoformat(),
+        }
+    }
@@ -0,0 +1,90 @@
+"""
+定价定点整数运算
+价格和尺寸字段均为两位小数，统一换算为以0.01为单位的整数（金额即“分”）；
+加价结果以0.000001元为单位的整数表示，四种计算方式都能精确表示，
+结果与 calculate_rule_increment 的Decimal运算逐位一致，但不需要Decimal运算
+"""
+
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+# 加价金额单位：1元 = 1_000_000
+MICROS_PER_YUAN = 1_000_000
+# 0.01元 换算为加价单位
+MICROS_PER_HUNDREDTH = MICROS_PER_YUAN // 100
+
+# float直接换算的数值上限，超出时走Decimal解析
+FLOAT_FAST_PATH_LIMIT = 1e12
+
+
+def to_hundredths(value) -> Optional[int]:
+    """
+    转换为以0.01为单位的整数，无法精确表示（超过两位小数或非数值）时返回None
+
+    调用方在返回None时应退回Decimal运算，以保持结果完全一致。
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value * 100
+    if isinstance(value, float) and abs(value) < FLOAT_FAST_PATH_LIMIT:
+        # 该范围内两位小数的十进制值与double一一对应：v等于 round(v*100)/100 的最近double时，
+        # repr(v) 即为该两位小数，与 Decimal(str(v)) 的结果相同
+        scaled = round(value * 100)
+        return scaled if scaled / 100 == value else None
+    try:
+        scaled = Decimal(str(value)) * 100
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+    if not scaled.is_finite() or scaled != scaled.to_integral_value():
+        return None
+    return int(scaled)
+
+
+def hundredths_to_float(value: int) -> float:
+    """0.01单位整数转float（与float(Decimal)同样是精确值的最近舍入）"""
+    return value / 100
+
+
+def micros_to_float(value: int) -> float:
+    """加价单位整数转float"""
+    return value / MICROS_PER_YUAN
+
+
+def micros_to_decimal(value: int) -> Decimal:
+    return Decimal(value) / MICROS_PER_YUAN
+
+
+def rule_increment_micros(calculation_method: str, excess_h: int, price_h: int, unit_h: int,
+                          multiplier_h: int, max_micros: Optional[int]) -> int:
+    """
+    整数版 calculate_rule_increment
+
+    Args:
+        excess_h: 超出值（0.01单位）
+        price_h / unit_h / multiplier_h: 价格增量、单位增量、倍数（0.01单位）
+        max_micros: 最大加价（加价单位），None或0表示不限制
+
+    Returns:
+        加价金额（加价单位）
+    """
+    if excess_h <= 0:
+        return 0
+
+    if calculation_method == 'fixed':
+        increment = price_h * MICROS_PER_HUNDREDTH
+    elif calculation_method == 'percentage':
+        # (excess/100) * (price/100) / 100 元 = excess_h * price_h 微元
+        increment = excess_h * price_h
+    elif calculation_method == 'multiplier':
+        # (excess/100) * (multiplier/100) * (price/100) 元 = excess_h * multiplier_h * price_h 微元
+        increment = excess_h * multiplier_h * price_h
+    elif calculation_method == 'step':
+        # 整数上取整，避免Decimal除法再取整
+        steps = -(-excess_h // unit_h)
+        increment = steps * price_h * MICROS_PER_HUNDREDTH
+    else:
+        increment = 0
+
+    if max_micros:
+        increment = min(increment, max_micros)
+
+    return increment
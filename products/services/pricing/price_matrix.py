@@ -0,0 +1,244 @@
+"""
+SPU价格矩阵
+在高度×宽度×深度网格上向量化计算SPU下所有SKU的价格，
+语义与 ProductsPricingRule.calculate_increment 及报价引擎的规则优先级一致；
+加价用与报价引擎相同的定点整数（微元）运算，每个单元格与 calculate_sku_quote 的结果逐位一致
+"""
+
+import csv
+import io
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from django.utils import timezone
+
+from products.models import SKU
+from .fixed_point import MICROS_PER_HUNDREDTH, MICROS_PER_YUAN, to_hundredths
+from .rule_table import CompiledRule, SkuPricingTable, get_sku_pricing_tables
+
+logger = logging.getLogger(__name__)
+
+MATRIX_AXES = ('height', 'width', 'depth')
+
+# 单个尺寸轴的最大取值个数，防止范围写错时生成超大网格
+MAX_AXIS_POINTS = 10000
+
+# 超过该值时改用Python整数（object数组）计算，避免int64溢出
+INT64_SAFE_LIMIT = 2 ** 62
+
+MATRIX_COLUMNS = ('sku_id', 'sku_code', 'sku_name') + MATRIX_AXES + ('base_price', 'total_increment', 'total_price')
+
+
+def _axis_value(text) -> Decimal:
+    """解析单个尺寸取值，须为最多两位小数的有限数值（与报价引擎的定点运算口径一致）"""
+    try:
+        value = Decimal(str(text).strip())
+    except (InvalidOperation, ValueError, TypeError):
+        raise ValueError(f'尺寸取值不是有效数字: {text}')
+    if to_hundredths(value) is None:
+        raise ValueError(f'尺寸取值须为有限数值且最多两位小数: {text}')
+    return value
+
+
+def _check_points(count: int, spec):
+    if count > MAX_AXIS_POINTS:
+        raise ValueError(f'尺寸轴取值超过{MAX_AXIS_POINTS}个: {spec}')
+
+
+def parse_axis(spec) -> List[Decimal]:
+    """
+    解析尺寸轴：'2200:2800:50' 表示含端点的等差序列，'2335,2400,2600' 表示列表
+
+    Raises:
+        ValueError: 格式错误、取值不是数字或超过两位小数、步长不为正、取值超过 MAX_AXIS_POINTS 个
+    """
+    if isinstance(spec, (list, tuple)):
+        _check_points(len(spec), f'{len(spec)}个取值')
+        return [_axis_value(value) for value in spec]
+
+    spec = str(spec).strip()
+    if ':' in spec:
+        parts = [_axis_value(part) for part in spec.split(':')]
+        if len(parts) != 3 or parts[2] <= 0:
+            raise ValueError(f'尺寸范围格式应为 起始:结束:步长，且步长为正: {spec}')
+        start, stop, step = parts
+        if stop >= start:
+            _check_points(int((stop - start) / step) + 1, spec)
+        values = []
+        value = start
+        while value <= stop:
+            values.append(value)
+            value += step
+        return values
+
+    parts = [part for part in spec.split(',') if part.strip()]
+    _check_points(len(parts), spec)
+    return [_axis_value(part) for part in parts]
+
+
+def rule_increments(rule: CompiledRule, excess_h: np.ndarray) -> np.ndarray:
+    """
+    向量化的 fixed_point.rule_increment_micros
+
+    Args:
+        excess_h: 超出值（0.01单位的整数数组）
+
+    Returns:
+        加价（微元整数数组），未超出阈值处为0
+    """
+    method = rule.calculation_method
+    if method == 'fixed':
+        factor = rule.price_h * MICROS_PER_HUNDREDTH
+    elif method == 'percentage':
+        factor = rule.price_h
+    elif method == 'multiplier':
+        factor = rule.multiplier_h * rule.price_h
+    elif method == 'step':
+        factor = rule.price_h * MICROS_PER_HUNDREDTH
+    else:
+        return np.zeros(excess_h.shape, dtype=excess_h.dtype)
+
+    bound = int(np.abs(excess_h).max(initial=0)) + 1
+    if excess_h.dtype != object and bound * abs(factor) >= INT64_SAFE_LIMIT:
+        excess_h = excess_h.astype(object)
+
+    if method == 'fixed':
+        increment = np.full(excess_h.shape, factor, dtype=excess_h.dtype)
+    elif method == 'step':
+        increment = -(-excess_h // rule.unit_h) * factor
+    else:
+        increment = excess_h * factor
+
+    if rule.max_micros:
+        increment = np.minimum(increment, rule.max_micros)
+
+    return np.where(excess_h > 0, increment, 0)
+
+
+def table_increments(table: SkuPricingTable, grid: Dict[str, np.ndarray], day) -> np.ndarray:
+    """
+    计算单个SKU在整个网格上的加价合计（微元整数）
+
+    每种规则类型只取优先级最高的一条生效规则（超过阈值且加价大于0），
+    与报价引擎逐条跳过已使用规则类型的逻辑一致。
+    """
+    shape = next(iter(grid.values())).shape
+    total = np.zeros(shape, dtype=np.int64)
+    unresolved: Dict[str, np.ndarray] = {}
+
+    for rule in table.active_rules(day):
+        values = grid.get(rule.rule_type)
+        if values is None or rule.rule_type not in table.dimensions:
+            continue
+
+        pending = unresolved.get(rule.rule_type)
+        if pending is None:
+            pending = np.ones(shape, dtype=bool)
+        elif not pending.any():
+            continue
+
+        excess_h = values - rule.threshold_h
+        increment = rule_increments(rule, excess_h)
+        applied = pending & (excess_h > 0) & (increment > 0)
+        total = total + np.where(applied, increment, 0)
+        unresolved[rule.rule_type] = pending & ~applied
+
+    return total
+
+
+def build_price_matrix(spu_id: int, axes: Dict[str, Sequence], sku_ids: Optional[Sequence[int]] = None,
+                       day=None, max_cells: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    生成SPU的价格矩阵
+
+    Args:
+        spu_id: SPU ID
+        axes: 尺寸轴，如 {'height': [...], 'width': [...]}，未提供的尺寸不参与计价
+        sku_ids: 可选，只计算指定SKU
+        day: 判断规则有效期的日期，默认今天
+        max_cells: 可选，SKU数×组合数上限
+
+    Returns:
+        按列组织的结果，键为 MATRIX_COLUMNS（未提供的尺寸列为NaN）
+    """
+    day = day or timezone.now().date()
+    axis_values = {name: parse_axis(axes[name]) for name in MATRIX_AXES if axes.get(name) not in (None, '', [])}
+    if not axis_values:
+        raise ValueError('至少需要提供一个尺寸轴（height/width/depth）')
+
+    queryset = SKU.objects.filter(spu_id=spu_id)
+    if sku_ids:
+        queryset = queryset.filter(id__in=sku_ids)
+    tables = get_sku_pricing_tables(queryset.order_by('id').values_list('id', flat=True))
+    tables = [tables[sku_id] for sku_id in sorted(tables)]
+
+    names = list(axis_values)
+    meshes = np.meshgrid(*[np.array([to_hundredths(v) for v in axis_values[name]], dtype=np.int64)
+                           for name in names], indexing='ij')
+    grid = {name: mesh.ravel() for name, mesh in zip(names, meshes)}
+    combos = len(next(iter(grid.values())))
+
+    if max_cells and combos * len(tables) > max_cells:
+        raise ValueError(f'价格矩阵规模 {combos * len(tables)} 超过上限 {max_cells}')
+
+    columns: Dict[str, List[np.ndarray]] = {column: [] for column in MATRIX_COLUMNS}
+    for table in tables:
+        # 报价引擎为 float(base_price + Decimal(微元)/10**6)，整数和再做一次正确舍入的除法结果相同
+        increments = table_increments(table, grid, day)
+        base_micros = to_hundredths(table.base_price) * MICROS_PER_HUNDREDTH
+        base_price = float(table.base_price)
+        columns['sku_id'].append(np.full(combos, table.sku_id, dtype=np.int64))
+        columns['sku_code'].append(np.full(combos, table.sku_code, dtype=object))
+        columns['sku_name'].append(np.full(combos, table.sku_name, dtype=object))
+        for name in MATRIX_AXES:
+            columns[name].append(grid[name] / 100.0 if name in grid else np.full(combos, np.nan))
+        columns['base_price'].append(np.full(combos, base_price))
+        columns['total_increment'].append((increments / MICROS_PER_YUAN).astype(float))
+        columns['total_price'].append(((increments + base_micros) / MICROS_PER_YUAN).astype(float))
+
+    return {
+        column: np.concatenate(parts) if parts else np.array([])
+        for column, parts in columns.items()
+    }
+
+
+def matrix_rows(matrix: Dict[str, np.ndarray]) -> List[Dict[str, object]]:
+    """转为逐行字典（JSON输出用，未提供的尺寸为None）"""
+    rows = []
+    columns = [(name, matrix[name].tolist()) for name in MATRIX_COLUMNS]
+    for index in range(len(matrix['sku_id'])):
+        row = {}
+        for name, values in columns:
+            value = values[index]
+            row[name] = None if isinstance(value, float) and np.isnan(value) else value
+        rows.append(row)
+    return rows
+
+
+def write_matrix_csv(matrix: Dict[str, np.ndarray], stream: io.TextIOBase):
+    """写出CSV"""
+    writer = csv.writer(stream)
+    writer.writerow(MATRIX_COLUMNS)
+    writer.writerows([row[name] for name in MATRIX_COLUMNS] for row in matrix_rows(matrix))
+
+
+def write_matrix_parquet(matrix: Dict[str, np.ndarray], target):
+    """
+    写出Parquet（需要安装pyarrow）
+
+    Raises:
+        ImportError: 未安装pyarrow
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrays = {}
+    for name in MATRIX_COLUMNS:
+        values = matrix[name]
+        if values.dtype == object:
+            arrays[name] = pa.array(values.tolist(), type=pa.string())
+        else:
+            arrays[name] = pa.array(values, from_pandas=True)
+    pq.write_table(pa.table(arrays), target)
@@ -0,0 +1,68 @@
+"""
+报价结果缓存
+按 SKU、归一化后的定制尺寸、定价表版本戳和报价日期缓存报价结果（短TTL）；
+规则、尺寸或SKU变更后版本戳随之变化，旧结果不会再被命中
+"""
+
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from django.conf import settings
+
+from products.utils.lru_cache import BoundedLRUCache
+from .fixed_point import to_hundredths
+from .rule_table import SkuPricingTable
+
+
+def _pricing_config() -> dict:
+    return getattr(settings, 'PRICING_CONFIG', {})
+
+
+_quote_cache = BoundedLRUCache(_pricing_config().get('quote_cache_size', 10000))
+
+
+def quote_cache_timeout() -> float:
+    return _pricing_config().get('quote_cache_timeout', 30)
+
+
+def normalize_dimensions(table: SkuPricingTable, custom_dimensions: Dict[str, Any]) -> Tuple:
+    """
+    归一化定制尺寸：只保留SKU有标准尺寸的维度，数值统一为0.01单位整数
+
+    2400、2400.0 和 '2400' 得到相同的键；无法精确换算的值按原文本参与比较。
+    """
+    parts = []
+    for dimension_type in sorted(table.dimensions):
+        value = custom_dimensions.get(dimension_type)
+        if value is None:
+            continue
+        hundredths = to_hundredths(value)
+        parts.append((dimension_type, hundredths if hundredths is not None else ('raw', str(value))))
+    return tuple(parts)
+
+
+def quote_cache_key(table: SkuPricingTable, stamp: Tuple[int, ...], day,
+                    custom_dimensions: Dict[str, Any]) -> Hashable:
+    return (table.sku_id, stamp, day, normalize_dimensions(table, custom_dimensions))
+
+
+def get_cached_quote(key: Hashable) -> Optional[Dict[str, Any]]:
+    entry = _quote_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, result = entry
+    if expires_at < time.monotonic():
+        return None
+    return result
+
+
+def set_cached_quote(key: Hashable, result: Dict[str, Any]):
+    _quote_cache.set(key, (time.monotonic() + quote_cache_timeout(), result))
+
+
+def clear_quote_cache():
+    _quote_cache.clear()
+
+
+def get_quote_cache_stats() -> Dict[str, Any]:
+    return _quote_cache.get_stats()
@@ -0,0 +1,382 @@
+"""
+SKU定价规则表编译与缓存
+把SKU的基础价格、标准尺寸和加价规则编译成纯元组结构，
+按版本号缓存在Redis和进程内，报价时无需查询数据库
+"""
+
+import logging
+import random
+from bisect import bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from products.models import SKU, ProductsDimension, ProductsPricingRule
+from products.utils.cache_versions import bump_version, get_versions
+from products.utils.lru_cache import BoundedLRUCache
+from .fixed_point import MICROS_PER_HUNDREDTH, to_hundredths
+
+logger = logging.getLogger(__name__)
+
+RULE_TYPE_DISPLAY = dict(ProductsPricingRule.RULE_TYPE_CHOICES)
+CALCULATION_METHOD_DISPLAY = dict(ProductsPricingRule.CALCULATION_METHOD_CHOICES)
+
+
+class CompiledRule(NamedTuple):
+    """编译后的加价规则"""
+    rule_id: int
+    name: str
+    rule_type: str
+    is_sku_rule: bool
+    threshold_value: Decimal
+    unit_increment: Decimal
+    calculation_method: str
+    price_increment: Decimal
+    multiplier: Decimal
+    max_increment: Optional[Decimal]
+    effective_date: object
+    expiry_date: object
+    # 定点整数形式（0.01单位，最大加价为微元），供整数运算快速路径使用
+    threshold_h: int = 0
+    unit_h: int = 0
+    price_h: int = 0
+    multiplier_h: int = 0
+    max_micros: Optional[int] = None
+
+    @property
+    def rule_scope(self) -> str:
+        return "SKU专属" if self.is_sku_rule else "SPU通用"
+
+    @property
+    def priority(self) -> int:
+        return 10 if self.is_sku_rule else 5
+
+    def is_effective(self, day) -> bool:
+        """规则在指定日期是否有效（与get_applicable_rules的日期条件一致）"""
+        return self.effective_date <= day and (self.expiry_date is None or self.expiry_date > day)
+
+
+class RuleWindow(NamedTuple):
+    """有效期窗口：[valid_from, valid_until) 内生效的规则集合不变，None表示无界"""
+    valid_from: Optional[date]
+    valid_until: Optional[date]
+    rules: Tuple[CompiledRule, ...]
+
+
+class SkuPricingTable(NamedTuple):
+    """SKU定价表：规则已按 SKU专属 > SPU通用、规则类型、阈值 排好序"""
+    sku_id: int
+    sku_name: str
+    sku_code: str
+    spu_id: Optional[int]
+    spu_name: Optional[str]
+    base_price: Decimal
+    dimensions: Dict[str, Tuple[Decimal, str]]
+    rules: Tuple[CompiledRule, ...]
+    windows: Tuple[RuleWindow, ...] = ()
+    window_starts: Tuple[date, ...] = ()
+
+    def rule_window(self, day) -> RuleWindow:
+        """查找日期所在的有效期窗口（窗口数很少，二分查找近似常数时间）"""
+        if not self.windows:
+            return RuleWindow(None, None, tuple(rule for rule in self.rules if rule.is_effective(day)))
+        return self.windows[bisect_right(self.window_starts, day)]
+
+    def active_rules(self, day) -> Tuple[CompiledRule, ...]:
+        return self.rule_window(day).rules
+
+
+def build_rule_windows(rules: Tuple[CompiledRule, ...]) -> Tuple[RuleWindow, ...]:
+    """
+    按生效/失效日期把时间轴切分为若干窗口，预先算出每个窗口内的有效规则
+
+    窗口随定价表一起缓存，未来生效的规则到期自动切换，
+    零点时无需重建定价表或集中失效缓存。
+    """
+    boundaries = sorted(
+        {rule.effective_date for rule in rules}
+        | {rule.expiry_date for rule in rules if rule.expiry_date is not None}
+    )
+    if not boundaries:
+        return (RuleWindow(None, None, rules),)
+
+    # 第一个窗口用边界前一天代表，其余窗口用窗口起始日代表
+    starts = [None] + boundaries
+    ends = boundaries + [None]
+    windows: List[RuleWindow] = []
+    for start, end in zip(starts, ends):
+        day = start if start is not None else boundaries[0] - timedelta(days=1)
+        active = tuple(rule for rule in rules if rule.is_effective(day))
+        if windows and windows[-1].rules == active:
+            windows[-1] = RuleWindow(windows[-1].valid_from, end, active)
+        else:
+            windows.append(RuleWindow(start, end, active))
+    return tuple(windows)
+
+
+def _pricing_config() -> dict:
+    return getattr(settings, 'PRICING_CONFIG', {})
+
+
+def sku_version_name(sku_id: int) -> str:
+    return f'pricing_sku:{sku_id}'
+
+
+def spu_version_name(spu_id: int) -> str:
+    return f'pricing_spu:{spu_id}'
+
+
+# 定价表结构变化时递增，避免读到旧结构的缓存
+TABLE_FORMAT = 3
+
+
+def _table_cache_key(sku_id: int) -> str:
+    return f'pricing:sku_table:v{TABLE_FORMAT}:{sku_id}'
+
+
+def _table_cache_timeout() -> int:
+    # 过期时间加入随机抖动，避免大量定价表同时过期后集中重建
+    timeout = _pricing_config().get('rule_table_cache_timeout', 3600)
+    return int(timeout * random.uniform(0.9, 1.1))
+
+
+def _rule_sort_key(rule: CompiledRule):
+    return (0 if rule.is_sku_rule else 1, rule.rule_type, rule.threshold_value)
+
+
+def build_pricing_tables(sku_ids: Iterable[int]) -> Dict[int, SkuPricingTable]:
+    """批量编译定价表（SKU、规则、尺寸各一次查询），不存在的SKU不出现在结果中"""
+    sku_rows = list(
+        SKU.objects.filter(id__in=set(sku_ids))
+        .values('id', 'name', 'code', 'price', 'spu_id', 'spu__name')
+    )
+    if not sku_rows:
+        return {}
+
+    found_ids = [row['id'] for row in sku_rows]
+    spu_ids = {row['spu_id'] for row in sku_rows if row['spu_id']}
+
+    spu_rules: Dict[int, List[CompiledRule]] = {}
+    sku_rules: Dict[int, List[CompiledRule]] = {}
+    rule_rows = ProductsPricingRule.objects.filter(
+        Q(spu_id__in=spu_ids) & (Q(sku__isnull=True) | Q(sku_id__in=found_ids)),
+        is_active=True,
+    ).values(
+        'id', 'name', 'spu_id', 'sku_id', 'rule_type', 'threshold_value', 'unit_increment',
+        'calculation_method', 'price_increment', 'multiplier', 'max_increment',
+        'effective_date', 'expiry_date'
+    )
+    for row in rule_rows:
+        rule = CompiledRule(
+            row['id'], row['name'], row['rule_type'], row['sku_id'] is not None,
+            row['threshold_value'], row['unit_increment'], row['calculation_method'],
+            row['price_increment'], row['multiplier'], row['max_increment'],
+            row['effective_date'], row['expiry_date'],
+            to_hundredths(row['threshold_value']), to_hundredths(row['unit_increment']),
+            to_hundredths(row['price_increment']), to_hundredths(row['multiplier']),
+            to_hundredths(row['max_increment']) * MICROS_PER_HUNDREDTH if row['max_increment'] else None,
+        )
+        if row['sku_id'] is None:
+            spu_rules.setdefault(row['spu_id'], []).append(rule)
+        else:
+            sku_rules.setdefault(row['sku_id'], []).append(rule)
+
+    dimensions: Dict[int, Dict[str, Tuple[Decimal, str]]] = {}
+    for row in ProductsDimension.objects.filter(sku_id__in=found_ids).values(
+            'sku_id', 'dimension_type', 'standard_value', 'unit'):
+        dimensions.setdefault(row['sku_id'], {})[row['dimension_type']] = (row['standard_value'], row['unit'])
+
+    tables = {}
+    for row in sku_rows:
+        rules = tuple(sorted(sku_rules.get(row['id'], []) + spu_rules.get(row['spu_id'], []), key=_rule_sort_key))
+        windows = build_rule_windows(rules)
+        tables[row['id']] = SkuPricingTable(
+            sku_id=row['id'],
+            sku_name=row['name'],
+            sku_code=row['code'],
+            spu_id=row['spu_id'],
+            spu_name=row['spu__name'],
+            base_price=row['price'],
+            dimensions=dimensions.get(row['id'], {}),
+            rules=rules,
+            windows=windows,
+            window_starts=tuple(window.valid_from for window in windows[1:]),
+        )
+    return tables
+
+
+_local_tables = BoundedLRUCache(_pricing_config().get('local_table_cache_size', 4096))
+
+
+def _stamp_names(sku_id: int, spu_id: Optional[int]) -> List[str]:
+    names = [sku_version_name(sku_id)]
+    if spu_id:
+        names.append(spu_version_name(spu_id))
+    return names
+
+
+def _stamp(versions: Dict[str, int], sku_id: int, spu_id: Optional[int]) -> Tuple[int, ...]:
+    return tuple(versions[name] for name in _stamp_names(sku_id, spu_id))
+
+
+def get_sku_pricing_entry(sku_id: int) -> Optional[Tuple[Tuple[int, ...], SkuPricingTable]]:
+    """
+    获取SKU定价表及其版本戳 (stamp, table)，SKU不存在时返回None
+
+    进程内和Redis中的定价表都带有 (SKU版本, SPU版本) 戳，
+    与当前版本号一致时直接使用；规则、尺寸或SKU变更后由信号递增版本号。
+    """
+    sku_id = int(sku_id)
+
+    entry = _local_tables.get(sku_id)
+    if entry is not None:
+        stamp, table = entry
+        versions = get_versions(_stamp_names(sku_id, table.spu_id))
+        if stamp == _stamp(versions, sku_id, table.spu_id):
+            return entry
+
+    try:
+        entry = cache.get(_table_cache_key(sku_id))
+    except Exception as e:
+        logger.warning(f"读取定价表缓存失败 {sku_id}: {e}")
+        entry = None
+    if entry is not None:
+        stamp, table = entry
+        versions = get_versions(_stamp_names(sku_id, table.spu_id))
+        if stamp == _stamp(versions, sku_id, table.spu_id):
+            _local_tables.set(sku_id, entry)
+            return entry
+
+    # 先读取版本号再编译：编译期间发生的变更会让本次结果在下次读取时失效
+    spu_id = SKU.objects.filter(id=sku_id).values_list('spu_id', flat=True).first()
+    if spu_id is None:
+        return None
+    versions = get_versions(_stamp_names(sku_id, spu_id))
+    table = build_pricing_tables([sku_id]).get(sku_id)
+    if table is None:
+        return None
+
+    entry = (_stamp(versions, sku_id, spu_id), table)
+    _local_tables.set(sku_id, entry)
+    try:
+        cache.set(_table_cache_key(sku_id), entry, _table_cache_timeout())
+    except Exception as e:
+        logger.warning(f"写入定价表缓存失败 {sku_id}: {e}")
+    return entry
+
+
+def get_sku_pricing_table(sku_id: int) -> Optional[SkuPricingTable]:
+    """获取SKU定价表，SKU不存在时返回None"""
+    entry = get_sku_pricing_entry(sku_id)
+    return entry[1] if entry is not None else None
+
+
+def get_sku_pricing_tables(sku_ids: Iterable[int]) -> Dict[int, SkuPricingTable]:
+    """
+    批量获取定价表，不存在的SKU不出现在结果中
+
+    版本号、Redis缓存各一次批量读取，未命中的SKU用集合查询一次性编译。
+    """
+    sku_ids = {int(sku_id) for sku_id in sku_ids}
+    entries = {}
+    for sku_id in sku_ids:
+        entry = _local_tables.get(sku_id)
+        if entry is not None:
+            entries[sku_id] = entry
+
+    missing = sku_ids - set(entries)
+    if missing:
+        keys = {_table_cache_key(sku_id): sku_id for sku_id in missing}
+        try:
+            cached = cache.get_many(list(keys))
+        except Exception as e:
+            logger.warning(f"批量读取定价表缓存失败: {e}")
+            cached = {}
+        for key, entry in cached.items():
+            entries[keys[key]] = entry
+
+    names = set()
+    for sku_id, (stamp, table) in entries.items():
+        names.update(_stamp_names(sku_id, table.spu_id))
+    versions = get_versions(names) if names else {}
+
+    tables = {}
+    for sku_id, entry in entries.items():
+        stamp, table = entry
+        if stamp == _stamp(versions, sku_id, table.spu_id):
+            tables[sku_id] = table
+            _local_tables.set(sku_id, entry)
+
+    stale = sku_ids - set(tables)
+    if not stale:
+        return tables
+
+    # 与单个获取一致：先读版本号再编译
+    spu_ids = dict(SKU.objects.filter(id__in=stale).values_list('id', 'spu_id'))
+    names = set()
+    for sku_id, spu_id in spu_ids.items():
+        names.update(_stamp_names(sku_id, spu_id))
+    versions = get_versions(names) if names else {}
+    built = build_pricing_tables(spu_ids)
+
+    new_entries = {}
+    for sku_id, table in built.items():
+        entry = (_stamp(versions, sku_id, spu_ids[sku_id]), table)
+        _local_tables.set(sku_id, entry)
+        new_entries[_table_cache_key(sku_id)] = entry
+        tables[sku_id] = table
+    try:
+        cache.set_many(new_entries, _table_cache_timeout())
+    except Exception as e:
+        logger.warning(f"批量写入定价表缓存失败: {e}")
+    return tables
+
+
+def get_rule_applicability(table: SkuPricingTable, day) -> Dict[str, object]:
+    """
+    适用规则索引：指定日期各规则类型按优先级排列的候选规则及其有效期窗口
+
+    每种规则类型中排在最前且被定制尺寸超出阈值的规则生效。
+    """
+    window = table.rule_window(day)
+    rule_types: Dict[str, List[Dict[str, object]]] = {}
+    for rule in window.rules:
+        rule_types.setdefault(rule.rule_type, []).append({
+            'rule_id': rule.rule_id,
+            'rule_name': rule.name,
+            'rule_scope': rule.rule_scope,
+            'priority': rule.priority,
+            'threshold_value': float(rule.threshold_value),
+            'calculation_method': rule.calculation_method,
+        })
+    return {
+        'sku_id': table.sku_id,
+        'date': day.isoformat(),
+        'valid_from': window.valid_from.isoformat() if window.valid_from else None,
+        'valid_until': window.valid_until.isoformat() if window.valid_until else None,
+        'window_count': len(table.windows),
+        'rule_types': rule_types,
+    }
+
+
+def warm_pricing_tables(sku_ids: Iterable[int], chunk_size: int = 500) -> int:
+    """分批预热定价表（进程内和Redis），返回预热的SKU数"""
+    sku_ids = list(sku_ids)
+    warmed = 0
+    for offset in range(0, len(sku_ids), chunk_size):
+        warmed += len(get_sku_pricing_tables(sku_ids[offset:offset + chunk_size]))
+    return warmed
+
+
+def invalidate_sku_pricing(sku_id: int):
+    """SKU或其尺寸变更后使该SKU的定价表失效"""
+    bump_version(sku_version_name(sku_id))
+
+
+def invalidate_spu_pricing(spu_id: int):
+    """SPU或其加价规则变更后使该SPU下所有SKU的定价表失效"""
+    bump_version(spu_version_name(spu_id))
@@ -0,0 +1,96 @@
+"""
+定价计算器SKU选择器
+有加价规则的SPU ID集合按版本号缓存，SKU搜索在数据库端过滤并限制条数，
+每次按键只执行一次带LIMIT的查询
+"""
+
+import logging
+from typing import FrozenSet, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q, QuerySet
+
+from products.models import SKU, SPU, ProductsPricingRule
+from products.utils.cache_versions import bump_version, get_version
+
+logger = logging.getLogger(__name__)
+
+PRICED_SPU_VERSION = 'pricing_priced_spus'
+
+# SPU集合超过该数量时改用EXISTS子查询，避免过长的IN列表
+PICKER_IN_LIST_LIMIT = 2000
+
+PICKER_FIELDS = ('id', 'name', 'code', 'price', 'brand__name', 'spu__name')
+
+_local_priced_spu_ids: Tuple[Optional[int], FrozenSet[int]] = (None, frozenset())
+
+
+def _active_rules_exist():
+    return Exists(ProductsPricingRule.objects.filter(spu=OuterRef('spu'), is_active=True))
+
+
+def get_priced_spu_ids() -> FrozenSet[int]:
+    """有启用加价规则的SPU ID集合（进程内和Redis两级缓存，规则变更时版本号失效）"""
+    global _local_priced_spu_ids
+    version = get_version(PRICED_SPU_VERSION)
+    local_version, spu_ids = _local_priced_spu_ids
+    if local_version == version:
+        return spu_ids
+
+    key = f'pricing:priced_spu_ids:{version}'
+    try:
+        cached = cache.get(key)
+    except Exception as e:
+        logger.warning(f"读取定价SPU集合缓存失败: {e}")
+        cached = None
+
+    if cached is None:
+        spu_ids = frozenset(
+            SPU.objects.filter(
+                Exists(ProductsPricingRule.objects.filter(spu=OuterRef('pk'), is_active=True))
+            ).values_list('id', flat=True)
+        )
+        try:
+            cache.set(key, spu_ids, None)
+        except Exception as e:
+            logger.warning(f"写入定价SPU集合缓存失败: {e}")
+    else:
+        spu_ids = frozenset(cached)
+
+    _local_priced_spu_ids = (version, spu_ids)
+    return spu_ids
+
+
+def invalidate_priced_spu_ids():
+    """加价规则新增、删除或启停后使SPU集合失效"""
+    bump_version(PRICED_SPU_VERSION)
+
+
+def priced_sku_queryset() -> QuerySet:
+    """启用且所属SPU有启用加价规则的SKU，按名称排序"""
+    skus = SKU.objects.filter(status='active')
+    spu_ids = get_priced_spu_ids()
+    if len(spu_ids) <= PICKER_IN_LIST_LIMIT:
+        skus = skus.filter(spu_id__in=spu_ids)
+    else:
+        skus = skus.filter(_active_rules_exist())
+    return skus.order_by('name', 'id')
+
+
+def search_priced_skus(search_term: str = '', limit: int = 20) -> list:
+    """
+    按名称、编码、品牌或SPU名称搜索可报价SKU
+
+    Returns:
+        最多limit条字典，键为 PICKER_FIELDS
+    """
+    skus = priced_sku_queryset()
+    search_term = (search_term or '').strip()
+    if search_term:
+        skus = skus.filter(
+            Q(name__icontains=search_term)
+            | Q(code__icontains=search_term)
+            | Q(brand__name__icontains=search_term)
+            | Q(spu__name__icontains=search_term)
+        )
+    return list(skus.values(*PICKER_FIELDS)[:limit])
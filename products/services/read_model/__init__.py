@@ -0,0 +1,19 @@
+"""
+产品读模型服务模块
+每个上架SKU一行反规范化数据（展示字段、分类路径、品牌、主图、JSONB属性和检索向量），
+由信号登记变更、事务提交后增量刷新，产品列表可直接单表读取
+"""
+
+from .builder import read_model_config, rebuild_read_models, refresh_read_models
+from .changes import enqueue_read_model_refresh, flush_read_model_changes
+from .query import filter_read_models, search_read_models
+
+__all__ = [
+    'read_model_config',
+    'rebuild_read_models',
+    'refresh_read_models',
+    'enqueue_read_model_refresh',
+    'flush_read_model_changes',
+    'filter_read_models',
+    'search_read_models',
+]
@@ -0,0 +1,146 @@
+"""
+产品读模型构建
+按SKU批量读取SKU、SPU、品牌、分类、图片和属性值，整理成 products_read_model 的行后一次写入
+"""
+
+import logging
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from products.services.search.index import DOCUMENT_FIELDS, is_full_text_available, vector_params, vector_sql
+from products.utils.category_tree import get_category_path, get_category_tree_index
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUS = 'active'
+
+SOURCE_FIELDS = tuple(dict.fromkeys(DOCUMENT_FIELDS + (
+    'brand_id', 'spu_id', 'spu__category_id', 'spu__category__name',
+    'price', 'cost_price', 'stock_quantity', 'status', 'is_featured', 'main_image', 'created_at',
+)))
+
+UPDATE_FIELDS = [
+    'name', 'code', 'brand_id', 'brand_name', 'spu_id', 'spu_name', 'category_id', 'category_name',
+    'category_path', 'price', 'cost_price', 'stock_quantity', 'status', 'is_featured', 'tags',
+    'primary_image', 'attributes', 'created_at', 'updated_at',
+]
+
+
+def read_model_config() -> dict:
+    return getattr(settings, 'READ_MODEL_CONFIG', {})
+
+
+def _primary_images(rows: List[Dict]) -> Dict[int, str]:
+    """SKU主图，没有主图时取第一张启用的产品图片"""
+    from products.models import ProductImage
+
+    images = {row['id']: row['main_image'] for row in rows if row['main_image']}
+    missing = [row['id'] for row in rows if not row['main_image']]
+    if missing:
+        for sku_id, image in (
+            ProductImage.objects.filter(sku_id__in=missing, is_active=True)
+            .order_by('sku_id', 'order', 'id')
+            .values_list('sku_id', 'image')
+        ):
+            images.setdefault(sku_id, image)
+    return images
+
+
+def _attribute_maps(sku_ids: List[int]) -> Dict[int, Dict[str, List[str]]]:
+    """属性编码到属性值列表的映射，取值口径与属性筛选一致（自定义值优先）"""
+    from products.models import SKUAttributeValue
+
+    maps: Dict[int, Dict[str, List[str]]] = {}
+    for sku_id, code, custom_value, value in (
+        SKUAttributeValue.objects.filter(sku_id__in=sku_ids)
+        .order_by('sku_id', 'id')
+        .values_list('sku_id', 'attribute__code', 'custom_value', 'attribute_value__value')
+    ):
+        value = custom_value or value
+        if not value:
+            continue
+        values = maps.setdefault(sku_id, {}).setdefault(code, [])
+        if value not in values:
+            values.append(value)
+    return maps
+
+
+def _write_search_vectors(rows: List[Dict], using: str):
+    sql = f"UPDATE products_read_model SET search_vector = {vector_sql()} WHERE sku_id = %s"
+    with connections[using].cursor() as cursor:
+        cursor.executemany(sql, [vector_params(row) + [row['id']] for row in rows])
+
+
+def refresh_read_models(sku_ids: Iterable[int], using: str = 'default') -> int:
+    """
+    刷新指定SKU的读模型行：上架SKU写入（或覆盖），其余SKU的行删除
+
+    Returns:
+        写入的行数
+    """
+    from products.models import SKU, ProductReadModel
+
+    sku_ids = list(sku_ids)
+    if not sku_ids:
+        return 0
+
+    rows = list(
+        SKU.objects.using(using)
+        .filter(id__in=sku_ids, status=ACTIVE_STATUS)
+        .values(*SOURCE_FIELDS)
+    )
+    images = _primary_images(rows)
+    attributes = _attribute_maps([row['id'] for row in rows])
+    # 分类树快照每批获取一次，分类路径在内存中拼接
+    tree_index = get_category_tree_index()
+    objs = [
+        ProductReadModel(
+            sku_id=row['id'],
+            name=row['name'],
+            code=row['code'],
+            brand_id=row['brand_id'],
+            brand_name=row['brand__name'] or '',
+            spu_id=row['spu_id'],
+            spu_name=row['spu__name'] or '',
+            category_id=row['spu__category_id'],
+            category_name=row['spu__category__name'] or '',
+            category_path=get_category_path(row['spu__category_id'], index=tree_index),
+            price=row['price'],
+            cost_price=row['cost_price'],
+            stock_quantity=row['stock_quantity'],
+            status=row['status'],
+            is_featured=row['is_featured'],
+            tags=row['tags'] or '',
+            primary_image=images.get(row['id'], ''),
+            attributes=attributes.get(row['id'], {}),
+            created_at=row['created_at'],
+        )
+        for row in rows
+    ]
+
+    with transaction.atomic(using=using):
+        ProductReadModel.objects.using(using).filter(sku_id__in=sku_ids).exclude(
+            sku_id__in=[row['id'] for row in rows]
+        ).delete()
+        if objs:
+            ProductReadModel.objects.using(using).bulk_create(
+                objs, update_conflicts=True, unique_fields=['sku'], update_fields=UPDATE_FIELDS
+            )
+            if is_full_text_available(using):
+                _write_search_vectors(rows, using)
+    return len(objs)
+
+
+def rebuild_read_models(chunk_size: int = 500) -> int:
+    """全量重建读模型，返回写入的行数"""
+    from products.models import SKU, ProductReadModel
+
+    ProductReadModel.objects.exclude(sku__status=ACTIVE_STATUS).delete()
+    sku_ids = list(SKU.objects.filter(status=ACTIVE_STATUS).order_by('id').values_list('id', flat=True))
+    written = 0
+    for offset in range(0, len(sku_ids), chunk_size):
+        written += refresh_read_models(sku_ids[offset:offset + chunk_size])
+    logger.info(f"读模型重建完成: {written} 行")
+    return written
@@ -0,0 +1,67 @@
+"""
+读模型变更队列
+信号只登记受影响的SKU ID或筛选条件，事务提交后统一解析并分批刷新，
+同一事务内多次保存同一SKU（或批量保存同一SPU下的SKU）只刷新一次
+"""
+
+import logging
+import operator
+import threading
+from functools import reduce
+from typing import Iterable, Optional
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+
+from .builder import read_model_config, refresh_read_models
+
+logger = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+
+def _state():
+    if not hasattr(_pending, 'sku_ids'):
+        _pending.sku_ids = set()
+        _pending.conditions = []
+    return _pending
+
+
+def enqueue_read_model_refresh(sku_ids: Iterable[int] = (), condition: Optional[Q] = None):
+    """
+    登记需要刷新的SKU，在当前事务提交后刷新
+
+    Args:
+        sku_ids: SKU ID
+        condition: SKU查询条件，如 Q(spu_id=1)，提交后再解析为SKU ID
+    """
+    state = _state()
+    state.sku_ids.update(sku_id for sku_id in sku_ids if sku_id is not None)
+    if condition is not None:
+        state.conditions.append(condition)
+    # 回滚事务登记的SKU会留到下一次提交时刷新，刷新按数据库当前状态重写，结果不受影响
+    transaction.on_commit(flush_read_model_changes)
+
+
+def flush_read_model_changes() -> int:
+    """刷新已登记的SKU，返回写入的行数（同一事务的后续回调读到空队列直接返回）"""
+    from products.models import SKU
+
+    state = _state()
+    sku_ids, conditions = state.sku_ids, state.conditions
+    if not sku_ids and not conditions:
+        return 0
+    state.sku_ids, state.conditions = set(), []
+
+    chunk_size = read_model_config().get('refresh_chunk_size', 500)
+    try:
+        if conditions:
+            sku_ids.update(SKU.objects.filter(reduce(operator.or_, conditions)).values_list('id', flat=True))
+        sku_ids = sorted(sku_ids)
+        return sum(
+            refresh_read_models(sku_ids[offset:offset + chunk_size])
+            for offset in range(0, len(sku_ids), chunk_size)
+        )
+    except DatabaseError as e:
+        logger.error(f"刷新产品读模型失败: {e}")
+        return 0
@@ -0,0 +1,123 @@
+"""
+读模型查询
+产品列表的筛选、检索和排序参数直接作用于 products_read_model 单表，
+参数与基于SKU表的产品列表保持一致
+"""
+
+from decimal import Decimal
+from typing import Optional
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import search_smart_split
+
+from products.services.search.facets import apply_attribute_filters, parse_attribute_filters
+from products.services.search.index import is_full_text_available
+from products.services.search.query import full_text_query
+from products.utils.category_tree import get_descendant_ids
+
+# 查询参数到读模型字段（与 ProductViewSet.filterset_fields 对应）
+EXACT_FILTERS = {
+    'brand': 'brand_id',
+    'spu__category': 'category_id',
+}
+ORDERING_FIELDS = ('name', 'price', 'stock_quantity', 'created_at')
+DEFAULT_ORDERING = ('-created_at',)
+# 退回模糊查询时匹配的字段，与SKU列表的 search.query.ICONTAINS_FIELDS 一致（描述、卖点未冗余，关联SKU表）
+ICONTAINS_FIELDS = (
+    'name', 'code', 'sku__description', 'sku__selling_points', 'tags', 'spu_name', 'brand_name',
+)
+BOOLEAN_VALUES = {'true': True, '1': True, 'false': False, '0': False}
+
+
+def _parse(param: str, value: str, parser):
+    try:
+        return parser(value)
+    except (TypeError, ValueError, KeyError, ArithmeticError):
+        raise ValidationError({param: ['请输入有效的值']})
+
+
+def search_read_models(queryset: QuerySet, text: str) -> QuerySet:
+    """
+    关键词筛选：PostgreSQL上匹配读模型检索向量，其他数据库退回icontains
+
+    与SKU列表的 FullTextSearchFilter 相同，只筛选不按相关度排序，排序由 ordering 参数决定
+    """
+    text = (text or '').strip()
+    if not text:
+        return queryset
+    query = full_text_query(text) if is_full_text_available(queryset.db) else None
+    if query is not None:
+        return queryset.filter(search_vector=query)
+    condition = Q()
+    for field in ICONTAINS_FIELDS:
+        condition |= Q(**{f'{field}__icontains': text})
+    return queryset.filter(condition)
+
+
+def filter_attributes(queryset: QuerySet, filters) -> QuerySet:
+    """属性筛选：PostgreSQL上用JSONB包含查询（GIN索引），其他数据库退回SKU属性值EXISTS子查询"""
+    if not filters:
+        return queryset
+    if connections[queryset.db].vendor != 'postgresql':
+        # 读模型主键即SKU ID，EXISTS子查询可直接关联
+        return apply_attribute_filters(queryset, filters)
+    for code, values in filters.items():
+        condition = Q()
+        for value in values:
+            condition |= Q(attributes__contains={code: [value]})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def _ordering(value: Optional[str]):
+    fields = []
+    for term in (value or '').split(','):
+        term = term.strip()
+        if term.lstrip('-') in ORDERING_FIELDS:
+            fields.append(term)
+    return fields or list(DEFAULT_ORDERING)
+
+
+def filter_read_models(queryset: QuerySet, query_params) -> QuerySet:
+    """按产品列表的查询参数筛选、检索并排序读模型"""
+    for param, field in EXACT_FILTERS.items():
+        value = query_params.get(param)
+        if value:
+            queryset = queryset.filter(**{field: _parse(param, value, int)})
+
+    status = query_params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+
+    is_featured = query_params.get('is_featured')
+    if is_featured:
+        featured = _parse('is_featured', is_featured.lower(), BOOLEAN_VALUES.__getitem__)
+        queryset = queryset.filter(is_featured=featured)
+
+    min_price = query_params.get('min_price')
+    max_price = query_params.get('max_price')
+    if min_price:
+        queryset = queryset.filter(price__gte=_parse('min_price', min_price, Decimal))
+    if max_price:
+        queryset = queryset.filter(price__lte=_parse('max_price', max_price, Decimal))
+
+    in_stock = query_params.get('in_stock')
+    if in_stock == 'true':
+        queryset = queryset.filter(stock_quantity__gt=0)
+    elif in_stock == 'false':
+        queryset = queryset.filter(stock_quantity=0)
+
+    # 分类筛选（含子分类）：后代分类ID由缓存的分类树在内存中计算；
+    # 分类不存在或不是数字时忽略该参数，与SKU列表的 subtree_q 一致
+    category_id = query_params.get('category')
+    if category_id:
+        category_ids = get_descendant_ids(category_id)
+        if category_ids:
+            queryset = queryset.filter(category_id__in=category_ids)
+
+    queryset = filter_attributes(queryset, parse_attribute_filters(query_params))
+    # 检索词按DRF SearchFilter的规则拆分（引号短语、逗号），再与SKU列表一样以空格拼接
+    queryset = search_read_models(queryset, ' '.join(search_smart_split(query_params.get('search', ''))))
+    return queryset.order_by(*_ordering(query_params.get('ordering')))
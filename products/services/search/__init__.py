@@ -0,0 +1,36 @@
+"""
+商品全文检索服务模块
+维护SKU检索文档（tsvector + GIN索引），提供中文友好的分词与按相关度排序的检索
+"""
+
+from .autocomplete import autocomplete_skus, get_autocomplete_cache_stats, invalidate_autocomplete
+from .facets import apply_attribute_filters, compute_facets, parse_attribute_filters
+from .index import (
+    is_full_text_available,
+    rebuild_search_index,
+    refresh_brand_search_documents,
+    refresh_search_documents,
+    refresh_spu_search_documents,
+    write_search_documents,
+)
+from .query import full_text_query, search_products
+from .tokenizer import query_terms, tokenize
+
+__all__ = [
+    'autocomplete_skus',
+    'get_autocomplete_cache_stats',
+    'invalidate_autocomplete',
+    'apply_attribute_filters',
+    'compute_facets',
+    'parse_attribute_filters',
+    'is_full_text_available',
+    'rebuild_search_index',
+    'refresh_brand_search_documents',
+    'refresh_search_documents',
+    'refresh_spu_search_documents',
+    'write_search_documents',
+    'full_text_query',
+    'search_products',
+    'query_terms',
+    'tokenize',
+]
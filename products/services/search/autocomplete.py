@@ -0,0 +1,211 @@
+"""
+SKU编码/名称自动补全
+PostgreSQL上用 pg_trgm GIN 索引召回子串匹配的候选并按相似度取前N；
+候选集按“版本号 + 查询前缀”缓存，用户继续输入时直接在已缓存的完整候选集中过滤，
+多数按键不需要访问数据库
+"""
+
+import logging
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from products.utils.cache_versions import bump_version, get_version
+from products.utils.lru_cache import BoundedLRUCache
+from .index import is_full_text_available, search_config
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_VERSION = 'product_autocomplete'
+
+CANDIDATE_FIELDS = ('id', 'code', 'name', 'price', 'spu__code', 'spu__name', 'brand__name')
+MATCH_FIELDS = ('code', 'name', 'spu__code')
+
+
+def _config(key: str, default):
+    return search_config().get(key, default)
+
+
+_local_entries = BoundedLRUCache(_config('autocomplete_cache_size', 5000))
+_trigram_available: Dict[str, bool] = {}
+
+
+def normalize_query(text) -> str:
+    """全角转半角、转小写并压缩空白"""
+    return ' '.join(unicodedata.normalize('NFKC', str(text or '')).lower().split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """与pg_trgm一致的三元组：按字母数字切词，每个词前补两个空格、后补一个空格"""
+    grams = set()
+    word = []
+    for char in normalize_query(text) + ' ':
+        if char.isalnum():
+            word.append(char)
+            continue
+        if word:
+            padded = '  ' + ''.join(word) + ' '
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+            word = []
+    return grams
+
+
+def trigram_similarity(left: str, right: str) -> float:
+    """与pg_trgm similarity()相同的口径：共有三元组数 / 三元组并集数"""
+    left_grams, right_grams = trigrams(left), trigrams(right)
+    if not left_grams or not right_grams:
+        return 0.0
+    shared = len(left_grams & right_grams)
+    return shared / (len(left_grams) + len(right_grams) - shared)
+
+
+def _matches(candidate: Dict, query: str) -> bool:
+    return any(query in normalize_query(candidate.get(field) or '') for field in MATCH_FIELDS)
+
+
+def _rank(candidates: List[Dict], query: str, limit: int) -> List[Dict]:
+    """编码前缀命中优先，其次按编码、名称、SPU编码中最高的相似度降序"""
+    scored = []
+    for candidate in candidates:
+        code = normalize_query(candidate.get('code') or '')
+        score = max(trigram_similarity(query, candidate.get(field) or '') for field in MATCH_FIELDS)
+        scored.append((not code.startswith(query), -score, code, candidate, score))
+    scored.sort(key=lambda item: item[:3])
+    return [
+        {
+            'id': candidate['id'],
+            'code': candidate['code'],
+            'name': candidate['name'],
+            'price': float(candidate['price']) if candidate['price'] is not None else 0,
+            'spu_code': candidate['spu__code'] or '',
+            'spu_name': candidate['spu__name'] or '',
+            'brand': candidate['brand__name'] or '',
+            'score': round(score, 4),
+        }
+        for *_, candidate, score in scored[:limit]
+    ]
+
+
+def is_trigram_available(using: str = 'default') -> bool:
+    """检测数据库是否安装了pg_trgm扩展（每个连接别名只检测一次）"""
+    if using not in _trigram_available:
+        available = False
+        if is_full_text_available(using):
+            try:
+                with connections[using].cursor() as cursor:
+                    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                    available = cursor.fetchone() is not None
+            except Exception as e:
+                logger.warning(f"检测pg_trgm扩展失败: {e}")
+        _trigram_available[using] = available
+    return _trigram_available[using]
+
+
+def _fetch_candidates(query: str) -> Tuple[bool, List[Dict]]:
+    """
+    从数据库召回子串匹配的候选
+
+    Returns:
+        (是否完整, 候选列表)；完整表示全部匹配项都在列表中，可供更长的查询直接过滤
+    """
+    from products.models import SKU
+
+    candidate_limit = _config('autocomplete_candidate_limit', 200)
+    queryset = SKU.objects.filter(status='active').filter(
+        Q(code__icontains=query) | Q(name__icontains=query) | Q(spu__code__icontains=query)
+    )
+    if is_trigram_available(queryset.db):
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        queryset = queryset.annotate(
+            similarity=Greatest(
+                TrigramSimilarity('code', query),
+                TrigramSimilarity('name', query),
+                TrigramSimilarity(F('spu__code'), query),
+            )
+        ).order_by('-similarity', 'code')
+    else:
+        queryset = queryset.order_by('code')
+
+    candidates = list(queryset.values(*CANDIDATE_FIELDS)[:candidate_limit + 1])
+    complete = len(candidates) <= candidate_limit
+    return complete, candidates[:candidate_limit]
+
+
+def _entry_key(version: int, query: str) -> str:
+    return f'autocomplete:v{version}:{query}'
+
+
+def _cached_entry(version: int, query: str, min_length: int) -> Tuple[Optional[str], Optional[tuple]]:
+    """
+    查找可用的缓存候选集：查询本身的缓存，或最长的已完整缓存的前缀
+
+    Returns:
+        (命中的前缀, (是否完整, 候选列表))，未命中时为 (None, None)
+    """
+    prefixes = [query[:length] for length in range(len(query), min_length - 1, -1)]
+    entries = {}
+    remote_keys = {}
+    for prefix in prefixes:
+        entry = _local_entries.get((version, prefix))
+        if entry is not None:
+            entries[prefix] = entry
+        else:
+            remote_keys[_entry_key(version, prefix)] = prefix
+
+    if remote_keys:
+        try:
+            for key, entry in cache.get_many(list(remote_keys)).items():
+                entries[remote_keys[key]] = entry
+                _local_entries.set((version, remote_keys[key]), entry)
+        except Exception as e:
+            logger.warning(f"读取自动补全缓存失败: {e}")
+
+    for prefix in prefixes:
+        entry = entries.get(prefix)
+        if entry is not None and (prefix == query or entry[0]):
+            return prefix, entry
+    return None, None
+
+
+def _store_entry(version: int, query: str, entry: tuple):
+    _local_entries.set((version, query), entry)
+    try:
+        cache.set(_entry_key(version, query), entry, _config('autocomplete_cache_timeout', 300))
+    except Exception as e:
+        logger.warning(f"写入自动补全缓存失败: {e}")
+
+
+def autocomplete_skus(text, limit: Optional[int] = None) -> List[Dict]:
+    """按编码、名称或SPU编码补全启用的SKU，返回相似度最高的前limit个"""
+    limit = limit or _config('autocomplete_limit', 10)
+    min_length = _config('autocomplete_min_length', 2)
+    query = normalize_query(text)
+    if len(query) < min_length:
+        return []
+
+    version = get_version(AUTOCOMPLETE_VERSION)
+    prefix, entry = _cached_entry(version, query, min_length)
+    if entry is None:
+        entry = _fetch_candidates(query)
+        _store_entry(version, query, entry)
+    elif prefix != query:
+        # 前缀的完整候选集包含当前查询的全部匹配项
+        complete, candidates = entry
+        entry = (complete, [candidate for candidate in candidates if _matches(candidate, query)])
+        _store_entry(version, query, entry)
+
+    return _rank(entry[1], query, limit)
+
+
+def invalidate_autocomplete():
+    """SKU或SPU变更后使自动补全缓存失效"""
+    bump_version(AUTOCOMPLETE_VERSION)
+
+
+def get_autocomplete_cache_stats() -> Dict:
+    return _local_entries.get_stats()
@@ -0,0 +1,140 @@
+"""
+属性分面筛选
+每个 attr_<编码> 条件转为一个关联SKU的EXISTS子查询（不再逐个自连接属性值表再distinct），
+各属性值计数用分组聚合查询得到，已选属性的计数排除自身条件（多选分面）
+"""
+
+from typing import Dict, List
+
+from django.db.models import Count, Exists, OuterRef, Q, QuerySet
+
+from products.models import AttributeValue, SKUAttributeValue
+from products.utils.attribute_catalog import get_attribute_catalog
+
+ATTRIBUTE_PARAM_PREFIX = 'attr_'
+
+
+def parse_attribute_filters(query_params) -> Dict[str, List[str]]:
+    """
+    解析 attr_<属性编码> 参数
+
+    同一属性可重复传参（attr_color=白&attr_color=灰），多个值之间为“或”，
+    不同属性之间为“且”。
+    """
+    filters = {}
+    for key in query_params:
+        if not key.startswith(ATTRIBUTE_PARAM_PREFIX):
+            continue
+        values = [value for value in query_params.getlist(key) if value]
+        if values:
+            filters[key[len(ATTRIBUTE_PARAM_PREFIX):]] = values
+    return filters
+
+
+def _value_condition(values: List[str]) -> Q:
+    """SKU属性值的显示值（自定义值优先，其次预定义值）在values中"""
+    return Q(custom_value__in=values) | Q(custom_value='', attribute_value__value__in=values)
+
+
+def apply_attribute_filters(queryset: QuerySet, filters: Dict[str, List[str]]) -> QuerySet:
+    """按属性条件筛选SKU，每个属性一个EXISTS子查询，结果无重复行"""
+    for attribute_code, values in filters.items():
+        queryset = queryset.filter(Exists(
+            SKUAttributeValue.objects.filter(
+                _value_condition(values),
+                sku=OuterRef('pk'),
+                attribute__code=attribute_code,
+            )
+        ))
+    return queryset
+
+
+def _value_rows(queryset: QuerySet, attribute_ids=None, exclude_attribute_ids=()) -> List[Dict]:
+    """结果集中SKU属性值的分组计数（一次查询）"""
+    rows = SKUAttributeValue.objects.filter(
+        sku__in=queryset.order_by().values('pk'),
+        attribute__is_active=True,
+        attribute__is_filterable=True,
+    )
+    if attribute_ids is not None:
+        rows = rows.filter(attribute_id__in=attribute_ids)
+    if exclude_attribute_ids:
+        rows = rows.exclude(attribute_id__in=exclude_attribute_ids)
+    return list(
+        rows.values('attribute_id', 'attribute_value_id', 'custom_value')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
+def compute_facets(queryset: QuerySet, selected: Dict[str, List[str]] = None) -> List[Dict]:
+    """
+    统计结果集中各可筛选属性的属性值计数
+
+    采用多选分面口径：已选属性的计数不含该属性自身的条件（便于同一属性内加选其他值），
+    未选属性按全部属性条件计数。未选属性合计一次分组查询，每个已选属性各一次。
+
+    Args:
+        queryset: 已应用属性以外全部筛选条件的SKU查询集（属性条件由本函数按属性分别应用）
+        selected: parse_attribute_filters 的结果
+
+    Returns:
+        按属性排序的列表，每项包含属性信息和按计数降序的属性值
+    """
+    selected = selected or {}
+    catalog = get_attribute_catalog()
+    selected_ids = {
+        code: catalog.by_code[code]['id'] for code in selected if code in catalog.by_code
+    }
+
+    rows = _value_rows(
+        apply_attribute_filters(queryset, selected), exclude_attribute_ids=list(selected_ids.values())
+    )
+    for code, attribute_id in selected_ids.items():
+        others = {other: values for other, values in selected.items() if other != code}
+        rows += _value_rows(apply_attribute_filters(queryset, others), attribute_ids=[attribute_id])
+
+    # 目录快照对新增属性值有滞后，快照中还没有的属性值直接查询
+    missing = {
+        row['attribute_value_id'] for row in rows
+        if not row['custom_value'] and row['attribute_value_id'] not in catalog.value_by_id
+    }
+    missing.discard(None)
+    value_names = dict(AttributeValue.objects.filter(id__in=missing).values_list('id', 'value')) if missing else {}
+
+    counts: Dict[int, Dict[str, Dict]] = {}
+    for row in rows:
+        value_id = row['attribute_value_id']
+        value = row['custom_value'] or catalog.value_by_id.get(value_id) or value_names.get(value_id)
+        if not value:
+            continue
+        values = counts.setdefault(row['attribute_id'], {})
+        entry = values.get(value)
+        if entry is None:
+            values[value] = {
+                'value': value,
+                'attribute_value_id': None if row['custom_value'] else row['attribute_value_id'],
+                'count': row['count'],
+            }
+        else:
+            entry['count'] += row['count']
+
+    facets = []
+    for attribute_id, values in counts.items():
+        attribute = catalog.by_id.get(attribute_id)
+        if attribute is None:
+            continue
+        chosen = set(selected.get(attribute['code'], ()))
+        facets.append({
+            'attribute_id': attribute_id,
+            'code': attribute['code'],
+            'name': attribute['name'],
+            'unit': attribute['unit'] or '',
+            'order': attribute.get('order', 0),
+            'values': [
+                dict(entry, selected=entry['value'] in chosen)
+                for entry in sorted(values.values(), key=lambda item: (-item['count'], item['value']))
+            ],
+        })
+    facets.sort(key=lambda facet: (facet['order'], facet['name']))
+    return facets
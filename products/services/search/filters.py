@@ -0,0 +1,18 @@
+"""
+DRF搜索过滤器
+沿用SearchFilter的 search 参数，SKU查询改走全文检索
+"""
+
+from rest_framework import filters
+
+from .query import search_products
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """SKU全文检索过滤器，保留视图原有排序（由OrderingFilter决定）"""
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        return search_products(queryset, ' '.join(search_terms), rank=False)
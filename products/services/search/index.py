@@ -0,0 +1,122 @@
+"""
+SKU全文检索文档维护
+把SKU及其SPU、品牌的文本字段按权重写入 products_search_document，
+SKU/SPU/品牌变更时由信号增量刷新，也可用 rebuild_search_index 命令全量重建
+"""
+
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .tokenizer import normalize_text, to_tsvector_literal
+
+logger = logging.getLogger(__name__)
+
+# 权重分组：A 名称/编码，B SPU名称/品牌名称/标签，C 卖点，D 描述
+WEIGHTED_FIELDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ('A', ('name', 'code')),
+    ('B', ('spu__name', 'brand__name', 'tags')),
+    ('C', ('selling_points',)),
+    ('D', ('description',)),
+)
+
+DOCUMENT_FIELDS = ('id',) + tuple(field for _, fields in WEIGHTED_FIELDS for field in fields)
+
+
+def search_config() -> dict:
+    return getattr(settings, 'SEARCH_CONFIG', {})
+
+
+def is_full_text_available(using: str = 'default') -> bool:
+    """全文检索仅在PostgreSQL上启用，其他数据库退回icontains查询"""
+    return search_config().get('enable_full_text', True) and connections[using].vendor == 'postgresql'
+
+
+def uses_database_tokenizer() -> bool:
+    """tokenizer为database时交给数据库分词配置（如zhparser），否则用内置中文二元组分词"""
+    return search_config().get('tokenizer', 'bigram') == 'database'
+
+
+def vector_sql() -> str:
+    """各权重分组拼接的tsvector表达式（每行结构相同，便于executemany）"""
+    if uses_database_tokenizer():
+        part = "setweight(to_tsvector(%s::regconfig, %s), '{weight}')"
+    else:
+        part = "setweight(%s::tsvector, '{weight}')"
+    return ' || '.join(part.format(weight=weight) for weight, _ in WEIGHTED_FIELDS)
+
+
+def vector_params(row: Dict) -> List:
+    params = []
+    ts_config = search_config().get('text_search_config', 'simple')
+    for _, fields in WEIGHTED_FIELDS:
+        texts = [row.get(field) for field in fields]
+        if uses_database_tokenizer():
+            params.extend([ts_config, normalize_text(' '.join(text for text in texts if text))])
+        else:
+            params.append(to_tsvector_literal(texts))
+    return params
+
+
+def write_search_documents(rows: Iterable[Dict], using: str = 'default') -> int:
+    """
+    写入（或覆盖）检索文档
+
+    Args:
+        rows: 以 DOCUMENT_FIELDS 为键的字典（SKU.values() 的结果，迁移中也可直接使用）
+    """
+    params = [[row['id']] + vector_params(row) for row in rows]
+    if not params:
+        return 0
+    sql = (
+        f"INSERT INTO products_search_document (sku_id, search_vector, updated_at) "
+        f"VALUES (%s, {vector_sql()}, NOW()) "
+        f"ON CONFLICT (sku_id) DO UPDATE "
+        f"SET search_vector = EXCLUDED.search_vector, updated_at = EXCLUDED.updated_at"
+    )
+    with connections[using].cursor() as cursor:
+        cursor.executemany(sql, params)
+    return len(params)
+
+
+def refresh_search_documents(sku_ids: Iterable[int]) -> int:
+    """刷新指定SKU的检索文档（已删除的SKU由外键级联删除）"""
+    from products.models import SKU
+
+    sku_ids = list(sku_ids)
+    if not sku_ids or not is_full_text_available():
+        return 0
+    try:
+        return write_search_documents(SKU.objects.filter(id__in=sku_ids).values(*DOCUMENT_FIELDS))
+    except DatabaseError as e:
+        logger.error(f"刷新SKU检索文档失败: {e}")
+        return 0
+
+
+def _refresh_related(filters: Dict, chunk_size: int = 1000) -> int:
+    from products.models import SKU
+
+    if not is_full_text_available():
+        return 0
+    sku_ids = list(SKU.objects.filter(**filters).order_by('id').values_list('id', flat=True))
+    return sum(
+        refresh_search_documents(sku_ids[offset:offset + chunk_size])
+        for offset in range(0, len(sku_ids), chunk_size)
+    )
+
+
+def refresh_spu_search_documents(spu_id: int) -> int:
+    """SPU名称变更后刷新其下SKU的检索文档"""
+    return _refresh_related({'spu_id': spu_id})
+
+
+def refresh_brand_search_documents(brand_id: int) -> int:
+    """品牌名称变更后刷新其下SKU的检索文档"""
+    return _refresh_related({'brand_id': brand_id})
+
+
+def rebuild_search_index(chunk_size: int = 1000) -> int:
+    """全量重建全部SKU的检索文档，返回写入的文档数"""
+    return _refresh_related({}, chunk_size=chunk_size)
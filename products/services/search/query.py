@@ -0,0 +1,65 @@
+"""
+SKU全文检索查询
+PostgreSQL上通过GIN索引匹配检索文档并按ts_rank排序，其他数据库退回icontains查询
+"""
+
+from typing import Optional
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q, QuerySet
+
+from .index import is_full_text_available, search_config, uses_database_tokenizer
+from .tokenizer import to_tsquery_literal
+
+# 退回模糊查询时匹配的字段（与检索文档覆盖的字段一致）
+ICONTAINS_FIELDS = (
+    'name', 'code', 'description', 'selling_points', 'tags', 'spu__name', 'brand__name',
+)
+
+# 各权重（D、C、B、A）的排序系数
+RANK_WEIGHTS = [0.1, 0.2, 0.4, 1.0]
+
+
+class LexemeQuery(SearchQuery):
+    """直接由词元构造的tsquery，不经过数据库文本解析器，与索引端分词口径一致"""
+    template = '(%(expressions)s)::tsquery'
+
+
+def full_text_query(text: str) -> Optional[SearchQuery]:
+    """构造检索条件，查询文本中没有可检索的词元时返回None"""
+    if uses_database_tokenizer():
+        if not text.strip():
+            return None
+        return SearchQuery(text, config=search_config().get('text_search_config', 'simple'))
+    literal = to_tsquery_literal(text)
+    return LexemeQuery(literal) if literal else None
+
+
+def icontains_q(text: str) -> Q:
+    query = Q()
+    for field in ICONTAINS_FIELDS:
+        query |= Q(**{f'{field}__icontains': text})
+    return query
+
+
+def search_products(queryset: QuerySet, text: str, rank: bool = True) -> QuerySet:
+    """
+    按关键词筛选SKU查询集
+
+    Args:
+        rank: 为True时按相关度降序（同分按创建时间倒序），否则保留原有排序
+    """
+    text = (text or '').strip()
+    if not text:
+        return queryset
+
+    query = full_text_query(text) if is_full_text_available(queryset.db) else None
+    if query is None:
+        return queryset.filter(icontains_q(text))
+
+    queryset = queryset.filter(search_document__search_vector=query)
+    if rank:
+        queryset = queryset.annotate(
+            search_rank=SearchRank(F('search_document__search_vector'), query, weights=RANK_WEIGHTS)
+        ).order_by('-search_rank', '-created_at')
+    return queryset
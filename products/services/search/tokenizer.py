@@ -0,0 +1,104 @@
+"""
+商品搜索分词
+中文按字的一元和二元组切分，字母数字按完整编码及其分段切分，含数字的编码另外输出各后缀，
+索引端和查询端使用同一套规则，直接生成tsvector/tsquery词元，不依赖数据库中文分词扩展
+"""
+
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Tuple
+
+# 中文字符连续段 / 字母数字及带连接符的编码（如 us60-10、n1.2）
+_TOKEN_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[0-9a-z]+(?:[-_./][0-9a-z]+)*')
+_CJK_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+_PART_RE = re.compile(r'[0-9a-z]+')
+_DIGIT_RE = re.compile(r'[0-9]')
+
+# PostgreSQL单个词元上限2046字节，超长片段直接丢弃
+MAX_LEXEME_LENGTH = 200
+# 超过该长度的编码不再展开后缀（后缀数量随长度线性增长）
+MAX_SUFFIX_SOURCE_LENGTH = 64
+
+
+def normalize_text(text) -> str:
+    """全角转半角并转小写，保证索引与查询口径一致"""
+    if not text:
+        return ''
+    return unicodedata.normalize('NFKC', str(text)).lower()
+
+
+def code_suffixes(segment: str) -> List[str]:
+    """
+    编码从每个字母数字位置开始的后缀（至少两个字符）
+
+    查询端对编码做前缀匹配，索引后缀后即可匹配编码中间的片段：
+    “US60-10” → s60-10、60-10、0-10、10，输入“S60”或“60-10”都能命中。
+    """
+    if len(segment) > MAX_SUFFIX_SOURCE_LENGTH or not _DIGIT_RE.search(segment):
+        return []
+    return [segment[index:] for index in range(1, len(segment) - 1) if segment[index].isalnum()]
+
+
+def tokenize(text) -> List[str]:
+    """
+    索引端分词
+
+    中文片段输出每个字及相邻两字（“衣柜门” → 衣、柜、门、衣柜、柜门），
+    编码输出完整编码、各分段及后缀（“US60-10” → us60-10、us60、10、s60-10、60-10、0-10）。
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer(normalize_text(text)):
+        segment = match.group()
+        if _CJK_RE.match(segment):
+            tokens.extend(segment)
+            tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+        else:
+            tokens.append(segment)
+            parts = _PART_RE.findall(segment)
+            if len(parts) > 1:
+                tokens.extend(parts)
+            tokens.extend(code_suffixes(segment))
+    return [token for token in tokens if len(token) <= MAX_LEXEME_LENGTH]
+
+
+def query_terms(text) -> List[Tuple[str, bool]]:
+    """
+    查询端分词，返回 (词元, 是否前缀匹配)
+
+    中文片段用二元组（单字时用一元），所有词元需同时命中，近似于子串匹配；
+    编码按完整编码做前缀匹配，输入“US60”即可命中“US60-10”。
+    """
+    terms = []
+    seen = set()
+    for match in _TOKEN_RE.finditer(normalize_text(text)):
+        segment = match.group()
+        if _CJK_RE.match(segment):
+            grams = [segment] if len(segment) == 1 else [segment[i:i + 2] for i in range(len(segment) - 1)]
+            candidates = [(gram, False) for gram in grams]
+        else:
+            candidates = [(segment, True)]
+        for term in candidates:
+            if term[0] not in seen and len(term[0]) <= MAX_LEXEME_LENGTH:
+                seen.add(term[0])
+                terms.append(term)
+    return terms
+
+
+def _quote_lexeme(lexeme: str) -> str:
+    return "'" + lexeme.replace('\\', '\\\\').replace("'", "''") + "'"
+
+
+def to_tsvector_literal(texts: Iterable) -> str:
+    """把若干文本分词后拼成tsvector字面量（词元去重，不含位置信息）"""
+    lexemes = set()
+    for text in texts:
+        lexemes.update(tokenize(text))
+    return ' '.join(_quote_lexeme(lexeme) for lexeme in sorted(lexemes))
+
+
+def to_tsquery_literal(text) -> Optional[str]:
+    """把查询文本转为tsquery字面量（各词元AND），没有可用词元时返回None"""
+    terms = query_terms(text)
+    if not terms:
+        return None
+    return ' & '.join(_quote_lexeme(lexeme) + (':*' if prefix else '') for lexeme, prefix in terms)
@@ -0,0 +1,254 @@
+"""
+产品应用信号处理
+数据变更时失效相关的进程内索引和缓存
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from mptt.signals import node_moved
+
+from .models import (
+    SKU, SPU, Attribute, AttributeValue, Brand, Category, ProductImage, ProductsDimension,
+    ProductsPricingRule, SKUAttributeValue, SPUAttribute
+)
+from .services.pricing import invalidate_priced_spu_ids, invalidate_sku_pricing, invalidate_spu_pricing
+from .services.filter_metadata import enqueue_filter_metadata_update
+from .services.read_model import enqueue_read_model_refresh
+from .services.search import (
+    invalidate_autocomplete, refresh_brand_search_documents, refresh_search_documents,
+    refresh_spu_search_documents
+)
+from .utils.attribute_catalog import invalidate_attribute_catalog, mark_attribute_values_added
+from .utils.category_tree import invalidate_category_tree, subtree_q
+from .utils.conditional_get import PRODUCTS_VERSION, invalidate_resources
+
+
+@receiver([post_save, post_delete], sender=Attribute)
+@receiver([post_save, post_delete], sender=AttributeValue)
+def invalidate_attribute_catalog_on_change(sender, instance, created=False, **kwargs):
+    """属性或属性值变更提交后递增属性目录版本号；新增属性值只递增新值版本号"""
+    if sender is AttributeValue and created:
+        transaction.on_commit(mark_attribute_values_added)
+    else:
+        transaction.on_commit(invalidate_attribute_catalog)
+
+
+@receiver(pre_save, sender=ProductsPricingRule)
+def invalidate_previous_spu_pricing(sender, instance, **kwargs):
+    """规则被移到其他SPU时，原SPU的定价表也要失效"""
+    if instance.pk is None:
+        return
+    previous_spu_id = sender.objects.filter(pk=instance.pk).values_list('spu_id', flat=True).first()
+    if previous_spu_id and previous_spu_id != instance.spu_id:
+        transaction.on_commit(partial(invalidate_spu_pricing, previous_spu_id))
+
+
+@receiver([post_save, post_delete], sender=ProductsPricingRule)
+def invalidate_pricing_on_rule_change(sender, instance, **kwargs):
+    """加价规则变更后使所属SPU下所有SKU的定价表及定价计算器的SPU集合失效"""
+    transaction.on_commit(partial(invalidate_spu_pricing, instance.spu_id))
+    transaction.on_commit(invalidate_priced_spu_ids)
+
+
+@receiver([post_save, post_delete], sender=SPU)
+def invalidate_pricing_on_spu_change(sender, instance, **kwargs):
+    """SPU变更（如名称）后使其定价表失效"""
+    transaction.on_commit(partial(invalidate_spu_pricing, instance.pk))
+
+
+@receiver([post_save, post_delete], sender=ProductsDimension)
+def invalidate_pricing_on_dimension_change(sender, instance, **kwargs):
+    """标准尺寸变更后使对应SKU的定价表失效"""
+    transaction.on_commit(partial(invalidate_sku_pricing, instance.sku_id))
+
+
+@receiver([post_save, post_delete], sender=SKU)
+def invalidate_pricing_on_sku_change(sender, instance, **kwargs):
+    """SKU价格、名称或所属SPU变更后使其定价表失效"""
+    transaction.on_commit(partial(invalidate_sku_pricing, instance.pk))
+
+
+@receiver(post_save, sender=SKU)
+def refresh_search_document_on_sku_change(sender, instance, **kwargs):
+    """SKU保存后刷新其全文检索文档"""
+    transaction.on_commit(partial(refresh_search_documents, [instance.pk]))
+
+
+@receiver(post_save, sender=SPU)
+def refresh_search_documents_on_spu_change(sender, instance, **kwargs):
+    """SPU名称参与SKU检索，保存后刷新其下SKU的检索文档"""
+    transaction.on_commit(partial(refresh_spu_search_documents, instance.pk))
+
+
+@receiver(post_save, sender=Brand)
+def refresh_search_documents_on_brand_change(sender, instance, **kwargs):
+    """品牌名称参与SKU检索，保存后刷新其下SKU的检索文档"""
+    transaction.on_commit(partial(refresh_brand_search_documents, instance.pk))
+
+
+@receiver([post_save, post_delete], sender=SKU)
+@receiver([post_save, post_delete], sender=SPU)
+@receiver([post_save, post_delete], sender=Brand)
+def invalidate_autocomplete_on_change(sender, instance, **kwargs):
+    """SKU、SPU或品牌变更后使编码/名称自动补全缓存失效"""
+    transaction.on_commit(invalidate_autocomplete)
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver(node_moved, sender=Category)
+def invalidate_category_tree_on_change(sender, instance, **kwargs):
+    """分类新增、删除或移动会改变树的lft/rght，提交后使分类子树索引失效"""
+    transaction.on_commit(invalidate_category_tree)
+
+
+@receiver(post_save, sender=SKU)
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=SKUAttributeValue)
+def refresh_read_model_on_sku_change(sender, instance, **kwargs):
+    """SKU本身、图片或属性值变更后刷新该SKU的读模型（SKU删除时读模型行级联删除）"""
+    enqueue_read_model_refresh([instance.pk if sender is SKU else instance.sku_id])
+
+
+@receiver(post_save, sender=SPU)
+def refresh_read_model_on_spu_change(sender, instance, **kwargs):
+    """SPU名称或所属分类变更后刷新其下SKU的读模型"""
+    enqueue_read_model_refresh(condition=Q(spu_id=instance.pk))
+
+
+@receiver(post_save, sender=Brand)
+def refresh_read_model_on_brand_change(sender, instance, **kwargs):
+    """品牌名称变更后刷新其下SKU的读模型"""
+    enqueue_read_model_refresh(condition=Q(brand_id=instance.pk))
+
+
+@receiver(post_save, sender=Attribute)
+def refresh_read_model_on_attribute_change(sender, instance, **kwargs):
+    """属性编码变更后刷新使用该属性的SKU的读模型"""
+    enqueue_read_model_refresh(condition=Q(sku_attribute_values__attribute_id=instance.pk))
+
+
+@receiver(post_save, sender=AttributeValue)
+def refresh_read_model_on_attribute_value_change(sender, instance, **kwargs):
+    """预定义属性值变更后刷新使用该值的SKU的读模型"""
+    enqueue_read_model_refresh(condition=Q(sku_attribute_values__attribute_value_id=instance.pk))
+
+
+@receiver(post_save, sender=Category)
+@receiver(node_moved, sender=Category)
+def refresh_read_model_on_category_change(sender, instance, **kwargs):
+    """
+    分类名称或位置变更后刷新整棵子树下SKU的读模型（分类路径随之变化）；
+    在分类树失效回调之后登记，刷新时读取的是新的分类路径
+    """
+    condition = subtree_q(instance, 'spu__category') or Q(spu__category_id=instance.pk)
+    transaction.on_commit(partial(enqueue_read_model_refresh, condition=condition))
+
+
+@receiver([post_save, post_delete], sender=SKU)
+@receiver([post_save, post_delete], sender=SPU)
+@receiver([post_save, post_delete], sender=SPUAttribute)
+@receiver([post_save, post_delete], sender=Brand)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=ProductsDimension)
+@receiver([post_save, post_delete], sender=SKUAttributeValue)
+@receiver([post_save, post_delete], sender=Attribute)
+@receiver([post_save, post_delete], sender=AttributeValue)
+def invalidate_product_api_on_change(sender, instance, **kwargs):
+    """产品列表/详情输出涉及的数据变更后递增产品接口版本号，条件请求不再返回304"""
+    transaction.on_commit(partial(invalidate_resources, PRODUCTS_VERSION))
+
+
+@receiver(post_save, sender=SKU)
+def update_filter_metadata_on_sku_save(sender, instance, **kwargs):
+    """SKU价格、状态变更影响所属分类的价格直方图和其属性值计数；移到其他SPU时原SPU的分类也要重算"""
+    previous_spu_id = instance.get_loaded_value('spu_id')
+    spu_ids = [previous_spu_id] if previous_spu_id != instance.spu_id else []
+    enqueue_filter_metadata_update(sku_ids=[instance.pk], spu_ids=spu_ids)
+
+
+@receiver(post_delete, sender=SKU)
+def update_filter_metadata_on_sku_delete(sender, instance, **kwargs):
+    """SKU删除后重算所属分类的价格直方图（属性值计数由级联删除的SKU属性值触发）"""
+    enqueue_filter_metadata_update(spu_ids=[instance.spu_id])
+
+
+@receiver([post_save, post_delete], sender=SPU)
+def update_filter_metadata_on_spu_change(sender, instance, **kwargs):
+    """SPU变更或删除后重算其分类的价格直方图，改到其他分类时原分类也要重算"""
+    enqueue_filter_metadata_update(category_ids=[instance.category_id, instance.get_loaded_value('category_id')])
+
+
+@receiver([post_save, post_delete], sender=SKUAttributeValue)
+@receiver([post_save, post_delete], sender=AttributeValue)
+def update_filter_metadata_on_value_change(sender, instance, **kwargs):
+    """SKU属性值或预定义属性值变更后重算该属性的属性值计数"""
+    enqueue_filter_metadata_update(attribute_ids=[instance.attribute_id])
+
+
+@receiver([post_save, post_delete], sender=Attribute)
+def update_filter_metadata_on_attribute_change(sender, instance, **kwargs):
+    """属性启用、可筛选或名称变更后重算该属性"""
+    enqueue_filter_metadata_update(attribute_ids=[instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver(node_moved, sender=Category)
+def update_filter_metadata_on_category_change(sender, instance, **kwargs):
+    """顶级分类列表随分类变更重算，删除的分类同时移除其价格直方图"""
+    category_ids = [instance.pk] if kwargs.get('signal') is post_delete else []
+    enqueue_filter_metadata_update(sections=['categories'], category_ids=category_ids)
+
+
+@receiver([post_save, post_delete], sender=Brand)
+def update_filter_metadata_on_brand_change(sender, instance, **kwargs):
+    """品牌变更后重算品牌列表"""
+    enqueue_filter_metadata_update(sections=['brands'])
+
+
+def handle_bulk_update(model, pks):
+    """
+    queryset.update() 不发送 post_save，批量更新（如后台批量启用、停用）后由调用方调用，
+    按模型补做上面信号中的失效和刷新，均在事务提交后执行
+
+    Args:
+        model: 被更新的模型
+        pks: 更新前取得的主键（更新可能改变原查询集的筛选结果）
+    """
+    pks = list(pks)
+    if not pks:
+        return
+
+    # 分类启用状态变化后分类树JSON和子树索引失效（分类接口的版本号即分类树版本号，一并递增）
+    if model is Category:
+        transaction.on_commit(invalidate_category_tree)
+
+    # 条件请求的版本号
+    if model in (Category, SKU, SPU, Brand, Attribute, AttributeValue, ProductImage, ProductsDimension):
+        transaction.on_commit(partial(invalidate_resources, PRODUCTS_VERSION))
+
+    # 读模型：SKU状态变化时增删其行，SPU、品牌变更刷新其下SKU的行
+    if model is SKU:
+        enqueue_read_model_refresh(pks)
+    elif model is SPU:
+        enqueue_read_model_refresh(condition=Q(spu_id__in=pks))
+    elif model is Brand:
+        enqueue_read_model_refresh(condition=Q(brand_id__in=pks))
+
+    # 筛选器元数据：SKU状态影响价格直方图和属性值计数，属性、属性值、品牌、分类影响各自的分段
+    if model is SKU:
+        enqueue_filter_metadata_update(sku_ids=pks)
+    elif model is Attribute:
+        enqueue_filter_metadata_update(attribute_ids=pks)
+    elif model is AttributeValue:
+        enqueue_filter_metadata_update(
+            attribute_ids=AttributeValue.objects.filter(pk__in=pks).values_list('attribute_id', flat=True)
+        )
+    elif model is Brand:
+        enqueue_filter_metadata_update(sections=['brands'])
+    elif model is Category:
+        enqueue_filter_metadata_update(sections=['categories'])
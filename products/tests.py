@@ -1,3 +1,450 @@
-from django.test import TestCase
+from decimal import Decimal
+from itertools import product
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .models import (
+    Attribute, AttributeValue, Brand, Category, ProductImage, ProductReadModel, ProductsDimension,
+    ProductsPricingRule, SKU, SKUAttributeValue, SPU, SPUAttribute
+)
+from .models.pricing_models import calculate_rule_increment
+from .serializers import CategorySerializer
+from .services.pricing import calculate_sku_quote, clear_quote_cache, quote_sku
+from .services.pricing.fixed_point import micros_to_decimal, rule_increment_micros, to_hundredths
+from .services.pricing.price_matrix import build_price_matrix, parse_axis
+from .services.pricing.rule_table import build_pricing_tables
+from .utils import category_tree
+
+
+class ProductSerializerQueryCountTests(TestCase):
+    """产品列表/详情序列化只读取预加载数据，查询数不随SKU数量增长"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brand.objects.create(name='测试品牌', code='TEST_BRAND')
+        cls.category = Category.objects.create(name='测试分类', code='TEST_CATEGORY')
+        cls.attributes = [
+            Attribute.objects.create(name=f'属性{i}', code=f'test_attr_{i}', type='text')
+            for i in range(3)
+        ]
+
+    def create_skus(self, count, offset=0):
+        """每个SKU一个SPU（含属性）和两张图片，其中一张未启用"""
+        # 执行提交回调，使信号维护的检索文档等与实际运行时一致
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_skus(count, offset)
+
+    def _create_skus(self, count, offset):
+        for i in range(offset, offset + count):
+            spu = SPU.objects.create(
+                name=f'SPU{i}', code=f'TEST_SPU_{i}', category=self.category, brand=self.brand
+            )
+            for order, attribute in enumerate(self.attributes):
+                SPUAttribute.objects.create(spu=spu, attribute=attribute, order=order)
+            sku = SKU.objects.create(
+                name=f'SKU{i}', code=f'TEST_SKU_{i}', spu=spu, brand=self.brand,
+                price=Decimal('100.00'), status='active'
+            )
+            ProductImage.objects.create(sku=sku, image=f'products/{i}_hidden.jpg', order=0, is_active=False)
+            ProductImage.objects.create(sku=sku, image=f'products/{i}.jpg', order=1)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context), response.json()
+
+    def test_list_query_count_is_constant(self):
+        self.create_skus(10)
+        small_queries, small_data = self.count_queries('/api/products/?page_size=100')
+        self.assertEqual(small_data['count'], 10)
+
+        self.create_skus(90, offset=10)
+        large_queries, large_data = self.count_queries('/api/products/?page_size=100')
+        self.assertEqual(len(large_data['results']), 100)
+        self.assertEqual(small_queries, large_queries)
+
+        # 主图取第一张启用的图片
+        result = next(item for item in large_data['results'] if item['code'] == 'TEST_SKU_5')
+        self.assertTrue(result['primary_image'].endswith('products/5.jpg'))
+
+    def test_detail_serializer_list_query_count_is_constant(self):
+        """search 等动作使用详情序列化器（嵌套品牌、SPU属性、图片）"""
+        self.create_skus(5)
+        small_queries, small_data = self.count_queries('/api/products/search/?q=SKU&page_size=100')
+        self.assertEqual(small_data['count'], 5)
+
+        self.create_skus(45, offset=5)
+        large_queries, large_data = self.count_queries('/api/products/search/?q=SKU&page_size=100')
+        self.assertEqual(large_data['count'], 50)
+        self.assertEqual(small_queries, large_queries)
+
+        attributes = large_data['results'][0]['spu']['attributes']
+        self.assertEqual([item['attribute_code'] for item in attributes],
+                         [attribute.code for attribute in self.attributes])
+
+    def test_spu_list_query_count_is_constant(self):
+        self.create_skus(10)
+        small_queries, _ = self.count_queries('/api/spus/?page_size=100')
+        self.create_skus(40, offset=10)
+        large_queries, large_data = self.count_queries('/api/spus/?page_size=100')
+        self.assertEqual(large_data['count'], 50)
+        self.assertEqual(small_queries, large_queries)
+
+
+class PricingDataMixin:
+    """一个SKU及覆盖四种计算方式的SPU规则"""
+
+    METHODS = ('fixed', 'percentage', 'multiplier', 'step')
+
+    @classmethod
+    def setUpTestData(cls):
+        brand = Brand.objects.create(name='定价品牌', code='PRICING_BRAND')
+        category = Category.objects.create(name='定价分类', code='PRICING_CATEGORY')
+        spu = SPU.objects.create(name='定价SPU', code='PRICING_SPU', category=category, brand=brand)
+        cls.sku = SKU.objects.create(
+            name='定价SKU', code='PRICING_SKU', spu=spu, brand=brand, price=Decimal('1999.99'), status='active'
+        )
+        for dimension_type, value in (('height', 2335), ('width', 600), ('depth', 350)):
+            ProductsDimension.objects.create(
+                sku=cls.sku, dimension_type=dimension_type, standard_value=Decimal(value)
+            )
+        # 高度的阶梯规则为SKU专属规则（优先），超过2400才生效，否则由SPU的固定加价规则处理
+        rules = (('height', '2335', False), ('width', '500', False), ('depth', '300', False), ('height', '2400', True))
+        for index, ((rule_type, threshold, sku_rule), method) in enumerate(zip(rules, cls.METHODS)):
+            ProductsPricingRule.objects.create(
+                spu=spu, sku=cls.sku if sku_rule else None, rule_type=rule_type, name=f'规则{index}',
+                threshold_value=Decimal(threshold), unit_increment=Decimal('12.5'), calculation_method=method,
+                price_increment=Decimal('3.35'), multiplier=Decimal('1.25'),
+                max_increment=Decimal('800') if index % 2 else None,
+            )
+
+
+class FixedPointPricingTests(PricingDataMixin, TestCase):
+    """定点整数报价与Decimal报价逐位一致"""
+
+    def test_rule_increment_matches_decimal(self):
+        excesses = ('0.01', '0.5', '1', '12.5', '12.51', '99.99', '1234.56')
+        prices = ('0.01', '3.35', '20', '15.25')
+        for method, excess, price, max_increment in product(self.METHODS, excesses, prices, (None, '7.77')):
+            expected = calculate_rule_increment(
+                method, Decimal(excess), Decimal(price), Decimal('12.5'), Decimal('1.25'),
+                Decimal(max_increment) if max_increment else None
+            )
+            micros = rule_increment_micros(
+                method, to_hundredths(excess), to_hundredths(price), to_hundredths('12.5'), to_hundredths('1.25'),
+                to_hundredths(max_increment) * 10000 if max_increment else None
+            )
+            self.assertEqual(micros_to_decimal(micros), expected, (method, excess, price, max_increment))
+
+    def test_quote_matches_decimal_path(self):
+        table = build_pricing_tables([self.sku.id])[self.sku.id]
+        for height, width, depth in product(('2335', '2335.01', '2400', '2600.5'), ('600', '655.55'), ('350', '401')):
+            dimensions = {'height': height, 'width': width, 'depth': depth}
+            with override_settings(PRICING_CONFIG={'fixed_point_arithmetic': True}):
+                fixed = quote_sku(table, dimensions)
+            with override_settings(PRICING_CONFIG={'fixed_point_arithmetic': False}):
+                decimal = quote_sku(table, dimensions)
+            self.assertEqual(fixed['total_price'], decimal['total_price'], dimensions)
+            for fixed_detail, decimal_detail in zip(fixed['pricing_details'], decimal['pricing_details']):
+                self.assertEqual(fixed_detail['calculated_increment'], decimal_detail['calculated_increment'])
+
+
+class PriceMatrixTests(PricingDataMixin, TestCase):
+    """价格矩阵输入校验，单元格与单个SKU报价一致"""
+
+    def test_parse_axis(self):
+        self.assertEqual(parse_axis('2300:2400:50'), [Decimal('2300'), Decimal('2350'), Decimal('2400')])
+        self.assertEqual(parse_axis('600, 655.5'), [Decimal('600'), Decimal('655.5')])
+        for spec in ('abc', '2300:abc:50', '2300:2400:0', '2300:2400', 'nan', 'Infinity', '600.125',
+                     '0:100000:1', ','.join(['600'] * 10001)):
+            with self.assertRaises(ValueError, msg=spec):
+                parse_axis(spec)
+
+    def test_invalid_axis_returns_400(self):
+        url = f'/products/api/pricing/spu/{self.sku.spu_id}/matrix/'
+        self.assertEqual(self.client.get(url, {'height': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'height': '2300', 'date': 'tomorrow'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'height': '2300:2400:50'}).status_code, 200)
+
+    def test_cells_match_quotes(self):
+        clear_quote_cache()
+        matrix = build_price_matrix(
+            self.sku.spu_id, {'height': '2335:2400:7.5', 'width': '600,655.55', 'depth': '350,401'}
+        )
+        for index in range(len(matrix['sku_id'])):
+            dimensions = {name: str(Decimal(str(matrix[name][index]))) for name in ('height', 'width', 'depth')}
+            quote = calculate_sku_quote(self.sku.id, dimensions)
+            self.assertEqual(matrix['total_price'][index], quote['total_price'], dimensions)
+            self.assertEqual(matrix['total_increment'][index], quote['calculation_summary']['total_increment'])
+
+
+class CatalogDataMixin:
+    """键集分页和读模型测试共用的产品数据"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brand.objects.create(name='列表品牌', code='LIST_BRAND')
+        cls.category = Category.objects.create(name='列表分类', code='LIST_CATEGORY')
+        cls.spu = SPU.objects.create(name='列表SPU', code='LIST_SPU', category=cls.category, brand=cls.brand)
+
+    def create_sku(self, index, **fields):
+        fields = dict({'price': Decimal('100.00'), 'status': 'active'}, **fields)
+        with self.captureOnCommitCallbacks(execute=True):
+            return SKU.objects.create(
+                name=f'列表SKU{index}', code=f'LIST_SKU_{index}', spu=self.spu, brand=self.brand, **fields
+            )
+
+    def save_sku(self, sku, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, value in fields.items():
+                setattr(sku, name, value)
+            sku.save()
+
+
+class KeysetPaginationTests(CatalogDataMixin, TestCase):
+    """键集分页的next/previous链接可以往返翻页"""
+
+    def follow(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            pages.append([item['id'] for item in data['results']])
+            url = data[link]
+        return pages
+
+    def test_next_and_previous_round_trip(self):
+        for index in range(7):
+            self.create_sku(index)
+        expected = list(SKU.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+
+        forward = self.follow('/api/products/?pagination=cursor&page_size=3', 'next')
+        self.assertEqual([len(page) for page in forward], [3, 3, 1])
+        self.assertEqual(sum(forward, []), expected)
+
+        # 从最后一页沿 previous 回到第一页，每页内容与向后翻页时相同
+        last_page = self.client.get('/api/products/?pagination=cursor&page_size=3').json()
+        while last_page['next']:
+            last_page = self.client.get(last_page['next']).json()
+        backward = self.follow(last_page['previous'], 'previous')
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_invalid_cursor_returns_404(self):
+        self.assertEqual(self.client.get('/api/products/?cursor=invalid').status_code, 404)
+
+
+class ProductReadModelTests(CatalogDataMixin, TestCase):
+    """读模型随SKU变更在事务提交后刷新，列表结果与SKU表一致"""
+
+    def test_refresh_on_sku_and_status_change(self):
+        sku = self.create_sku(1)
+        row = ProductReadModel.objects.get(sku=sku)
+        self.assertEqual((row.price, row.brand_name, row.category_name), (Decimal('100.00'), '列表品牌', '列表分类'))
+
+        self.save_sku(sku, price=Decimal('120.50'), name='改名SKU')
+        row.refresh_from_db()
+        self.assertEqual((row.price, row.name), (Decimal('120.50'), '改名SKU'))
+
+        # 非上架SKU从读模型中移除，重新上架后恢复
+        self.save_sku(sku, status='inactive')
+        self.assertFalse(ProductReadModel.objects.filter(sku=sku).exists())
+        self.save_sku(sku, status='active')
+        self.assertTrue(ProductReadModel.objects.filter(sku=sku).exists())
+
+        self.create_sku(2, status='draft')
+        self.assertEqual(ProductReadModel.objects.count(), 1)
+
+    def test_list_matches_sku_path(self):
+        for index in range(5):
+            self.create_sku(index, price=Decimal(100 + index))
+        self.create_sku(5, status='inactive')
+
+        for query in ('', '?ordering=price', f'?category={self.category.id}', '?category=999999',
+                      '?category=abc', '?min_price=102', '?search=列表SKU3', '?search="列表SKU3"',
+                      '?search=SKU&ordering=-price'):
+            with self.subTest(query=query):
+                sku_data = self.client.get(f'/api/products/{query}').json()
+                with override_settings(READ_MODEL_CONFIG={'serve_product_list': True}):
+                    read_model_data = self.client.get(f'/api/products/{query}').json()
+                self.assertEqual(
+                    [item['id'] for item in read_model_data['results']],
+                    [item['id'] for item in sku_data['results'] if item['status'] == 'active'],
+                )
+
+
+class CategoryPathTests(TestCase):
+    """分类完整路径由分类树快照拼接，批量序列化只读取一次分类树版本号"""
+
+    def test_full_path_reads_tree_version_once(self):
+        # 分类变更在事务提交后使分类树快照失效
+        with self.captureOnCommitCallbacks(execute=True):
+            root = Category.objects.create(name='根分类', code='PATH_ROOT')
+            children = [
+                Category.objects.create(name=f'子分类{index}', code=f'PATH_CHILD_{index}', parent=root)
+                for index in range(3)
+            ]
+        with mock.patch(
+            'products.utils.category_tree.get_version', wraps=category_tree.get_version
+        ) as get_version:
+            data = CategorySerializer(Category.objects.order_by('tree_id', 'lft'), many=True).data
+        self.assertEqual(get_version.call_count, 1)
+        self.assertEqual(
+            [item['full_path'] for item in data],
+            ['根分类'] + [category.get_full_path() for category in children],
+        )
+
+
+class AttributeFacetTests(CatalogDataMixin, TestCase):
+    """已选属性的分面计数排除自身条件，其他属性按全部条件计数"""
+
+    def facets(self, query):
+        response = self.client.get(f'/api/products/facets/{query}')
+        self.assertEqual(response.status_code, 200)
+        return {
+            facet['code']: {value['value']: value['count'] for value in facet['values']}
+            for facet in response.json()['facets']
+        }
+
+    def test_selected_attribute_counts_exclude_own_filter(self):
+        color = Attribute.objects.create(name='颜色', code='color', type='select', is_filterable=True)
+        material = Attribute.objects.create(name='材质', code='material', type='text', is_filterable=True)
+        white = AttributeValue.objects.create(attribute=color, value='白')
+        grey = AttributeValue.objects.create(attribute=color, value='灰')
+        for index in range(12):
+            sku = self.create_sku(index)
+            SKUAttributeValue.objects.create(
+                sku=sku, attribute=color, attribute_value=grey if index % 3 == 0 else white
+            )
+            SKUAttributeValue.objects.create(sku=sku, attribute=material, custom_value='实木' if index % 2 else '板材')
+
+        self.assertEqual(self.facets('?attr_material=实木'), {
+            'material': {'实木': 6, '板材': 6},
+            'color': {'白': 4, '灰': 2},
+        })
+        self.assertEqual(self.facets('?attr_material=实木&attr_color=灰'), {
+            'material': {'实木': 2, '板材': 2},
+            'color': {'白': 4, '灰': 2},
+        })
+
+
+class FilterMetadataTests(CatalogDataMixin, TestCase):
+    """筛选器元数据在读取时合并已提交的变更，重算间隔内返回上一次的结果"""
+
+    def setUp(self):
+        cache.clear()
+
+    def histograms(self):
+        response = self.client.get('/api/filters/')
+        self.assertEqual(response.status_code, 200)
+        return response, {int(key): value['count'] for key, value in response.json()['price_histograms'].items()}
+
+    @override_settings(FILTER_METADATA_CONFIG={'refresh_interval': 0})
+    def test_changes_applied_on_read_including_previous_category(self):
+        sku = self.create_sku(1)
+        self.create_sku(2)
+        _, counts = self.histograms()
+        self.assertEqual(counts, {self.category.id: 2})
+
+        # SPU改到其他分类：原分类的直方图由加载时记录的分类得知，保存时不再查询原值
+        other = Category.objects.create(name='其他分类', code='OTHER_CATEGORY')
+        spu = SPU.objects.get(pk=self.spu.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            spu.category = other
+            spu.save()
+        _, counts = self.histograms()
+        self.assertEqual(counts, {other.id: 2})
+
+        self.save_sku(sku, status='inactive')
+        _, counts = self.histograms()
+        self.assertEqual(counts, {other.id: 1})
+
+    @override_settings(FILTER_METADATA_CONFIG={'refresh_interval': 3600})
+    def test_changes_within_interval_keep_previous_result_and_etag(self):
+        self.create_sku(1)
+        response, counts = self.histograms()
+        self.assertEqual(counts, {self.category.id: 1})
+
+        self.create_sku(2)
+        stale, counts = self.histograms()
+        self.assertEqual(counts, {self.category.id: 1})
+        self.assertEqual(stale['ETag'], response['ETag'])
+        self.assertEqual(self.client.get('/api/filters/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        with override_settings(FILTER_METADATA_CONFIG={'refresh_interval': 0}):
+            fresh, counts = self.histograms()
+        self.assertEqual(counts, {self.category.id: 2})
+        self.assertNotEqual(fresh['ETag'], response['ETag'])
+
+
+class AdminBulkActionTests(CatalogDataMixin, TestCase):
+    """后台批量操作用 queryset.update() 更新，更新后同样使条件请求、读模型和筛选器缓存失效"""
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def run_action(self, model_name, action, objects):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/admin/products/{model_name}/', {
+                'action': action, '_selected_action': [obj.pk for obj in objects],
+            })
+        self.assertEqual(response.status_code, 302)
+
+    def assert_changed(self, url, action):
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        action()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_sku_status_action_invalidates_product_etag(self):
+        skus = [self.create_sku(index) for index in range(2)]
+        response = self.assert_changed(
+            '/api/products/?status=active', lambda: self.run_action('sku', 'bulk_set_inactive_action', skus)
+        )
+        self.assertEqual(response.json()['results'], [])
+
+    def test_sku_status_actions_refresh_read_model(self):
+        skus = [self.create_sku(index) for index in range(3)]
+        self.run_action('sku', 'bulk_set_inactive_action', skus[:2])
+        self.assertEqual(list(ProductReadModel.objects.values_list('sku_id', flat=True)), [skus[2].pk])
+        self.run_action('sku', 'bulk_set_active_action', skus[:1])
+        self.assertEqual(
+            sorted(ProductReadModel.objects.values_list('sku_id', flat=True)), [skus[0].pk, skus[2].pk]
+        )
+
+    def test_category_action_invalidates_category_etag(self):
+        response = self.assert_changed(
+            '/api/categories/', lambda: self.run_action('category', 'bulk_deactivate', [self.category])
+        )
+        data = response.json()
+        self.assertNotIn(self.category.pk, [item['id'] for item in data.get('results', data)])
+
+    def test_category_action_invalidates_category_tree(self):
+        child = Category.objects.create(name='子分类', code='LIST_CHILD', parent=self.category)
+        self.client.get('/api/categories/tree/')
+        response = self.assert_changed(
+            '/api/categories/tree/', lambda: self.run_action('category', 'bulk_deactivate', [child])
+        )
+        self.assertEqual([node['children'] for node in response.json() if node['id'] == self.category.pk], [[]])
+
+    @override_settings(FILTER_METADATA_CONFIG={'refresh_interval': 0})
+    def test_bulk_actions_update_filter_metadata(self):
+        skus = [self.create_sku(index) for index in range(2)]
+        filters = self.client.get('/api/filters/').json()
+        self.assertEqual(filters['price_histograms'][str(self.category.pk)]['count'], 2)
+
+        self.run_action('sku', 'bulk_set_inactive_action', skus[:1])
+        self.run_action('category', 'bulk_deactivate', [self.category])
+        filters = self.client.get('/api/filters/').json()
+        self.assertEqual(filters['price_histograms'][str(self.category.pk)]['count'], 1)
+        self.assertNotIn(self.category.pk, [category['id'] for category in filters['categories']])
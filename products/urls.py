@@ -30,6 +30,9 @@ urlpatterns = [
     
     # 动态价格计算API路由
     path('api/pricing/calculate/', views.calculate_dynamic_price, name='calculate_dynamic_price'),
+    path('api/pricing/calculate-batch/', views.calculate_dynamic_price_batch, name='calculate_dynamic_price_batch'),
+    path('api/pricing/spu/<int:spu_id>/matrix/', views.get_spu_price_matrix, name='spu_price_matrix'),
+    path('api/pricing/sku/<int:sku_id>/applicable-rules/', views.get_sku_applicable_rules, name='sku_applicable_rules'),
     
     # 获取SKU尺寸信息
     path('api/sku/<int:sku_id>/dimensions/', views.get_sku_dimensions, name='get_sku_dimensions'),
@@ -3,12 +3,18 @@ AI功能开关管理
 提供动态启用/禁用AI功能的机制，确保系统稳定性
 """
 
+import threading
+import time
 from django.conf import settings
 from django.core.cache import cache
 import logging
 
+from .cache_versions import bump_version, get_version
+
 logger = logging.getLogger(__name__)
 
+FLAGS_VERSION_NAME = 'ai_feature_flags'
+
 
 class AIFeatureFlags:
     """AI功能开关管理器"""
@@ -33,26 +39,78 @@ class AIFeatureFlags:
         SMART_ATTRIBUTES: False,       # 智能属性提取
     }
 
+    # 进程内缓存：TTL内直接使用本地值，过期后只读取一次版本号；
+    # 版本变化（enable/disable/clear_cache）或本地值过旧时才重新批量读取全部开关
+    _local_flags: dict = {}
+    _local_version = None
+    _local_checked_at = 0.0
+    _local_loaded_at = 0.0
+    _local_lock = threading.Lock()
+
+    # 本地值最长保留时间，保证缓存中带过期时间的开关失效后能回落到settings
+    LOCAL_MAX_AGE = 60
+
     @classmethod
-    def is_enabled(cls, feature_name: str) -> bool:
-        """检查功能是否启用"""
-        try:
-            # 优先从缓存获取
-            cache_key = f'ai_feature_{feature_name}'
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                logger.debug(f"从缓存获取AI功能状态 {feature_name}: {cached_value}")
-                return cached_value
+    def _cache_key(cls, feature_name: str) -> str:
+        return f'ai_feature_{feature_name}'
 
-            # 从设置获取
-            ai_features = getattr(settings, 'AI_FEATURES', {})
-            enabled = ai_features.get(feature_name, cls.DEFAULT_FLAGS.get(feature_name, False))
+    @classmethod
+    def _local_ttl(cls) -> float:
+        return getattr(settings, 'AI_FEATURE_FLAGS_LOCAL_TTL', 1.0)
 
-            logger.debug(f"从设置获取AI功能状态 {feature_name}: {enabled}")
+    @classmethod
+    def _load_flags(cls, feature_names) -> dict:
+        """一次往返批量读取开关，缓存中没有的回落到settings"""
+        ai_features = getattr(settings, 'AI_FEATURES', {})
+        cached = cache.get_many([cls._cache_key(name) for name in feature_names])
+
+        flags = {}
+        for name in feature_names:
+            value = cached.get(cls._cache_key(name))
+            if value is None:
+                value = ai_features.get(name, cls.DEFAULT_FLAGS.get(name, False))
+            flags[name] = value
+        return flags
 
-            # 缓存结果（5分钟）
-            cache.set(cache_key, enabled, 300)
-            return enabled
+    @classmethod
+    def _refresh_local(cls, feature_name: str):
+        """TTL过期后校验版本号，必要时重新加载本地开关"""
+        with cls._local_lock:
+            now = time.monotonic()
+            if now - cls._local_checked_at < cls._local_ttl() and feature_name in cls._local_flags:
+                return
+
+            version = get_version(FLAGS_VERSION_NAME)
+            stale = (
+                version != cls._local_version
+                or now - cls._local_loaded_at >= cls.LOCAL_MAX_AGE
+                or feature_name not in cls._local_flags
+            )
+            if stale:
+                names = set(cls.DEFAULT_FLAGS) | set(getattr(settings, 'AI_FEATURES', {})) | {feature_name}
+                cls._local_flags = cls._load_flags(names)
+                cls._local_version = version
+                cls._local_loaded_at = now
+                logger.debug(f"重新加载AI功能开关 v{version}: {cls._local_flags}")
+
+            cls._local_checked_at = now
+
+    @classmethod
+    def _invalidate_local(cls):
+        """递增版本号通知所有进程，并让本进程立即重新加载"""
+        bump_version(FLAGS_VERSION_NAME)
+        with cls._local_lock:
+            cls._local_checked_at = 0.0
+            cls._local_flags = {}
+
+    @classmethod
+    def is_enabled(cls, feature_name: str) -> bool:
+        """检查功能是否启用"""
+        try:
+            if (time.monotonic() - cls._local_checked_at >= cls._local_ttl()
+                    or feature_name not in cls._local_flags):
+                cls._refresh_local(feature_name)
+            return cls._local_flags.get(feature_name, False)
 
         except Exception as e:
             logger.warning(f"获取AI功能开关失败 {feature_name}: {e}")
@@ -61,15 +119,15 @@ class AIFeatureFlags:
     @classmethod
     def enable_feature(cls, feature_name: str):
         """启用功能"""
-        cache_key = f'ai_feature_{feature_name}'
-        cache.set(cache_key, True, 300)
+        cache.set(cls._cache_key(feature_name), True, 300)
+        cls._invalidate_local()
         logger.info(f"AI功能已启用: {feature_name}")
 
     @classmethod
     def disable_feature(cls, feature_name: str):
         """禁用功能"""
-        cache_key = f'ai_feature_{feature_name}'
-        cache.set(cache_key, False, 300)
+        cache.set(cls._cache_key(feature_name), False, 300)
+        cls._invalidate_local()
         logger.info(f"AI功能已禁用: {feature_name}")
 
     @classmethod
@@ -83,9 +141,8 @@ class AIFeatureFlags:
     @classmethod
     def clear_cache(cls):
         """清除所有AI功能的缓存"""
-        for flag_name in cls.DEFAULT_FLAGS.keys():
-            cache_key = f'ai_feature_{flag_name}'
-            cache.delete(cache_key)
+        cache.delete_many([cls._cache_key(flag_name) for flag_name in cls.DEFAULT_FLAGS.keys()])
+        cls._invalidate_local()
         logger.info("AI功能缓存已清除")
 
 
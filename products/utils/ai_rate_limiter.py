@@ -0,0 +1,265 @@
+"""
+AI调用限流与熔断
+提供跨进程共享的令牌桶限流器和熔断器，保护DeepSeek等外部AI接口
+"""
+
+import threading
+import time
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+# 开发环境使用DummyCache时的进程内兜底存储
+_local_state_cache = LocMemCache('ai-rate-limiter', {})
+
+
+def _state_cache():
+    """获取熔断状态存储（DummyCache无法保存状态时退回进程内缓存）"""
+    backend = caches['default']
+    if isinstance(backend, DummyCache):
+        return _local_state_cache
+    return backend
+
+
+def _redis_connection():
+    """获取Redis原生连接，非Redis缓存后端时返回None"""
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except Exception:
+        return None
+
+
+class TokenBucketRateLimiter:
+    """
+    令牌桶限流器
+
+    Redis可用时通过Lua脚本在所有进程间共享同一个桶，
+    否则退化为进程内令牌桶。
+    """
+
+    # 返回需要等待的秒数，0表示已拿到令牌
+    ACQUIRE_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', key, math.ceil(capacity / rate) * 2 + 60)
+return tostring(wait)
+"""
+
+    # 将桶清空到负值，使所有进程一起退避
+    PENALIZE_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local seconds = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('HSET', key, 'tokens', -seconds * rate, 'ts', now)
+redis.call('EXPIRE', key, math.ceil(seconds) + 60)
+return 1
+"""
+
+    def __init__(self, name: str, rate: float, capacity: int):
+        self.name = name
+        self.rate = max(float(rate), 0.001)
+        self.capacity = max(int(capacity), 1)
+        self.key = f'ai_rate_limit:{name}'
+
+        self._redis = _redis_connection()
+        self._acquire_script = None
+        self._penalize_script = None
+        if self._redis is not None:
+            self._acquire_script = self._redis.register_script(self.ACQUIRE_SCRIPT)
+            self._penalize_script = self._redis.register_script(self.PENALIZE_SCRIPT)
+
+        # 进程内令牌桶状态
+        self._lock = threading.Lock()
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+
+    def _try_acquire(self) -> float:
+        """尝试获取一个令牌，返回还需等待的秒数"""
+        if self._acquire_script is not None:
+            try:
+                return float(self._acquire_script(
+                    keys=[self.key], args=[self.rate, self.capacity, 1]
+                ))
+            except Exception as e:
+                logger.warning(f"Redis限流脚本执行失败，退回进程内限流: {e}")
+                self._acquire_script = None
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, max_wait: float = 0.0) -> bool:
+        """获取令牌，最多等待max_wait秒，超时返回False"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """服务端限流（429）时让所有进程共同退避指定秒数"""
+        seconds = max(float(seconds), 0.0)
+        if self._penalize_script is not None:
+            try:
+                self._penalize_script(keys=[self.key], args=[self.rate, seconds])
+                return
+            except Exception as e:
+                logger.warning(f"Redis限流退避脚本执行失败: {e}")
+
+        with self._lock:
+            self._tokens = -seconds * self.rate
+            self._updated_at = time.monotonic()
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败达到阈值后打开，打开期间直接拒绝调用；
+    超过恢复时间后进入半开状态，只放行一个探测请求，成功则关闭，失败则重新打开。
+    状态保存在缓存中，多进程共享。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.recovery_timeout = float(recovery_timeout)
+        self.failures_key = f'ai_circuit:{name}:failures'
+        self.opened_at_key = f'ai_circuit:{name}:opened_at'
+        self.probe_key = f'ai_circuit:{name}:probe'
+
+    @property
+    def state(self) -> str:
+        """当前熔断状态"""
+        opened_at = _state_cache().get(self.opened_at_key)
+        if opened_at is None:
+            return self.CLOSED
+        if time.time() - opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        """是否允许发起调用"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            # 只允许一个进程发起探测请求
+            return _state_cache().add(self.probe_key, 1, timeout=max(self.recovery_timeout, 1))
+        return False
+
+    def record_success(self):
+        """记录调用成功，关闭熔断器"""
+        store = _state_cache()
+        if store.get(self.opened_at_key) is not None:
+            logger.info(f"熔断器 {self.name} 探测成功，恢复调用")
+        store.delete_many([self.failures_key, self.opened_at_key, self.probe_key])
+
+    def record_failure(self):
+        """记录调用失败，必要时打开熔断器"""
+        store = _state_cache()
+
+        if self.state == self.HALF_OPEN:
+            self._trip(store)
+            return
+
+        store.add(self.failures_key, 0, timeout=None)
+        try:
+            failures = store.incr(self.failures_key)
+        except ValueError:
+            store.set(self.failures_key, 1, timeout=None)
+            failures = 1
+
+        if failures >= self.failure_threshold and store.get(self.opened_at_key) is None:
+            self._trip(store)
+
+    def _trip(self, store):
+        """打开熔断器"""
+        store.set(self.opened_at_key, time.time(), timeout=None)
+        store.delete(self.probe_key)
+        logger.warning(
+            f"熔断器 {self.name} 已打开，{self.recovery_timeout:.0f}秒内调用将直接降级"
+        )
+
+    def reset(self):
+        """手动重置熔断器"""
+        _state_cache().delete_many([self.failures_key, self.opened_at_key, self.probe_key])
+
+
+_deepseek_rate_limiter: Optional[TokenBucketRateLimiter] = None
+_deepseek_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def get_deepseek_rate_limiter() -> TokenBucketRateLimiter:
+    """获取DeepSeek共享限流器"""
+    global _deepseek_rate_limiter
+
+    if _deepseek_rate_limiter is None:
+        config = getattr(settings, 'DEEPSEEK_CONFIG', {})
+        _deepseek_rate_limiter = TokenBucketRateLimiter(
+            'deepseek',
+            rate=config.get('rate_limit_per_second', 5),
+            capacity=config.get('rate_limit_burst', 10),
+        )
+    return _deepseek_rate_limiter
+
+
+def get_deepseek_circuit_breaker() -> CircuitBreaker:
+    """获取DeepSeek共享熔断器"""
+    global _deepseek_circuit_breaker
+
+    if _deepseek_circuit_breaker is None:
+        config = getattr(settings, 'DEEPSEEK_CONFIG', {})
+        _deepseek_circuit_breaker = CircuitBreaker(
+            'deepseek',
+            failure_threshold=config.get('circuit_failure_threshold', 5),
+            recovery_timeout=config.get('circuit_recovery_timeout', 30),
+        )
+    return _deepseek_circuit_breaker
+
+
+def parse_retry_after(value: Optional[str], default: float) -> float:
+    """解析Retry-After响应头（秒数），无效时返回默认值"""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,169 @@
+"""
+AI调用用量统计与预算控制
+按导入任务（contextvar）和按自然日（缓存计数器）累计token用量，
+达到预算后停止调用LLM，由调用方降级为规则处理
+"""
+
+import threading
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = ('prompt_tokens', 'completion_tokens', 'total_tokens', 'calls', 'budget_skipped')
+
+# 日计数器保留两天，跨零点时仍可查询前一天
+DAILY_COUNTER_TIMEOUT = 2 * 24 * 3600
+
+# 开发环境使用DummyCache时的进程内兜底存储
+_local_usage_cache = LocMemCache('ai-usage', {})
+
+
+def _usage_cache():
+    """获取用量计数存储（DummyCache无法保存状态时退回进程内缓存）"""
+    backend = caches['default']
+    if isinstance(backend, DummyCache):
+        return _local_usage_cache
+    return backend
+
+
+def _budget_config() -> Dict[str, Any]:
+    return getattr(settings, 'AI_USAGE_BUDGET', {})
+
+
+class UsageAccumulator:
+    """单次导入的用量累计"""
+
+    def __init__(self, token_budget: int = 0):
+        self.token_budget = token_budget
+        self._lock = threading.Lock()
+        self.counts = {field: 0 for field in USAGE_FIELDS}
+
+    def add(self, **amounts):
+        with self._lock:
+            for field, amount in amounts.items():
+                self.counts[field] += int(amount or 0)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.token_budget > 0 and self.counts['total_tokens'] >= self.token_budget
+
+    def to_summary(self, total_rows: int) -> Dict[str, Any]:
+        """生成写入导入结果摘要的用量报告"""
+        cost = estimate_cost(self.counts['prompt_tokens'], self.counts['completion_tokens'])
+        return {
+            **self.counts,
+            'token_budget': self.token_budget,
+            'budget_exhausted': self.exhausted,
+            'estimated_cost': round(cost, 4),
+            'currency': _budget_config().get('currency', 'CNY'),
+            'tokens_per_row': round(self.counts['total_tokens'] / total_rows, 1) if total_rows else 0,
+            'cost_per_1k_rows': round(cost / total_rows * 1000, 4) if total_rows else 0,
+        }
+
+
+_current_usage: ContextVar[Optional[UsageAccumulator]] = ContextVar('ai_import_usage', default=None)
+
+
+@contextmanager
+def track_import_usage(token_budget: Optional[int] = None):
+    """在上下文内累计本次导入的AI用量"""
+    if token_budget is None:
+        token_budget = _budget_config().get('import_token_budget', 0)
+    accumulator = UsageAccumulator(token_budget)
+    token = _current_usage.set(accumulator)
+    try:
+        yield accumulator
+    finally:
+        _current_usage.reset(token)
+
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """按配置的千token单价估算费用"""
+    config = _budget_config()
+    return (
+        prompt_tokens / 1000 * config.get('price_per_1k_prompt_tokens', 0)
+        + completion_tokens / 1000 * config.get('price_per_1k_completion_tokens', 0)
+    )
+
+
+def _daily_key(field: str, day=None) -> str:
+    day = day or timezone.localdate()
+    return f'ai_usage:{day.isoformat()}:{field}'
+
+
+def _incr_daily(field: str, amount: int):
+    if not amount:
+        return
+    store = _usage_cache()
+    key = _daily_key(field)
+    try:
+        store.add(key, 0, timeout=DAILY_COUNTER_TIMEOUT)
+        store.incr(key, amount)
+    except ValueError:
+        store.set(key, amount, timeout=DAILY_COUNTER_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"更新AI日用量计数失败: {e}")
+
+
+def record_usage(usage: Optional[Dict[str, Any]]):
+    """记录一次成功调用的token用量"""
+    usage = usage or {}
+    prompt_tokens = int(usage.get('prompt_tokens') or 0)
+    completion_tokens = int(usage.get('completion_tokens') or 0)
+    total_tokens = int(usage.get('total_tokens') or prompt_tokens + completion_tokens)
+
+    accumulator = _current_usage.get()
+    if accumulator is not None:
+        accumulator.add(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                        total_tokens=total_tokens, calls=1)
+
+    _incr_daily('prompt_tokens', prompt_tokens)
+    _incr_daily('completion_tokens', completion_tokens)
+    _incr_daily('total_tokens', total_tokens)
+    _incr_daily('calls', 1)
+
+
+def get_daily_usage(day=None) -> Dict[str, int]:
+    """查询某天（默认今天）的累计用量"""
+    keys = {field: _daily_key(field, day) for field in USAGE_FIELDS}
+    try:
+        values = _usage_cache().get_many(list(keys.values()))
+    except Exception as e:
+        logger.warning(f"读取AI日用量失败: {e}")
+        values = {}
+    return {field: int(values.get(key) or 0) for field, key in keys.items()}
+
+
+def is_budget_exhausted() -> bool:
+    """
+    检查是否已达到预算（导入预算或日预算，0表示不限）
+
+    达到预算时记录一次跳过，调用方应降级为规则处理。
+    """
+    accumulator = _current_usage.get()
+    exhausted = accumulator is not None and accumulator.exhausted
+
+    if not exhausted:
+        daily_budget = _budget_config().get('daily_token_budget', 0)
+        if daily_budget > 0:
+            try:
+                used = _usage_cache().get(_daily_key('total_tokens')) or 0
+            except Exception as e:
+                logger.warning(f"读取AI日用量失败: {e}")
+                used = 0
+            exhausted = used >= daily_budget
+
+    if exhausted:
+        if accumulator is not None:
+            accumulator.add(budget_skipped=1)
+        _incr_daily('budget_skipped', 1)
+    return exhausted
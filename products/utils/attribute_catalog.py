@@ -0,0 +1,142 @@
+"""
+属性目录快照
+在进程内保存属性及属性值的只读快照，按目录版本号重建，
+供智能属性、质量检测和属性映射等服务共享，避免每个产品都查询一次属性表
+"""
+
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from .cache_versions import bump_version, get_versions
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_NAME = 'attribute_catalog'
+# 只新增属性值时递增，快照超过 catalog_values_max_age 后才为新值重建
+CATALOG_VALUES_VERSION_NAME = 'attribute_catalog_values'
+
+
+class AttributeCatalogSnapshot:
+    """属性目录的只读快照"""
+
+    def __init__(self, version: int, attributes: List[Dict[str, Any]],
+                 values: List[Tuple[int, int, str]], values_version: int = 0):
+        self.version = version
+        self.values_version = values_version
+        self.built_at = time.time()
+        self.built_monotonic = time.monotonic()
+        self.attributes = attributes
+        self.by_id: Dict[int, Dict[str, Any]] = {attr['id']: attr for attr in attributes}
+        self.by_code: Dict[str, Dict[str, Any]] = {attr['code']: attr for attr in attributes}
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        for attr in attributes:
+            self.by_name.setdefault(attr['name'], attr)
+
+        self.values_by_attribute: Dict[int, List[Tuple[int, str]]] = {}
+        self.value_ids: Dict[Tuple[int, str], int] = {}
+        self.value_by_id: Dict[int, str] = {}
+        for value_id, attribute_id, value in values:
+            self.values_by_attribute.setdefault(attribute_id, []).append((value_id, value))
+            self.value_ids[(attribute_id, value)] = value_id
+            self.value_by_id[value_id] = value
+
+    def get_values(self, attribute_id: int) -> List[Tuple[int, str]]:
+        """获取属性下的全部 (属性值ID, 属性值)"""
+        return self.values_by_attribute.get(attribute_id, [])
+
+    def get_value_id(self, attribute_id: int, value: str) -> Optional[int]:
+        """精确查找属性值ID"""
+        return self.value_ids.get((attribute_id, value))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """快照统计信息"""
+        return {
+            'version': self.version,
+            'values_version': self.values_version,
+            'built_at': self.built_at,
+            'attributes_count': len(self.attributes),
+            'values_count': len(self.value_ids),
+        }
+
+
+_snapshot: Optional[AttributeCatalogSnapshot] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _check_interval() -> float:
+    config = getattr(settings, 'SMART_ATTRIBUTES_CONFIG', {})
+    return config.get('catalog_version_check_interval', 1.0)
+
+
+def _values_max_age() -> float:
+    config = getattr(settings, 'SMART_ATTRIBUTES_CONFIG', {})
+    return config.get('catalog_values_max_age', 60.0)
+
+
+def _is_stale(snapshot: AttributeCatalogSnapshot, version: int, values_version: int, now: float) -> bool:
+    age = now - snapshot.built_monotonic
+    if age < _check_interval():
+        return False
+    if snapshot.version != version:
+        return True
+    return snapshot.values_version != values_version and age >= _values_max_age()
+
+
+def _build_snapshot(version: int, values_version: int = 0) -> AttributeCatalogSnapshot:
+    from products.models import Attribute, AttributeValue
+
+    attributes = list(Attribute.objects.all().values(
+        'id', 'name', 'code', 'type', 'unit', 'is_filterable', 'order'
+    ))
+    values = list(AttributeValue.objects.values_list('id', 'attribute_id', 'value'))
+    snapshot = AttributeCatalogSnapshot(version, attributes, values, values_version)
+    logger.debug(
+        f"重建属性目录快照 v{version}.{values_version}: {len(attributes)}个属性, {len(values)}个属性值"
+    )
+    return snapshot
+
+
+def get_attribute_catalog() -> AttributeCatalogSnapshot:
+    """
+    获取当前属性目录快照
+
+    版本号检查和快照重建都按 catalog_version_check_interval 节流；
+    只新增了属性值时（导入过程中逐行新建），快照最长滞后 catalog_values_max_age 才重建。
+    快照中的主键可能已失效，写入方（如SmartAttributeMapper）须先校验或走get_or_create。
+    """
+    global _snapshot, _checked_at
+
+    snapshot = _snapshot
+    now = time.monotonic()
+    if snapshot is not None and now - _checked_at < _check_interval():
+        return snapshot
+
+    versions = get_versions([CATALOG_VERSION_NAME, CATALOG_VALUES_VERSION_NAME])
+    version, values_version = versions[CATALOG_VERSION_NAME], versions[CATALOG_VALUES_VERSION_NAME]
+    if snapshot is not None and not _is_stale(snapshot, version, values_version, now):
+        _checked_at = now
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _is_stale(_snapshot, version, values_version, time.monotonic()):
+            _snapshot = _build_snapshot(version, values_version)
+        _checked_at = time.monotonic()
+        return _snapshot
+
+
+def invalidate_attribute_catalog():
+    """属性目录变更后递增版本号，本进程下次访问时立即检查版本"""
+    global _checked_at
+
+    bump_version(CATALOG_VERSION_NAME)
+    _checked_at = 0.0
+
+
+def mark_attribute_values_added():
+    """新增属性值提交后递增新值版本号，不立即触发各进程重建快照"""
+    bump_version(CATALOG_VALUES_VERSION_NAME)
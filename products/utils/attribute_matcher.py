@@ -0,0 +1,189 @@
+"""
+属性模糊匹配器
+基于属性目录快照维护常驻内存的n-gram相似度索引，
+快照版本变化时重建；属性值很多时优先使用PostgreSQL pg_trgm召回
+"""
+
+import threading
+import logging
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .attribute_catalog import AttributeCatalogSnapshot, get_attribute_catalog
+from .similarity_index import NGramSimilarityIndex
+
+logger = logging.getLogger(__name__)
+
+
+class AttributeMatcher:
+    """属性名/属性值相似度匹配器（进程内单例）"""
+
+    def __init__(self):
+        config = getattr(settings, 'SMART_ATTRIBUTES_CONFIG', {})
+        # 属性值数量超过该值时改用pg_trgm召回，避免在内存中为超大属性建索引
+        self.trigram_min_values = config.get('trigram_min_values', 5000)
+        self.trigram_candidate_limit = config.get('trigram_candidate_limit', 20)
+        # pg_trgm召回阈值（% 运算符），低于精排阈值，保证候选覆盖
+        self.trigram_similarity_threshold = config.get('trigram_similarity_threshold', 0.3)
+
+        self._lock = threading.RLock()
+        self._catalog: Optional[AttributeCatalogSnapshot] = None
+        self._name_index: Optional[NGramSimilarityIndex] = None
+        self._value_indexes: Dict[int, NGramSimilarityIndex] = {}
+        self._trigram_attributes: set = set()
+        self._trigram_available: Optional[bool] = None
+
+    # ------------------------------------------------------------------
+    # 属性名
+    # ------------------------------------------------------------------
+
+    def _sync(self) -> AttributeCatalogSnapshot:
+        """目录快照重建后丢弃全部索引"""
+        catalog = get_attribute_catalog()
+        if catalog is not self._catalog:
+            with self._lock:
+                if catalog is not self._catalog:
+                    self._name_index = None
+                    self._value_indexes = {}
+                    self._trigram_attributes = set()
+                    self._catalog = catalog
+        return catalog
+
+    def _get_name_index(self) -> NGramSimilarityIndex:
+        catalog = self._sync()
+        index = self._name_index
+        if index is None:
+            with self._lock:
+                if self._name_index is None:
+                    index = NGramSimilarityIndex()
+                    index.extend((attr['name'], attr) for attr in catalog.attributes)
+                    self._name_index = index
+                index = self._name_index
+        return index
+
+    def match_attribute(self, name: str, threshold: float,
+                        top_k: int = 1) -> List[Dict[str, Any]]:
+        """返回相似度不低于阈值的属性（附带score），按相似度降序"""
+        try:
+            return [
+                dict(attr, score=score)
+                for score, attr in self._get_name_index().search(name, threshold, top_k)
+            ]
+        except Exception as e:
+            logger.error(f"属性名匹配失败: {e}")
+            return []
+
+    # ------------------------------------------------------------------
+    # 属性值
+    # ------------------------------------------------------------------
+
+    def _is_trigram_available(self) -> bool:
+        """检测当前数据库是否安装了pg_trgm扩展"""
+        if self._trigram_available is None:
+            available = False
+            if connection.vendor == 'postgresql':
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                        available = cursor.fetchone() is not None
+                except Exception as e:
+                    logger.warning(f"检测pg_trgm扩展失败: {e}")
+            self._trigram_available = available
+        return self._trigram_available
+
+    def _get_value_index(self, attribute_id: int) -> Optional[NGramSimilarityIndex]:
+        """获取属性值索引，属性值过多且可用pg_trgm时返回None"""
+        catalog = self._sync()
+        index = self._value_indexes.get(attribute_id)
+        if index is not None or attribute_id in self._trigram_attributes:
+            return index
+
+        with self._lock:
+            if attribute_id in self._value_indexes:
+                return self._value_indexes[attribute_id]
+
+            values = catalog.get_values(attribute_id)
+            if len(values) >= self.trigram_min_values and self._is_trigram_available():
+                self._trigram_attributes.add(attribute_id)
+                return None
+
+            index = NGramSimilarityIndex()
+            index.extend((value, {'id': value_id, 'value': value}) for value_id, value in values)
+            self._value_indexes[attribute_id] = index
+            return index
+
+    def _trigram_search(self, attribute_id: int, value: str, threshold: float,
+                        top_k: int) -> List[Dict[str, Any]]:
+        """用pg_trgm召回候选，再按SequenceMatcher精排，保持与内存索引相同的评分口径"""
+        from django.contrib.postgres.lookups import TrigramSimilar
+        from django.contrib.postgres.search import TrigramSimilarity
+        from django.db.models import F
+        from products.models import AttributeValue
+
+        exact = AttributeValue.objects.filter(
+            attribute_id=attribute_id, value=value
+        ).values('id', 'value').first()
+        if exact:
+            return [dict(exact, score=1.0)]
+
+        # % 运算符（trigram_similar）可走 gin_trgm_ops 索引筛掉不相似的值，
+        # 阈值用 SET LOCAL 设置，只在当前事务内生效
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+                    [str(self.trigram_similarity_threshold)]
+                )
+            candidates = list(
+                AttributeValue.objects.filter(
+                    TrigramSimilar(F('value'), value), attribute_id=attribute_id
+                ).annotate(
+                    similarity=TrigramSimilarity('value', value)
+                ).order_by('-similarity').values('id', 'value')[:self.trigram_candidate_limit]
+            )
+
+        results = []
+        for item in candidates:
+            score = SequenceMatcher(None, value, item['value']).ratio()
+            if score >= threshold:
+                results.append(dict(item, score=score))
+        results.sort(key=lambda item: -item['score'])
+        return results[:top_k]
+
+    def match_value(self, attribute_id: int, value: str, threshold: float,
+                    top_k: int = 1) -> List[Dict[str, Any]]:
+        """返回指定属性下相似度不低于阈值的属性值（附带score），按相似度降序"""
+        try:
+            index = self._get_value_index(attribute_id)
+            if index is None:
+                return self._trigram_search(attribute_id, value, threshold, top_k)
+            return [
+                dict(item, score=score)
+                for score, item in index.search(value, threshold, top_k)
+            ]
+        except Exception as e:
+            logger.error(f"属性值匹配失败: {e}")
+            return []
+
+    def clear(self):
+        """清空全部索引，下次匹配时按当前目录快照重建"""
+        with self._lock:
+            self._catalog = None
+            self._name_index = None
+            self._value_indexes = {}
+            self._trigram_attributes = set()
+
+
+_attribute_matcher: Optional[AttributeMatcher] = None
+
+
+def get_attribute_matcher() -> AttributeMatcher:
+    """获取属性匹配器单例"""
+    global _attribute_matcher
+
+    if _attribute_matcher is None:
+        _attribute_matcher = AttributeMatcher()
+    return _attribute_matcher
@@ -0,0 +1,83 @@
+"""
+缓存版本计数器
+数据变更时递增版本号，各进程通过比较版本号判断本地缓存是否过期
+"""
+
+import time
+import logging
+from typing import Dict, Iterable
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+# 开发环境使用DummyCache时的进程内兜底存储
+_local_version_cache = LocMemCache('cache-versions', {})
+
+
+def _version_cache():
+    """获取版本号存储（DummyCache无法保存状态时退回进程内缓存）"""
+    backend = caches['default']
+    if isinstance(backend, DummyCache):
+        return _local_version_cache
+    return backend
+
+
+def _version_key(name: str) -> str:
+    return f'cache_version:{name}'
+
+
+def _initial_version() -> int:
+    # 版本号丢失（如Redis淘汰）后以当前时间重新起步，避免与进程内旧版本号重合
+    return int(time.time() * 1000)
+
+
+def get_version(name: str) -> int:
+    """获取指定命名空间的当前版本号"""
+    store = _version_cache()
+    key = _version_key(name)
+    try:
+        version = store.get(key)
+        if version is None:
+            store.add(key, _initial_version(), timeout=None)
+            version = store.get(key)
+        return int(version)
+    except Exception as e:
+        logger.warning(f"读取缓存版本号失败 {name}: {e}")
+        return 0
+
+
+def get_versions(names: Iterable[str]) -> Dict[str, int]:
+    """批量获取版本号，缺失的命名空间会被初始化"""
+    names = list(names)
+    store = _version_cache()
+    try:
+        found = store.get_many([_version_key(name) for name in names])
+    except Exception as e:
+        logger.warning(f"批量读取缓存版本号失败: {e}")
+        found = {}
+
+    versions = {}
+    for name in names:
+        version = found.get(_version_key(name))
+        versions[name] = int(version) if version is not None else get_version(name)
+    return versions
+
+
+def bump_version(name: str) -> int:
+    """递增版本号，使所有进程中依赖该命名空间的缓存失效"""
+    store = _version_cache()
+    key = _version_key(name)
+    try:
+        store.add(key, _initial_version(), timeout=None)
+        return int(store.incr(key))
+    except ValueError:
+        # add与incr之间版本号被淘汰
+        version = _initial_version()
+        store.set(key, version, timeout=None)
+        return version
+    except Exception as e:
+        logger.warning(f"递增缓存版本号失败 {name}: {e}")
+        return 0
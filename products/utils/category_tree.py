@@ -0,0 +1,230 @@
+"""
+分类子树索引
+按分类树版本号缓存全部分类的 (tree_id, lft, rght)、父分类和名称，
+子树筛选转为对 tree_id 和 lft 区间的一次连接查询，后代ID集合和完整路径在内存中计算并缓存，
+完整的嵌套分类树按版本号缓存为序列化后的JSON；分类保存、删除、移动或重建树时递增版本号
+"""
+
+import logging
+import threading
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .cache_versions import bump_version, get_version
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_TREE_VERSION = 'category_tree'
+
+
+class CategoryTreeIndex:
+    """分类树的只读快照"""
+
+    def __init__(self, version: int, nodes: Dict[int, Tuple[int, int, int, Optional[int], str]]):
+        self.version = version
+        self.bounds: Dict[int, Tuple[int, int, int]] = {
+            category_id: node[:3] for category_id, node in nodes.items()
+        }
+        self.parents: Dict[int, Optional[int]] = {category_id: node[3] for category_id, node in nodes.items()}
+        self.names: Dict[int, str] = {category_id: node[4] for category_id, node in nodes.items()}
+        self._descendants: Dict[int, FrozenSet[int]] = {}
+        self._paths: Dict[int, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def get_path_names(self, category_id: int) -> Tuple[str, ...]:
+        """从根分类到该分类的名称序列，分类不存在时为空"""
+        path = self._paths.get(category_id)
+        if path is not None:
+            return path
+        names = []
+        current = category_id
+        while current is not None and current in self.names and len(names) <= len(self.names):
+            names.append(self.names[current])
+            current = self.parents.get(current)
+        path = tuple(reversed(names))
+        with self._lock:
+            self._paths[category_id] = path
+        return path
+
+    def get_descendant_ids(self, category_id: int) -> FrozenSet[int]:
+        """分类自身及全部后代的ID，分类不存在时为空集"""
+        ids = self._descendants.get(category_id)
+        if ids is not None:
+            return ids
+        node = self.bounds.get(category_id)
+        if node is None:
+            return frozenset()
+        tree_id, lft, rght = node
+        ids = frozenset(
+            other_id for other_id, (other_tree, other_lft, _) in self.bounds.items()
+            if other_tree == tree_id and lft <= other_lft <= rght
+        )
+        with self._lock:
+            self._descendants[category_id] = ids
+        return ids
+
+
+_index: Optional[CategoryTreeIndex] = None
+
+
+def _build_index(version: int) -> CategoryTreeIndex:
+    from products.models import Category
+
+    key = f'category_tree:nodes:{version}'
+    try:
+        nodes = cache.get(key)
+    except Exception as e:
+        logger.warning(f"读取分类树缓存失败: {e}")
+        nodes = None
+
+    if nodes is None:
+        nodes = {
+            row[0]: row[1:]
+            for row in Category.objects.values_list('id', 'tree_id', 'lft', 'rght', 'parent_id', 'name')
+        }
+        try:
+            cache.set(key, nodes, None)
+        except Exception as e:
+            logger.warning(f"写入分类树缓存失败: {e}")
+    return CategoryTreeIndex(version, nodes)
+
+
+def get_category_tree_index() -> CategoryTreeIndex:
+    """获取当前版本的分类树快照"""
+    global _index
+
+    version = get_version(CATEGORY_TREE_VERSION)
+    index = _index
+    if index is None or index.version != version:
+        index = _build_index(version)
+        _index = index
+    return index
+
+
+def _category_id(category) -> Optional[int]:
+    try:
+        return int(getattr(category, 'pk', category))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_descendant_ids(category, include_self: bool = True) -> FrozenSet[int]:
+    """分类（实例或ID）的后代ID集合"""
+    category_id = _category_id(category)
+    if category_id is None:
+        return frozenset()
+    ids = get_category_tree_index().get_descendant_ids(category_id)
+    return ids if include_self else ids - {category_id}
+
+
+def get_category_path(category, separator: str = ' > ', index: Optional[CategoryTreeIndex] = None) -> str:
+    """
+    分类完整路径（与 TreeMixin.get_full_path 相同格式），在内存中计算
+
+    Args:
+        index: 已获取的分类树快照；批量计算时由调用方获取一次后传入，避免逐个读取版本号
+    """
+    category_id = _category_id(category)
+    if category_id is None:
+        return ''
+    if index is None:
+        index = get_category_tree_index()
+    return separator.join(index.get_path_names(category_id))
+
+
+def subtree_q(category, field: str = 'category') -> Optional[Q]:
+    """
+    子树筛选条件：category 为分类实例或ID，field 指向分类外键（如 'spu__category'），
+    生成 tree_id 相等且 lft 落在该分类 [lft, rght] 区间内的条件；分类不存在时返回None
+    """
+    if getattr(category, 'lft', None) is not None:
+        # 已加载的分类实例直接使用其自身的树字段
+        node = (category.tree_id, category.lft, category.rght)
+    else:
+        category_id = _category_id(category)
+        node = get_category_tree_index().bounds.get(category_id) if category_id is not None else None
+    if node is None:
+        return None
+    tree_id, lft, rght = node
+    return Q(**{
+        f'{field}__tree_id': tree_id,
+        f'{field}__lft__gte': lft,
+        f'{field}__lft__lte': rght,
+    })
+
+
+def build_category_tree() -> List[Dict]:
+    """
+    完整的嵌套分类树（仅启用的分类，停用分类连同其子树不出现）
+
+    按 (tree_id, lft) 一次查询全部分类，父节点总在子节点之前，单次遍历即可挂接，
+    兄弟节点顺序即 MPTT 的插入顺序（order, name）
+    """
+    from products.models import Category
+    from products.serializers import CategorySerializer
+
+    categories = Category.objects.filter(is_active=True).order_by('tree_id', 'lft')
+    nodes: Dict[int, Dict] = {}
+    roots: List[Dict] = []
+    for item in CategorySerializer(categories, many=True).data:
+        item['children'] = []
+        nodes[item['id']] = item
+        if item['parent'] is None:
+            roots.append(item)
+        elif item['parent'] in nodes:
+            nodes[item['parent']]['children'].append(item)
+    return roots
+
+
+def category_tree_etag(version: Optional[int] = None) -> str:
+    """分类树ETag，随分类树版本号变化"""
+    if version is None:
+        version = get_version(CATEGORY_TREE_VERSION)
+    return f'"category-tree-{version}"'
+
+
+_tree_json: Optional[Tuple[int, bytes]] = None
+
+
+def get_category_tree_json() -> Tuple[int, bytes]:
+    """
+    当前版本的完整分类树JSON
+
+    Returns:
+        (版本号, JSON字节串)；进程内与Redis各缓存一份，版本号变化后重新生成
+    """
+    global _tree_json
+    from rest_framework.renderers import JSONRenderer
+
+    version = get_version(CATEGORY_TREE_VERSION)
+    cached = _tree_json
+    if cached is not None and cached[0] == version:
+        return cached
+
+    key = f'category_tree:json:{version}'
+    try:
+        content = cache.get(key)
+    except Exception as e:
+        logger.warning(f"读取分类树JSON缓存失败: {e}")
+        content = None
+
+    if content is None:
+        content = JSONRenderer().render(build_category_tree())
+        try:
+            cache.set(key, content, None)
+        except Exception as e:
+            logger.warning(f"写入分类树JSON缓存失败: {e}")
+
+    _tree_json = (version, content)
+    return _tree_json
+
+
+def invalidate_category_tree():
+    """分类变更后递增版本号（子树索引和分类树JSON同时失效）"""
+    global _index, _tree_json
+
+    bump_version(CATEGORY_TREE_VERSION)
+    _index = None
+    _tree_json = None
@@ -0,0 +1,65 @@
+"""
+API条件请求
+每类资源（产品、分类）一个版本号，数据变更提交后递增；
+ETag由请求URL和相关资源的版本号生成，客户端携带的 If-None-Match 未变化时
+直接返回304，不执行查询集和序列化（筛选器按其缓存条目的内容标记生成ETag）
+"""
+
+import hashlib
+import logging
+from functools import wraps
+from typing import Iterable
+
+from django.utils.cache import get_conditional_response
+
+from .cache_versions import bump_version, get_versions
+from .category_tree import CATEGORY_TREE_VERSION
+
+logger = logging.getLogger(__name__)
+
+PRODUCTS_VERSION = 'api_products'
+# 分类接口只依赖分类表，直接沿用分类树版本号（任何分类变更都会递增）
+CATEGORIES_VERSION = CATEGORY_TREE_VERSION
+
+
+def request_etag(request, tokens: Iterable[str]) -> str:
+    """同一URL（含查询参数）和Accept在给定标记不变时ETag不变"""
+    source = '|'.join([
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+    ] + list(tokens))
+    return f'"{hashlib.md5(source.encode("utf-8")).hexdigest()}"'
+
+
+def resource_etag(request, version_names: Iterable[str]) -> str:
+    """同一URL（含查询参数）和Accept在相关版本号不变时ETag不变"""
+    versions = get_versions(version_names)
+    return request_etag(request, [f'{name}={version}' for name, version in sorted(versions.items())])
+
+
+def conditional_on_versions(*version_names: str):
+    """
+    视图集方法装饰器：按资源版本号处理 If-None-Match
+
+    版本号在执行视图前读取，处理期间数据若有变更，返回的ETag偏旧，
+    客户端下次请求时会因版本号已递增而拿到完整响应，不会一直使用过期数据。
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            etag = resource_etag(request, version_names)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200 and not response.has_header('ETag'):
+                response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_resources(*version_names: str):
+    """数据变更后递增相关资源的版本号"""
+    for name in version_names:
+        bump_version(name)
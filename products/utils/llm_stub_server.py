@@ -0,0 +1,227 @@
+"""
+本地LLM桩服务
+提供与DeepSeek/OpenAI兼容的 /v1/chat/completions 接口，
+可配置延迟、错误率和429限流行为，用于离线测试和压测AI导入流程
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from .llm_transport import LLMFixtureStore
+
+logger = logging.getLogger(__name__)
+
+
+class StubBehavior:
+    """桩服务行为配置与运行统计"""
+
+    def __init__(self, latency_ms: float = 200, jitter_ms: float = 50,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 rps_limit: float = 0.0, retry_after: float = 1.0,
+                 seed: Optional[int] = None, fixture_store: Optional[LLMFixtureStore] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rps_limit = rps_limit
+        self.retry_after = retry_after
+        self.fixture_store = fixture_store
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self.stats = {
+            'requests': 0,
+            'success': 0,
+            'errors': 0,
+            'rate_limited': 0,
+            'fixture_hits': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+        }
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def decide(self) -> Dict[str, Any]:
+        """决定本次请求的延迟和结果：ok / error / rate_limited"""
+        with self._lock:
+            self.stats['requests'] += 1
+            latency = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms))
+
+            # 按秒窗口模拟服务端QPS限制
+            if self.rps_limit > 0:
+                now = time.monotonic()
+                if now - self._window_start >= 1:
+                    self._window_start = now
+                    self._window_count = 0
+                self._window_count += 1
+                if self._window_count > self.rps_limit:
+                    return {'latency': latency, 'outcome': 'rate_limited'}
+
+            roll = self._random.random()
+            if roll < self.rate_limit_rate:
+                return {'latency': latency, 'outcome': 'rate_limited'}
+            if roll < self.rate_limit_rate + self.error_rate:
+                return {'latency': latency, 'outcome': 'error'}
+            return {'latency': latency, 'outcome': 'ok'}
+
+
+def _estimate_tokens(text: str) -> int:
+    # 粗略估算：中文约1字1token，英文约4字符1token
+    chinese = len(re.findall(r'[一-鿿]', text))
+    return chinese + max(0, len(text) - chinese) // 4 + 1
+
+
+def synthesize_content(messages: List[Dict[str, str]]) -> str:
+    """按提示词中的任务类型生成结构正确的JSON内容"""
+    system = ' '.join(m.get('content', '') for m in messages if m.get('role') == 'system')
+    user = ' '.join(m.get('content', '') for m in messages if m.get('role') != 'system')
+
+    if '"completed_attributes"' in system:
+        return json.dumps({'completed_attributes': [
+            {'name': '材质', 'value': '多层实木板', 'confidence': 0.8}
+        ]}, ensure_ascii=False)
+
+    if '"issues"' in system or '"issues"' in user:
+        return json.dumps({'issues': []}, ensure_ascii=False)
+
+    if '"attributes"' in system:
+        attributes = []
+        width = re.search(r'(\d{2,3})\s*(?:cm|厘米)', user)
+        if width:
+            attributes.append({'name': '宽度', 'value': width.group(1), 'unit': 'cm', 'confidence': 0.95})
+        attributes.append({'name': '材质', 'value': '实木', 'confidence': 0.9})
+        return json.dumps({'attributes': attributes}, ensure_ascii=False)
+
+    if '属性名:' in user and '属性值:' in user:
+        name = re.search(r'属性名:\s*(.+)', user)
+        value = re.search(r'属性值:\s*(.+)', user)
+        attr_name = name.group(1).strip() if name else '未知属性'
+        attr_value = value.group(1).strip() if value else ''
+        return json.dumps({
+            'display_name': attr_name,
+            'display_value': attr_value,
+            'attribute_type': 'number' if re.fullmatch(r'[\d.]+', attr_value or 'x') else 'text',
+            'filterable': True,
+            'importance': 3,
+            'confidence': 0.85
+        }, ensure_ascii=False)
+
+    return json.dumps({'result': 'ok'}, ensure_ascii=False)
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """chat/completions 请求处理"""
+
+    server_version = 'StubLLM/1.0'
+    behavior: StubBehavior = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, self.behavior.stats)
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (ValueError, TypeError):
+            self._send_json(400, {'error': {'message': 'invalid json'}})
+            return
+
+        behavior = self.behavior
+        decision = behavior.decide()
+        time.sleep(decision['latency'] / 1000)
+
+        if decision['outcome'] == 'rate_limited':
+            behavior._count('rate_limited')
+            self._send_json(
+                429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_error'}},
+                {'Retry-After': f'{behavior.retry_after:g}'}
+            )
+            return
+
+        if decision['outcome'] == 'error':
+            behavior._count('errors')
+            self._send_json(500, {'error': {'message': 'Internal server error', 'type': 'server_error'}})
+            return
+
+        if behavior.fixture_store is not None:
+            recorded = behavior.fixture_store.load(payload)
+            if recorded is not None:
+                behavior._count('fixture_hits')
+                behavior._count('success')
+                self._send_json(200, recorded)
+                return
+
+        messages = payload.get('messages', [])
+        content = synthesize_content(messages)
+        prompt_tokens = sum(_estimate_tokens(m.get('content', '')) for m in messages)
+        completion_tokens = _estimate_tokens(content)
+        behavior._count('success')
+        behavior._count('prompt_tokens', prompt_tokens)
+        behavior._count('completion_tokens', completion_tokens)
+
+        self._send_json(200, {
+            'id': f'stub-{int(time.time() * 1000)}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'deepseek-chat'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        })
+
+
+def create_stub_server(host: str = '127.0.0.1', port: int = 8765,
+                       behavior: Optional[StubBehavior] = None) -> ThreadingHTTPServer:
+    """创建桩服务（port为0时自动分配端口），调用方负责serve_forever/shutdown"""
+    handler = type('ConfiguredStubLLMHandler', (StubLLMHandler,), {
+        'behavior': behavior or StubBehavior()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_stub_server_in_thread(host: str = '127.0.0.1', port: int = 0,
+                                behavior: Optional[StubBehavior] = None) -> ThreadingHTTPServer:
+    """在后台线程启动桩服务，返回的server可通过 server.server_address 获取端口"""
+    server = create_stub_server(host, port, behavior)
+    thread = threading.Thread(target=server.serve_forever, name='stub-llm-server', daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,137 @@
+"""
+LLM调用传输层
+统一DeepSeek chat/completions请求的发送方式，支持三种模式：
+- live: 直接请求 base_url
+- record: 请求 base_url，并把成功响应按请求内容哈希保存为fixture
+- replay: 只从fixture读取响应，不访问网络，便于离线、可复现地测试和压测
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TRANSPORT_LIVE = 'live'
+TRANSPORT_RECORD = 'record'
+TRANSPORT_REPLAY = 'replay'
+
+# 参与fixture匹配的请求字段
+FIXTURE_KEY_FIELDS = ('model', 'messages', 'max_tokens', 'temperature')
+
+
+class LLMFixtureStore:
+    """按请求内容哈希存取LLM响应fixture"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(payload: Dict[str, Any]) -> str:
+        """计算请求的fixture键"""
+        canonical = json.dumps(
+            {field: payload.get(field) for field in FIXTURE_KEY_FIELDS},
+            sort_keys=True, ensure_ascii=False, separators=(',', ':')
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f'{key}.json'
+
+    def load(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """读取请求对应的响应体，不存在时返回None"""
+        path = self._path(self.key_for(payload))
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f).get('response')
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取LLM fixture失败 {path}: {e}")
+            return None
+
+    def save(self, payload: Dict[str, Any], response: Dict[str, Any]):
+        """保存请求与响应"""
+        path = self._path(self.key_for(payload))
+        record = {
+            'request': {field: payload.get(field) for field in FIXTURE_KEY_FIELDS},
+            'response': response,
+        }
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+
+
+def _json_response(status_code: int, body: Dict[str, Any], url: str) -> requests.Response:
+    """构造与requests.post返回值一致的响应对象"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    response.headers['Content-Type'] = 'application/json'
+    response.encoding = 'utf-8'
+    response.url = url
+    return response
+
+
+def get_transport_mode() -> str:
+    """当前传输模式"""
+    config = getattr(settings, 'DEEPSEEK_CONFIG', {})
+    mode = config.get('transport_mode', TRANSPORT_LIVE) or TRANSPORT_LIVE
+    if mode not in (TRANSPORT_LIVE, TRANSPORT_RECORD, TRANSPORT_REPLAY):
+        logger.warning(f"未知的LLM传输模式 {mode}，按live处理")
+        return TRANSPORT_LIVE
+    return mode
+
+
+_fixture_store: Optional[LLMFixtureStore] = None
+
+
+def get_fixture_store() -> LLMFixtureStore:
+    """获取fixture存储单例"""
+    global _fixture_store
+
+    if _fixture_store is None:
+        config = getattr(settings, 'DEEPSEEK_CONFIG', {})
+        _fixture_store = LLMFixtureStore(
+            config.get('fixtures_dir') or os.path.join(settings.BASE_DIR, 'fixtures', 'llm')
+        )
+    return _fixture_store
+
+
+def post_chat_completion(url: str, headers: Dict[str, str], payload: Dict[str, Any],
+                         timeout: float) -> requests.Response:
+    """
+    发送chat/completions请求
+
+    replay模式下缺少fixture时返回404响应，调用方按普通API错误处理并降级。
+    """
+    mode = get_transport_mode()
+
+    if mode == TRANSPORT_REPLAY:
+        body = get_fixture_store().load(payload)
+        if body is None:
+            key = LLMFixtureStore.key_for(payload)
+            logger.warning(f"LLM回放缺少fixture: {key}")
+            return _json_response(404, {'error': {'message': f'fixture not found: {key}'}}, url)
+        return _json_response(200, body, url)
+
+    response = requests.post(url, headers=headers, json=payload, timeout=timeout)
+
+    if mode == TRANSPORT_RECORD and response.status_code == 200:
+        try:
+            get_fixture_store().save(payload, response.json())
+        except Exception as e:
+            logger.warning(f"保存LLM fixture失败: {e}")
+
+    return response
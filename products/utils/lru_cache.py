@@ -0,0 +1,82 @@
+"""
+有界LRU缓存
+供进程级单例（如智能属性映射器）缓存主键等小对象，
+避免长期运行的worker中缓存无限增长
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+
+class BoundedLRUCache:
+    """线程安全的定长LRU缓存，附带命中率统计"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = max(1, int(maxsize))
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """读取但不计入命中统计、不调整淘汰顺序（用于预检）"""
+        with self._lock:
+            return self._data.get(key, default)
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存内容（保留命中统计）"""
+        with self._lock:
+            self._data.clear()
+
+    def values(self):
+        with self._lock:
+            return list(self._data.values())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def memory_bytes(self) -> int:
+        """估算占用内存（容器本身加键值的浅层大小）"""
+        with self._lock:
+            items = list(self._data.items())
+        size = sys.getsizeof(self._data)
+        for key, value in items:
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+        return size
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'memory_bytes': self.memory_bytes(),
+        }
@@ -0,0 +1,113 @@
+"""
+字符n-gram相似度索引
+用倒排索引快速召回候选项，再用SequenceMatcher精排，
+避免对全部属性名/属性值逐一计算相似度
+"""
+
+import heapq
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _normalize(text: str) -> str:
+    """统一大小写和空白，保证索引与查询口径一致"""
+    return ' '.join(str(text).lower().split())
+
+
+def char_ngrams(text: str, n: int = 2) -> Set[str]:
+    """生成带首尾填充的字符n-gram集合（中文属性名较短，默认用二元组）"""
+    padded = f'^{text}$'
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class NGramSimilarityIndex:
+    """
+    n-gram倒排相似度索引
+
+    search() 的评分口径与原先逐一比较时一致（SequenceMatcher.ratio），
+    只是先通过倒排表召回共享n-gram的条目，并按长度上界剪枝。
+    """
+
+    def __init__(self, n: int = 2, candidate_limit: int = 32):
+        self.n = n
+        self.candidate_limit = candidate_limit
+        self._texts: List[str] = []
+        self._payloads: List[Any] = []
+        self._gram_counts: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._exact: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def add(self, text: str, payload: Any):
+        """添加条目，相同文本只保留第一次出现的条目"""
+        if not text:
+            return
+        normalized = _normalize(text)
+        if normalized in self._exact:
+            return
+
+        entry_id = len(self._texts)
+        grams = char_ngrams(normalized, self.n)
+        self._texts.append(normalized)
+        self._payloads.append(payload)
+        self._gram_counts.append(len(grams))
+        self._exact[normalized] = entry_id
+        for gram in grams:
+            self._postings[gram].append(entry_id)
+
+    def extend(self, items: Iterable[Tuple[str, Any]]):
+        """批量添加 (文本, 载荷) 条目"""
+        for text, payload in items:
+            self.add(text, payload)
+
+    def get_exact(self, text: str) -> Optional[Any]:
+        """精确匹配（忽略大小写和多余空白）"""
+        entry_id = self._exact.get(_normalize(text))
+        return self._payloads[entry_id] if entry_id is not None else None
+
+    def search(self, query: str, threshold: float = 0.0,
+               top_k: int = 5) -> List[Tuple[float, Any]]:
+        """返回相似度不低于阈值的前top_k个 (相似度, 载荷)，按相似度降序"""
+        if not query or not self._texts:
+            return []
+
+        normalized = _normalize(query)
+        entry_id = self._exact.get(normalized)
+        if entry_id is not None:
+            return [(1.0, self._payloads[entry_id])]
+
+        query_grams = char_ngrams(normalized, self.n)
+        overlaps: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            for candidate in self._postings.get(gram, ()):
+                overlaps[candidate] += 1
+
+        query_len = len(normalized)
+        query_gram_count = len(query_grams)
+        scored = []
+        for candidate, overlap in overlaps.items():
+            text_len = len(self._texts[candidate])
+            # ratio = 2M / (la + lb) 的上界为 2*min(la, lb) / (la + lb)
+            if 2.0 * min(query_len, text_len) / (query_len + text_len) < threshold:
+                continue
+            dice = 2.0 * overlap / (query_gram_count + self._gram_counts[candidate])
+            scored.append((dice, candidate))
+
+        candidates = heapq.nlargest(self.candidate_limit, scored)
+
+        results = []
+        for _, candidate in candidates:
+            matcher = SequenceMatcher(None, normalized, self._texts[candidate])
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= threshold:
+                results.append((ratio, candidate))
+
+        results.sort(key=lambda item: (-item[0], item[1]))
+        return [(ratio, self._payloads[candidate]) for ratio, candidate in results[:top_k]]
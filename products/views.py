@@ -4,26 +4,37 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Min, Max, Count, Prefetch
+from django.db.models import Q, Count, Prefetch
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.admin.views.decorators import staff_member_required
 from django.core.cache import cache
-from django.db.models import Q, Min, Max, Count, Prefetch
-from django.utils.decorators import method_decorator
 from django.views import View
 from django.conf import settings
 import json
 import logging
 
-from .models import Category, Brand, Attribute, AttributeValue, SPU, SKU, SPUAttribute
+from .models import Category, Brand, Attribute, AttributeValue, SPU, SKU, SPUAttribute, ProductReadModel
 from .serializers import (
     CategorySerializer, BrandSerializer, AttributeSerializer, 
-    SPUSerializer, SKUListSerializer, SKUDetailSerializer, FilterSerializer
+    SPUSerializer, SKUListSerializer, SKUDetailSerializer,
+    ProductReadModelSerializer
+)
+from .pagination import CatalogPagination
+from .services.filter_metadata import get_filter_metadata_entry
+from .services.read_model import filter_read_models, read_model_config
+from .utils.category_tree import category_tree_etag, get_category_tree_json, subtree_q
+from .utils.conditional_get import (
+    CATEGORIES_VERSION, PRODUCTS_VERSION, conditional_on_versions, request_etag
 )
+from .services.search import (
+    apply_attribute_filters, autocomplete_skus, compute_facets, parse_attribute_filters, search_products
+)
+from .services.search.filters import FullTextSearchFilter
 
 logger = logging.getLogger(__name__)
 
@@ -62,11 +73,16 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['order', 'name', 'created_at', 'level']
     ordering = ['order', 'name']
     
-    @method_decorator(dev_cache_page(60 * 15))  # 开发环境禁用缓存
+    @conditional_on_versions(CATEGORIES_VERSION)
     def list(self, request, *args, **kwargs):
-        """获取分类列表 - 支持层级展示"""
+        """获取分类列表 - 支持层级展示，分类未变化时按 If-None-Match 返回304"""
         return super().list(request, *args, **kwargs)
     
+    @conditional_on_versions(CATEGORIES_VERSION)
+    def retrieve(self, request, *args, **kwargs):
+        """分类详情，分类未变化时按 If-None-Match 返回304"""
+        return super().retrieve(request, *args, **kwargs)
+    
     def get_queryset(self):
         """自定义查询集"""
         queryset = super().get_queryset()
@@ -88,10 +104,15 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def tree(self, request):
-        """获取完整的分类树"""
-        categories = Category.objects.filter(is_active=True, level=0)
-        serializer = self.get_serializer(categories, many=True)
-        return Response(serializer.data)
+        """获取完整的分类树（嵌套children，按版本号缓存JSON，支持If-None-Match）"""
+        not_modified = get_conditional_response(request, etag=category_tree_etag())
+        if not_modified is not None:
+            return not_modified
+        
+        version, content = get_category_tree_json()
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = category_tree_etag(version)
+        return response
     
     @action(detail=False, methods=['get'])
     def all_levels(self, request):
@@ -207,32 +228,57 @@ class SPUViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ['name', 'code', 'description']
     ordering_fields = ['name', 'created_at']
     ordering = ['-created_at']
+    pagination_class = CatalogPagination
     
     def get_queryset(self):
         """自定义查询集"""
-        return super().get_queryset().select_related('category').prefetch_related(
-            'spuattribute_set__attribute'
-        )
+        return SPUSerializer.setup_eager_loading(super().get_queryset().select_related('category'))
 
 
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     """产品API视图集 - 主要的产品查询接口"""
     queryset = SKU.objects.filter(status='active')
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
+    pagination_class = CatalogPagination
     filterset_fields = ['brand', 'spu__category', 'status', 'is_featured']
     search_fields = ['name', 'code', 'description', 'selling_points', 'tags']
     ordering_fields = ['name', 'price', 'stock_quantity', 'created_at']
     ordering = ['-created_at']
     
+    @conditional_on_versions(PRODUCTS_VERSION)
+    def list(self, request, *args, **kwargs):
+        """产品列表，产品数据未变化时按 If-None-Match 返回304"""
+        return super().list(request, *args, **kwargs)
+    
+    @conditional_on_versions(PRODUCTS_VERSION)
+    def retrieve(self, request, *args, **kwargs):
+        """产品详情，产品数据未变化时按 If-None-Match 返回304"""
+        return super().retrieve(request, *args, **kwargs)
+    
+    def uses_read_model(self):
+        """产品列表（含筛选、search检索）是否直接读取读模型，由 READ_MODEL_CONFIG 开关控制"""
+        return self.action == 'list' and read_model_config().get('serve_product_list', False)
+    
     def get_serializer_class(self):
         """根据action返回不同的序列化器"""
+        if self.uses_read_model():
+            return ProductReadModelSerializer
         if self.action == 'list':
             return SKUListSerializer
         return SKUDetailSerializer
     
+    def filter_queryset(self, queryset):
+        """读模型的筛选、检索和排序参数与SKU列表一致，在单表上处理"""
+        if self.uses_read_model():
+            return filter_read_models(queryset, self.request.query_params)
+        return super().filter_queryset(queryset)
+    
     def get_queryset(self):
         """自定义查询集"""
+        if self.uses_read_model():
+            return ProductReadModel.objects.all()
+        
         queryset = super().get_queryset()
         
         # 价格范围筛选
@@ -253,31 +299,17 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         # 分类筛选（支持子分类）
         category_id = self.request.query_params.get('category', None)
         if category_id:
-            try:
-                category = Category.objects.get(id=category_id)
-                # 获取该分类及其所有子分类
-                def get_child_categories(parent_category):
-                    """递归获取所有子分类ID"""
-                    child_ids = [parent_category.id]
-                    for child in parent_category.get_children():
-                        child_ids.extend(get_child_categories(child))
-                    return child_ids
-                
-                category_ids = get_child_categories(category)
-                queryset = queryset.filter(spu__category_id__in=category_ids)
-            except Category.DoesNotExist:
-                pass
+            # 该分类及其所有子分类：按tree_id和lft区间连接分类表
+            category_filter = subtree_q(category_id, 'spu__category')
+            if category_filter is not None:
+                queryset = queryset.filter(category_filter)
         
-        # 属性筛选
-        for key, value in self.request.query_params.items():
-            if key.startswith('attr_') and value:
-                attr_code = key[5:]  # 去掉 'attr_' 前缀
-                queryset = queryset.filter(
-                    sku_attribute_values__attribute__code=attr_code,
-                    sku_attribute_values__custom_value=value
-                ).distinct()
+        # 属性筛选（每个属性一个EXISTS子查询）；分面接口按属性分别应用，已选属性的计数排除自身条件
+        if self.action != 'facets':
+            queryset = apply_attribute_filters(queryset, parse_attribute_filters(self.request.query_params))
         
-        return queryset.select_related('brand', 'spu__category').prefetch_related('images')
+        # 按当前序列化器预加载关联数据，序列化时不再逐行查询
+        return self.get_serializer_class().setup_eager_loading(queryset)
     
     @action(detail=False, methods=['get'])
     def featured(self, request):
@@ -298,6 +330,19 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """当前筛选条件下各可筛选属性值的产品数（参数与产品列表相同，多选属性按分面口径计数）"""
+        queryset = self.filter_queryset(self.get_queryset())
+        selected = parse_attribute_filters(request.query_params)
+        return Response({'facets': compute_facets(queryset, selected)})
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """编码/名称自动补全（pg_trgm索引召回，按相似度返回前10个）"""
+        query = request.query_params.get('q', '')
+        return Response({'query': query, 'results': autocomplete_skus(query)})
+
     @action(detail=False, methods=['get'])
     def search(self, request):
         """高级搜索"""
@@ -305,16 +350,8 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         if not query:
             return Response({'error': '搜索关键词不能为空'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # 构建搜索查询
-        search_query = Q(name__icontains=query) | \
-                      Q(code__icontains=query) | \
-                      Q(description__icontains=query) | \
-                      Q(selling_points__icontains=query) | \
-                      Q(tags__icontains=query) | \
-                      Q(spu__name__icontains=query) | \
-                      Q(brand__name__icontains=query)
-        
-        queryset = self.get_queryset().filter(search_query)
+        # 全文检索（检索文档GIN索引），按相关度排序
+        queryset = search_products(self.get_queryset(), query)
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -328,26 +365,21 @@ class FilterViewSet(viewsets.ViewSet):
     """筛选器API视图集"""
     permission_classes = [AllowAny]
     
-    @method_decorator(dev_cache_page(60 * 30))  # 开发环境禁用缓存
     def list(self, request):
-        """获取筛选器数据"""
-        data = {
-            'categories': Category.objects.filter(is_active=True, level=0),
-            'brands': Brand.objects.filter(is_active=True),
-            'attributes': Attribute.objects.filter(is_active=True, is_filterable=True),
-            'price_range': {
-                'min': SKU.objects.filter(status='active').aggregate(Min('price'))['price__min'] or 0,
-                'max': SKU.objects.filter(status='active').aggregate(Max('price'))['price__max'] or 0,
-            },
-            'status_choices': [
-                {'value': 'active', 'label': '在售'},
-                {'value': 'inactive', 'label': '停售'},
-                {'value': 'draft', 'label': '草稿'},
-            ]
-        }
-        
-        serializer = FilterSerializer(data)
-        return Response(serializer.data)
+        """
+        获取筛选器数据（预先计算的缓存条目，一次缓存读取）
+
+        ETag取自缓存条目的内容标记：数据变更后条目可能在 refresh_interval 内尚未重算，
+        按版本号生成ETag会把旧内容标成新版本
+        """
+        entry = get_filter_metadata_entry()
+        etag = request_etag(request, [entry['token']])
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = Response(entry['payload'])
+        response['ETag'] = etag
+        return response
 
 
 class AttributeAPIView(View):
@@ -388,12 +420,11 @@ class AttributeAPIView(View):
             
             # 按分类筛选 - 根据该分类下SPU常用的属性
             if category_id:
-                try:
-                    category = Category.objects.get(id=category_id)
+                category_filter = subtree_q(category_id, 'spu__category')
+                if category_filter is not None:
                     # 获取该分类及其子分类下所有SPU使用的属性
-                    related_categories = category.get_descendants(include_self=True)
                     spu_attributes = SPUAttribute.objects.filter(
-                        spu__category__in=related_categories
+                        category_filter
                     ).values_list('attribute_id', flat=True).distinct()
                     
                     if spu_attributes:
@@ -404,8 +435,6 @@ class AttributeAPIView(View):
                             },
                             order_by=['-is_category_common', 'order', 'name']
                         )
-                except Category.DoesNotExist:
-                    pass
             
             # 按属性类型筛选
             if attribute_type:
@@ -567,12 +596,9 @@ class CategoryAttributesAPIView(View):
                     'error': '分类不存在或已停用'
                 }, status=404)
             
-            # 获取该分类及其子分类
-            related_categories = category.get_descendants(include_self=True)
-            
-            # 统计该分类下SPU使用的属性频率
+            # 统计该分类及其子分类下SPU使用的属性频率（tree_id + lft区间）
             attribute_usage = SPUAttribute.objects.filter(
-                spu__category__in=related_categories,
+                subtree_q(category, 'spu__category'),
                 spu__is_active=True,
                 attribute__is_active=True
             ).values(
@@ -607,10 +633,7 @@ class CategoryAttributesAPIView(View):
                 recommendations.append(rec_data)
             
             # 获取该分类的总SPU数量
-            total_spus = SPU.objects.filter(
-                category__in=related_categories,
-                is_active=True
-            ).count()
+            total_spus = category.get_product_count()
             
             response_data = {
                 'success': True,
@@ -965,9 +988,11 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from decimal import Decimal
-from .models import SKU, ProductsPricingRule, ProductsDimension, SPU
+from .models import SKU, ProductsDimension, SPU
 from .serializers import SKUDetailSerializer
+from .services.pricing import (
+    calculate_batch_quotes, calculate_sku_quote, get_rule_applicability, get_sku_pricing_table
+)
 
 
 @api_view(['POST'])
@@ -987,110 +1012,64 @@ def calculate_dynamic_price(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 获取SKU信息
-        sku = get_object_or_404(SKU, id=sku_id)
+        # 在编译好的定价表上计算（定价表按版本号缓存，命中时不查询数据库）
+        result = calculate_sku_quote(sku_id, custom_dimensions)
+        if result is None:
+            get_object_or_404(SKU, id=sku_id)
+        
+        return Response(result)
+        
+    except Exception as e:
+        return Response(
+            {'error': f'价格计算失败: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def calculate_dynamic_price_batch(request):
+    """
+    批量动态价格计算API - 一次请求为整面柜墙的多个SKU报价
+
+    请求体: {"items": [{"sku_id": 1, "dimensions": {"height": 2400}}, ...]}
+    每项结果与单个计算接口结构一致，另附 index；summary 中为合计金额。
+    """
+    try:
+        items = request.data.get('items')
+        max_items = getattr(settings, 'PRICING_CONFIG', {}).get('batch_max_items', 200)
         
-        if not sku.spu:
+        if not isinstance(items, list) or not items:
             return Response(
-                {'error': '该SKU没有关联的SPU，无法计算价格'},
+                {'error': '缺少items参数'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 获取适用的加价规则（按优先级排序：SKU专属 > SPU通用）
-        applicable_rules = ProductsPricingRule.get_applicable_rules(sku)
-        
-        if not applicable_rules.exists():
-            return Response({
-                'sku_id': sku_id,
-                'sku_name': sku.name,
-                'base_price': float(sku.price),
-                'total_price': float(sku.price),
-                'pricing_details': [],
-                'calculation_summary': {
-                    'total_increment': 0.0,
-                    'applied_rules_count': 0,
-                    'calculation_time': timezone.now().isoformat(),
-                    'message': '无适用的加价规则'
-                }
-            })
-        
-        # 获取SKU的标准尺寸
-        sku_dimensions = {}
-        for dimension in sku.dimensions.all():
-            sku_dimensions[dimension.dimension_type] = {
-                'standard_value': float(dimension.standard_value),
-                'unit': dimension.unit
-            }
-        
-        # 计算价格
-        total_increment = Decimal('0')
-        pricing_details = []
-        used_rule_types = set()  # 跟踪已使用的规则类型，避免重复应用
-        
-        for rule in applicable_rules:
-            # 如果该规则类型已经被更高优先级的规则处理过，跳过
-            if rule.rule_type in used_rule_types:
-                continue
-            
-            # 获取对应维度的自定义值和标准值
-            custom_value = custom_dimensions.get(rule.rule_type)
-            standard_dimension = sku_dimensions.get(rule.rule_type)
-            
-            if custom_value is None or standard_dimension is None:
-                continue
-            
-            custom_value = Decimal(str(custom_value))
-            threshold_value = rule.threshold_value
-            
-            # 计算超出值
-            if custom_value > threshold_value:
-                excess_value = custom_value - threshold_value
-                increment = rule.calculate_increment(excess_value)
-                
-                if increment > 0:
-                    total_increment += increment
-                    pricing_details.append({
-                        'rule_id': rule.id,
-                        'rule_name': rule.name,
-                        'rule_type': rule.get_rule_type_display(),
-                        'rule_scope': rule.rule_scope,  # 新增：显示规则范围
-                        'priority': rule.priority,      # 新增：显示优先级
-                        'threshold_value': float(threshold_value),
-                        'custom_value': float(custom_value),
-                        'excess_value': float(excess_value),
-                        'unit': standard_dimension['unit'],
-                        'calculation_method': rule.get_calculation_method_display(),
-                        'price_increment': float(rule.price_increment),
-                        'calculated_increment': float(increment),
-                        'unit_increment': float(rule.unit_increment)
-                    })
-                    
-                    # 标记该规则类型已被处理
-                    used_rule_types.add(rule.rule_type)
+        if len(items) > max_items:
+            return Response(
+                {'error': f'单次最多计算{max_items}项'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # 计算最终价格
-        base_price = sku.price
-        total_price = base_price + total_increment
+        parsed_items = []
+        for index, item in enumerate(items):
+            sku_id = item.get('sku_id') if isinstance(item, dict) else None
+            dimensions = item.get('dimensions', {}) if isinstance(item, dict) else None
+            try:
+                int(sku_id)
+            except (TypeError, ValueError):
+                return Response(
+                    {'error': f'第{index + 1}项缺少有效的sku_id参数'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not isinstance(dimensions, dict):
+                return Response(
+                    {'error': f'第{index + 1}项的dimensions必须是对象'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            parsed_items.append((sku_id, dimensions))
         
-        return Response({
-            'sku_id': sku_id,
-            'sku_name': sku.name,
-            'sku_code': sku.code,
-            'spu_name': sku.spu.name,
-            'base_price': float(base_price),
-            'total_price': float(total_price),
-            'pricing_details': pricing_details,
-            'calculation_summary': {
-                'total_increment': float(total_increment),
-                'applied_rules_count': len(pricing_details),
-                'calculation_time': timezone.now().isoformat(),
-                'rule_priority_info': {
-                    'sku_specific_rules': len([r for r in applicable_rules if r.sku]),
-                    'spu_general_rules': len([r for r in applicable_rules if not r.sku]),
-                    'total_available_rules': applicable_rules.count()
-                }
-            }
-        })
+        return Response(calculate_batch_quotes(parsed_items))
         
     except Exception as e:
         return Response(
@@ -1187,6 +1166,97 @@ def get_pricing_rules(request, spu_id):
         )
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_sku_applicable_rules(request, sku_id):
+    """
+    SKU适用规则索引API - 返回指定日期（默认今天）各规则类型的候选规则及有效期窗口
+    """
+    from datetime import date
+    
+    try:
+        day = date.fromisoformat(request.GET['date']) if request.GET.get('date') else timezone.now().date()
+    except ValueError:
+        return Response({'error': 'date格式应为YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    table = get_sku_pricing_table(sku_id)
+    if table is None:
+        return Response({'error': 'SKU不存在'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response(get_rule_applicability(table, day))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_spu_price_matrix(request, spu_id):
+    """
+    SPU价格矩阵API - 在尺寸网格上批量计算SPU下所有SKU的价格
+
+    参数: height/width/depth（'2200:2800:50' 或 '2335,2400'），
+    可选 sku（逗号分隔的SKU ID）、date（YYYY-MM-DD）、export（json/csv/parquet，
+    不使用format参数名是因为它被DRF用于内容协商）
+    """
+    import io
+    import time
+    from datetime import date
+    from django.http import HttpResponse
+    from .services.pricing.price_matrix import (
+        MATRIX_AXES, build_price_matrix, matrix_rows, write_matrix_csv, write_matrix_parquet
+    )
+    
+    output_format = request.GET.get('export', 'json')
+    if output_format not in ('json', 'csv', 'parquet'):
+        return Response({'error': 'export仅支持json、csv、parquet'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        spu = get_object_or_404(SPU, id=spu_id)
+        axes = {name: request.GET.get(name) for name in MATRIX_AXES}
+        sku_ids = [int(value) for value in request.GET.get('sku', '').split(',') if value.strip()]
+        day = date.fromisoformat(request.GET['date']) if request.GET.get('date') else None
+        max_cells = getattr(settings, 'PRICING_CONFIG', {}).get('matrix_max_cells', 500000)
+        
+        start_time = time.perf_counter()
+        matrix = build_price_matrix(spu.id, axes, sku_ids=sku_ids, day=day, max_cells=max_cells)
+        elapsed_ms = round((time.perf_counter() - start_time) * 1000, 2)
+    except (ValueError, ArithmeticError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        filename = f'price_matrix_spu_{spu.id}'
+        if output_format == 'csv':
+            stream = io.StringIO()
+            write_matrix_csv(matrix, stream)
+            response = HttpResponse(stream.getvalue().encode('utf-8-sig'), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+            return response
+        
+        if output_format == 'parquet':
+            buffer = io.BytesIO()
+            try:
+                write_matrix_parquet(matrix, buffer)
+            except ImportError:
+                return Response({'error': '服务器未安装pyarrow，无法导出Parquet'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+            response = HttpResponse(buffer.getvalue(), content_type='application/vnd.apache.parquet')
+            response['Content-Disposition'] = f'attachment; filename="{filename}.parquet"'
+            return response
+        
+        rows = matrix_rows(matrix)
+        return Response({
+            'spu_id': spu.id,
+            'spu_name': spu.name,
+            'sku_count': len(set(matrix['sku_id'].tolist())),
+            'row_count': len(rows),
+            'elapsed_ms': elapsed_ms,
+            'rows': rows,
+        })
+        
+    except Exception as e:
+        return Response(
+            {'error': f'生成价格矩阵失败: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_sku_by_spu(request):